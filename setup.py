@@ -33,6 +33,7 @@ setuptools.setup(
     packages=setuptools.find_packages(where="src"),
     install_requires=['hedera-sdk-py>=2.0.9',
                       'colorama>=0.4.4',
+                      'cryptography>=3.1',
                       'python-dotenv>=0.18.0',
                       'requests>=2.19.1'],
     python_requires=">=3.6",
@@ -0,0 +1,292 @@
+import re
+import csv
+import json
+from functools import lru_cache
+
+from hedera_cli.entity_id import parse as parse_entity_id
+
+MASK = (1 << 64) - 1
+
+ROUND_CONSTANTS = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+    ]
+
+# ROTATIONS[x][y]
+ROTATIONS = [
+    [0, 36, 3, 41, 18],
+    [1, 44, 10, 45, 2],
+    [62, 6, 43, 15, 61],
+    [28, 55, 25, 21, 56],
+    [27, 20, 39, 8, 14],
+    ]
+
+ARRAY_RE = re.compile(r"^(.*)\[(\d*)\]$")
+
+
+def _rol(v, n):
+    return ((v << n) | (v >> (64 - n))) & MASK
+
+
+def _keccak_f(a):
+    for rc in ROUND_CONSTANTS:
+        c = [a[x] ^ a[x + 5] ^ a[x + 10] ^ a[x + 15] ^ a[x + 20] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ _rol(c[(x + 1) % 5], 1) for x in range(5)]
+        a = [a[i] ^ d[i % 5] for i in range(25)]
+        b = [0] * 25
+        for x in range(5):
+            for y in range(5):
+                b[y + 5 * ((2 * x + 3 * y) % 5)] = _rol(a[x + 5 * y], ROTATIONS[x][y])
+        a = [b[i] ^ (~b[(i + 1) % 5 + i - i % 5] & b[(i + 2) % 5 + i - i % 5]) for i in range(25)]
+        a[0] ^= rc
+    return a
+
+
+def keccak256(data):
+    "Ethereum's keccak-256 (original keccak padding, not hashlib's sha3_256)"
+    rate = 136
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(b"\x00" * (-len(padded) % rate))
+    padded[-1] |= 0x80
+    state = [0] * 25
+    for off in range(0, len(padded), rate):
+        block = padded[off:off + rate]
+        for i in range(rate // 8):
+            state[i] ^= int.from_bytes(block[i * 8:i * 8 + 8], "little")
+        state = _keccak_f(state)
+    return b"".join(s.to_bytes(8, "little") for s in state[:4])
+
+
+def canonical_type(t):
+    "uint -> uint256, int -> int256, keeping array suffixes"
+    m = re.match(r"^(u?int)(\[.*)?$", t)
+    if m:
+        return m.group(1) + "256" + (m.group(2) or "")
+    return t
+
+
+@lru_cache(maxsize=None)
+def _split_array(t):
+    m = ARRAY_RE.match(t)
+    if not m:
+        return None, None
+    return m.group(1), int(m.group(2)) if m.group(2) else None
+
+
+@lru_cache(maxsize=None)
+def is_dynamic(t):
+    base, size = _split_array(t)
+    if base is not None:
+        return size is None or is_dynamic(base)
+    return t in ("string", "bytes")
+
+
+@lru_cache(maxsize=None)
+def head_size(t):
+    base, size = _split_array(t)
+    if base is not None and size is not None and not is_dynamic(base):
+        return size * head_size(base)
+    return 32
+
+
+def _uint(n):
+    return n.to_bytes(32, "big")
+
+
+def _pad_right(b):
+    return b + b"\x00" * (-len(b) % 32)
+
+
+def entity_to_address(entity_id):
+    "0.0.x[-checksum] to its long-zero EVM address"
+    shard, realm, num = parse_entity_id(entity_id).key()
+    return shard.to_bytes(4, "big") + realm.to_bytes(8, "big") + num.to_bytes(8, "big")
+
+
+def _to_bytes(v):
+    if isinstance(v, (bytes, bytearray)):
+        return bytes(v)
+    if v.startswith("0x"):
+        return bytes.fromhex(v[2:])
+    return v.encode()
+
+
+def encode_single(t, v):
+    base, size = _split_array(t)
+    if base is not None:
+        v = list(v)
+        if size is None:
+            return _uint(len(v)) + encode([base] * len(v), v)
+        if len(v) != size:
+            raise ValueError("{} needs {} elements".format(t, size))
+        return encode([base] * size, v)
+    if t == "string":
+        data = v.encode()
+        return _uint(len(data)) + _pad_right(data)
+    if t == "bytes":
+        data = _to_bytes(v)
+        return _uint(len(data)) + _pad_right(data)
+    if t == "bool":
+        if isinstance(v, str):
+            v = v.lower() in ("true", "1", "yes")
+        return _uint(1 if v else 0)
+    if t == "address":
+        if isinstance(v, str) and not v.startswith("0x"):
+            return entity_to_address(v).rjust(32, b"\x00")
+        data = _to_bytes(v)
+        if len(data) != 20:
+            raise ValueError("invalid address {}".format(v))
+        return data.rjust(32, b"\x00")
+    if t.startswith("bytes"):
+        data = _to_bytes(v)
+        if len(data) > int(t[5:]):
+            raise ValueError("{} is too long for {}".format(v, t))
+        return _pad_right(data)
+    if t.startswith("uint") or t.startswith("int"):
+        bits = int(t[t.index("int") + 3:])
+        n = int(v, 0) if isinstance(v, str) else int(v)
+        if t.startswith("uint"):
+            lo, hi = 0, 1 << bits
+        else:
+            lo, hi = -(1 << (bits - 1)), 1 << (bits - 1)
+        if not lo <= n < hi:
+            raise ValueError("{} out of range for {}".format(n, t))
+        return (n % (1 << 256)).to_bytes(32, "big")
+    raise ValueError("unsupported ABI type: " + t)
+
+
+def encode(types, values):
+    if len(types) != len(values):
+        raise ValueError("expected {} parameters, got {}".format(len(types), len(values)))
+    heads, tails = [], []
+    offset = sum(head_size(t) for t in types)
+    for t, v in zip(types, values):
+        if is_dynamic(t):
+            heads.append(_uint(offset))
+            tail = encode_single(t, v)
+            tails.append(tail)
+            offset += len(tail)
+        else:
+            heads.append(encode_single(t, v))
+    return b"".join(heads + tails)
+
+
+def decode_single(t, data, pos=0):
+    "decode a static value at `pos`, or a dynamic value whose encoding starts at `pos`"
+    base, size = _split_array(t)
+    if base is not None:
+        if size is None:
+            size = int.from_bytes(data[pos:pos + 32], "big")
+            pos += 32
+        return decode([base] * size, data[pos:])
+    word = data[pos:pos + 32]
+    if t in ("string", "bytes"):
+        length = int.from_bytes(word, "big")
+        raw = data[pos + 32:pos + 32 + length]
+        return raw.decode(errors="replace") if t == "string" else "0x" + raw.hex()
+    if t == "bool":
+        return word[-1] == 1
+    if t == "address":
+        return "0x" + word[12:].hex()
+    if t.startswith("bytes"):
+        return "0x" + word[:int(t[5:])].hex()
+    if t.startswith("uint"):
+        return int.from_bytes(word, "big")
+    if t.startswith("int"):
+        return int.from_bytes(word, "big", signed=True)
+    raise ValueError("unsupported ABI type: " + t)
+
+
+def decode(types, data):
+    values = []
+    pos = 0
+    for t in types:
+        if is_dynamic(t):
+            offset = int.from_bytes(data[pos:pos + 32], "big")
+            values.append(decode_single(t, data, offset))
+        else:
+            values.append(decode_single(t, data, pos))
+        pos += head_size(t)
+    return values
+
+
+def parse_value(t, text):
+    "convert a value typed at the prompt into what `encode_single` expects"
+    if isinstance(text, str) and _split_array(t)[0] is not None:
+        return json.loads(text)
+    return text
+
+
+def parse_args(types, line):
+    """a JSON array, or comma separated values where double quotes keep a value with
+    commas together, one for each of `types`
+    """
+    line = line.strip()
+    if not line:
+        values = []
+    elif line.startswith("["):
+        values = json.loads(line)
+    else:
+        values = next(csv.reader([line], skipinitialspace=True))
+    if len(values) != len(types):
+        raise ValueError("expected {} arguments ({}), got {}".format(len(types), ", ".join(types), len(values)))
+    if line.startswith("["):
+        return values
+    return [parse_value(t, v.strip()) for t, v in zip(types, values)]
+
+
+def signature_of(entry):
+    return "{}({})".format(entry.get("name", ""),
+                           ",".join(canonical_type(i["type"]) for i in entry.get("inputs", [])))
+
+
+class Function:
+    __slots__ = ("name", "inputs", "input_names", "outputs", "signature", "selector", "read_only")
+
+    def __init__(self, entry, selector=None):
+        self.name = entry.get("name", "")
+        self.inputs = tuple(canonical_type(i["type"]) for i in entry.get("inputs", []))
+        self.input_names = tuple(i.get("name", "") for i in entry.get("inputs", []))
+        self.outputs = tuple(canonical_type(o["type"]) for o in entry.get("outputs", []))
+        self.signature = signature_of(entry)
+        self.selector = selector or keccak256(self.signature.encode())[:4]
+        self.read_only = (entry.get("stateMutability") in ("view", "pure")
+                          or entry.get("constant", False))
+
+    def encode_input(self, args):
+        return self.selector + encode(self.inputs, args)
+
+    def decode_output(self, data):
+        return decode(self.outputs, data)
+
+
+def functions(abi):
+    return {e["name"]: Function(e) for e in abi if e.get("type", "function") == "function"}
+
+
+def constructor(abi):
+    for e in abi:
+        if e.get("type") == "constructor":
+            return Function(e)
+    return None
+
+
+def load_artifact(path):
+    """Read a compiled contract JSON (truffle, hardhat or solc style) once.
+    returns (name, abi, bytecode hex without 0x)
+    """
+    with open(path) as fh:
+        data = json.load(fh)
+    if "abi" not in data or "bytecode" not in data:
+        raise ValueError("contract JSON file must have abi and bytecode")
+    bytecode = data["bytecode"]
+    if isinstance(bytecode, dict):
+        bytecode = bytecode.get("object", "")
+    if bytecode.startswith("0x"):
+        bytecode = bytecode[2:]
+    return data.get("contractName", "contract"), data["abi"], bytecode
@@ -0,0 +1,312 @@
+"""Local store of account activity for aggregate queries.
+
+`analytics sync` copies an account's transactions and their transfers from the
+mirror node into SQLite (~/.hedera-cli/analytics/<network>.db), starting after the
+last consensus timestamp already stored, so it can be run again at any time.  A
+page of transactions is stored in one SQL transaction, an interrupted sync resumes
+where it stopped.
+
+`legs` has, per stored transaction and token, the synced account's net amount
+(party = account) and how it splits over its counterparties: the accounts on the
+other side of the transaction, each in proportion to its own net amount, with
+positive amounts received from the party and negative ones sent to it.  The node
+and fee collection accounts are counterparties only when the account paid the
+fee, transfers the account isn't part of aren't stored.  Timestamps are integer
+nanoseconds, hbar amounts tinybars and token amounts the token's smallest unit.
+
+Sync also keeps totals per day and per 32 days (`fee_totals` and `leg_totals`,
+`span` is the bucket size in days); the built-in queries cover a --since/--until
+range with the largest whole buckets that fit and read only the partial days at
+its ends from `txs` and `legs`, so they don't get much slower with the number of
+transactions.  The database can be queried directly with sqlite3.
+"""
+import time
+import sqlite3
+
+from collections import defaultdict
+
+from hedera_cli import mirror
+from hedera_cli.store import data_path
+
+HBAR = "hbar"
+PAGE_LIMIT = 100
+DAY = 86_400 * 1_000_000_000
+END = 2 ** 63 - 1
+SPANS = (32, 1)  # bucket sizes of the totals, in days, largest first
+SCHEMA_VERSION = 2  # older databases are emptied, sync fills them again
+# where fees go besides the node: fee collection and staking reward accounts
+FEE_ACCOUNTS = ("0.0.98", "0.0.800", "0.0.801")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS synced (
+    account TEXT PRIMARY KEY,
+    since INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS txs (
+    account TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    tx_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    result TEXT NOT NULL,
+    payer TEXT NOT NULL,
+    fee INTEGER NOT NULL,
+    PRIMARY KEY (account, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS legs (
+    account TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    party TEXT NOT NULL,
+    token TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    serial INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS legs_ts ON legs (account, ts, party, token, amount);
+CREATE INDEX IF NOT EXISTS legs_party ON legs (account, party, ts);
+CREATE INDEX IF NOT EXISTS legs_token ON legs (account, token, ts);
+CREATE TABLE IF NOT EXISTS fee_totals (
+    account TEXT NOT NULL,
+    span INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    fee INTEGER NOT NULL,
+    PRIMARY KEY (account, span, bucket, type)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS leg_totals (
+    account TEXT NOT NULL,
+    span INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    party TEXT NOT NULL,
+    token TEXT NOT NULL,
+    legs INTEGER NOT NULL,
+    pos INTEGER NOT NULL,
+    neg INTEGER NOT NULL,
+    PRIMARY KEY (account, span, bucket, party, token)
+) WITHOUT ROWID;
+"""
+
+
+def ns(timestamp):
+    "seconds.nanos to integer nanoseconds"
+    seconds, _, nanos = timestamp.partition(".")
+    return int(seconds) * 1_000_000_000 + int(nanos.ljust(9, "0")[:9] or 0)
+
+
+def timestamp(value):
+    "integer nanoseconds to seconds.nanos"
+    return "{}.{:09d}".format(*divmod(value, 1_000_000_000))
+
+
+def day_string(day):
+    return time.strftime("%Y-%m-%d", time.gmtime(day * 86_400))
+
+
+def split(amount, weights):
+    "`amount` in integer shares proportional to `weights`, adding up to `amount`"
+    total = sum(weights)
+    shares = [amount * w // total for w in weights]
+    shares[weights.index(max(weights))] += amount - sum(shares)
+    return shares
+
+
+def rows(account, tx):
+    "the txs row and the legs rows of one mirror node transaction"
+    ts = ns(tx["consensus_timestamp"])
+    payer = tx["transaction_id"].split("-")[0]
+    txs_row = (account, ts, tx["transaction_id"], tx["name"], tx["result"], payer, int(tx.get("charged_tx_fee") or 0))
+    nets = defaultdict(lambda: defaultdict(int))
+    for t in tx.get("transfers") or []:
+        nets[HBAR][t["account"]] += t["amount"]
+    for t in tx.get("token_transfers") or []:
+        nets[t["token_id"]][t["account"]] += t["amount"]
+    # the fees someone else paid aren't the account's business
+    fee_parties = () if payer == account else (tx.get("node"),) + FEE_ACCOUNTS
+    legs = []
+    for token, net in nets.items():
+        own = net.get(account, 0)
+        if not own:
+            continue
+        legs.append((account, ts, account, token, own, 0))
+        other = [(party, amount) for party, amount in net.items()
+                 if party != account and amount and (amount > 0) != (own > 0)]
+        if token == HBAR:
+            other = [(party, amount) for party, amount in other if party not in fee_parties] or other
+        if other:
+            shares = split(own, [abs(amount) for _, amount in other])
+            legs += [(account, ts, party, token, share, 0) for (party, _), share in zip(other, shares) if share]
+    for t in tx.get("nft_transfers") or []:
+        sender, receiver = t.get("sender_account_id"), t.get("receiver_account_id")
+        if account not in (sender, receiver) or sender == receiver:
+            continue
+        amount, party = (1, sender) if receiver == account else (-1, receiver)
+        legs.append((account, ts, account, t["token_id"], amount, t["serial_number"]))
+        if party:
+            legs.append((account, ts, party, t["token_id"], amount, t["serial_number"]))
+    return txs_row, legs
+
+
+def split_range(since, until, spans=SPANS):
+    """cover since..until (nanoseconds, inclusive) with whole buckets, the largest
+    that fit, and timestamp ranges at the ends:
+    ([(span, first bucket, last bucket)], [(from, to)])
+    """
+    if since > until:
+        return [], []
+    if not spans:
+        return [], [(since, until)]
+    size = spans[0] * DAY
+    first = -(-since // size)
+    last = (until + 1) // size - 1
+    if first > last:
+        return split_range(since, until, spans[1:])
+    buckets, raw = [(spans[0], first, last)], []
+    for lo, hi in ((since, first * size - 1), ((last + 1) * size, until)):
+        more, ends = split_range(lo, hi, spans[1:])
+        buckets += more
+        raw += ends
+    return buckets, raw
+
+
+def _add(totals, key, values):
+    old = totals.get(key)
+    totals[key] = values if old is None else tuple(a + b for a, b in zip(old, values))
+
+
+class Store:
+    def __init__(self, network, path=None):
+        self.path = path or data_path("analytics", network + ".db")
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            with self.db:
+                for table in ("synced", "txs", "legs", "fee_totals", "leg_totals"):
+                    self.db.execute("DROP TABLE IF EXISTS " + table)
+                self.db.execute("PRAGMA user_version = {}".format(SCHEMA_VERSION))
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def last(self, account):
+        "consensus timestamp (ns) of the account's latest stored transaction"
+        return self.db.execute("SELECT max(ts) FROM txs WHERE account = ?", (account,)).fetchone()[0]
+
+    def since(self, account):
+        "where the account's first sync started (ns), None if it hasn't been synced"
+        row = self.db.execute("SELECT since FROM synced WHERE account = ?", (account,)).fetchone()
+        return row[0] if row else None
+
+    def sync(self, account, pages, progress=None, since=0):
+        """store the transactions in `pages` (mirror node /transactions pages, ascending)
+        and add them to the totals, returns the number of transactions stored
+        """
+        count = 0
+        started = time.time()
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO synced VALUES (?, ?)", (account, since))
+        last = self.last(account) or -1
+        for page in pages:
+            txs_rows, legs_rows = [], []
+            for tx in page.get("transactions", []):
+                txs_row, legs = rows(account, tx)
+                # already stored, when a sync overlaps the previous one
+                if txs_row[1] <= last:
+                    continue
+                last = txs_row[1]
+                txs_rows.append(txs_row)
+                legs_rows.extend(legs)
+            fees, legs = {}, {}
+            for span in SPANS:
+                size = span * DAY
+                for _, ts, _, kind, _, payer, fee in txs_rows:
+                    if payer == account:
+                        _add(fees, (account, span, ts // size, kind), (1, fee))
+                for _, ts, party, token, amount, _ in legs_rows:
+                    _add(legs, (account, span, ts // size, party, token), (1, max(amount, 0), max(-amount, 0)))
+            with self.db:
+                self.db.executemany("INSERT INTO txs VALUES (?, ?, ?, ?, ?, ?, ?)", txs_rows)
+                self.db.executemany("INSERT INTO legs VALUES (?, ?, ?, ?, ?, ?)", legs_rows)
+                self.db.executemany(
+                    "INSERT INTO fee_totals VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (account, span, bucket, type)"
+                    " DO UPDATE SET count = count + excluded.count, fee = fee + excluded.fee",
+                    [k + v for k, v in fees.items()])
+                self.db.executemany(
+                    "INSERT INTO leg_totals VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (account, span, bucket, party, token)"
+                    " DO UPDATE SET legs = legs + excluded.legs, pos = pos + excluded.pos, neg = neg + excluded.neg",
+                    [k + v for k, v in legs.items()])
+            count += len(txs_rows)
+            if progress:
+                progress(count, time.time() - started)
+        return count
+
+    def accounts(self):
+        "(account, transactions, first ts, last ts) of each synced account"
+        return self.db.execute("SELECT account, count(*), min(ts), max(ts) FROM txs GROUP BY account").fetchall()
+
+    def _legs(self, account, since, until, where, params, group, spans=SPANS):
+        """{group key: (legs, pos, neg)} of the legs matching `where`, from whole buckets of
+        leg_totals and from legs for the rest.  `group` is a list of columns, 'day' is
+        the UTC day number and needs spans=(1,)
+        """
+        buckets, ends = split_range(since, until, spans)
+        totals = {}
+        columns = ", ".join(group)
+        sql = ("SELECT {}, sum(legs), sum(pos), sum(neg) FROM leg_totals"
+               " WHERE account = ? AND span = ? AND bucket BETWEEN ? AND ? AND {} GROUP BY {}").format(
+               columns.replace("day", "bucket"), where, columns.replace("day", "bucket"))
+        for span, first, last in buckets:
+            for row in self.db.execute(sql, [account, span, first, last] + params):
+                _add(totals, row[:-3], row[-3:])
+        columns = columns.replace("day", "ts / {}".format(DAY))
+        sql = ("SELECT {}, count(*), sum(max(amount, 0)), sum(max(-amount, 0)) FROM legs"
+               " WHERE account = ? AND ts BETWEEN ? AND ? AND {} GROUP BY {}").format(columns, where, columns)
+        for lo, hi in ends:
+            for row in self.db.execute(sql, [account, lo, hi] + params):
+                _add(totals, row[:-3], row[-3:])
+        return totals
+
+    def fees(self, account, since=0, until=None):
+        "(type, transactions, tinybars) the account paid, most expensive first"
+        buckets, ends = split_range(since, until or END)
+        totals = {}
+        for span, first, last in buckets:
+            for kind, count, fee in self.db.execute(
+                    "SELECT type, sum(count), sum(fee) FROM fee_totals"
+                    " WHERE account = ? AND span = ? AND bucket BETWEEN ? AND ? GROUP BY type",
+                    (account, span, first, last)):
+                _add(totals, kind, (count, fee))
+        for lo, hi in ends:
+            for kind, count, fee in self.db.execute(
+                    "SELECT type, count(*), sum(fee) FROM txs WHERE account = ? AND ts BETWEEN ? AND ?"
+                    " AND payer = ? GROUP BY type", (account, lo, hi, account)):
+                _add(totals, kind, (count, fee))
+        return sorted(((kind,) + v for kind, v in totals.items()), key=lambda r: -r[2])
+
+    def flows(self, account, token=None, since=0, until=None, limit=None):
+        """(counterparty, token, amount received from it, amount sent to it, net) seen from
+        the account, largest net flows first
+        """
+        where, params = "party != ?", [account]
+        if token:
+            where += " AND token = ?"
+            params.append(token)
+        totals = self._legs(account, since, until or END, where, params, ["party", "token"])
+        rows = [(party, tok, pos, neg, pos - neg) for (party, tok), (_, pos, neg) in totals.items()]
+        rows.sort(key=lambda r: -abs(r[4]))
+        return rows[:limit] if limit else rows
+
+    def daily(self, account, token=None, since=0, until=None):
+        "(day, token, transfers, received, sent) of the account per UTC day"
+        where, params = "party = ?", [account]
+        if token:
+            where += " AND token = ?"
+            params.append(token)
+        totals = self._legs(account, since, until or END, where, params, ["day", "token"], spans=(1,))
+        return [(day_string(day), tok, n, pos, neg) for (day, tok), (n, pos, neg) in sorted(totals.items())]
+
+
+def amount_string(token, amount):
+    return mirror.hbar_string(amount) if token == HBAR else str(amount)
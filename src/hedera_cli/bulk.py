@@ -0,0 +1,77 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CONCURRENCY = 16
+
+_DONE = object()
+
+
+class Pipeline:
+    """Submit transactions with bounded concurrency and collect receipts in the background.
+
+    submit(item) sends a transaction and returns its response, reconcile(item, response)
+    waits for the receipt.  Submitting never waits for receipts, at most `concurrency`
+    transactions are between submit and reconciled at any time.
+    """
+
+    def __init__(self, submit, reconcile, concurrency=DEFAULT_CONCURRENCY):
+        self.submit = submit
+        self.reconcile = reconcile
+        self.concurrency = concurrency
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self, items):
+        "yield (item, receipt, error) as receipts arrive, in completion order"
+        slots = threading.BoundedSemaphore(self.concurrency)
+        results = queue.Queue()
+        submitters = ThreadPoolExecutor(self.concurrency)
+        reconcilers = ThreadPoolExecutor(self.concurrency)
+        counter = {"submitted": 0}
+
+        def do_reconcile(item, resp):
+            try:
+                results.put((item, self.reconcile(item, resp), None))
+            except Exception as e:
+                results.put((item, None, e))
+            finally:
+                slots.release()
+
+        def do_submit(item):
+            try:
+                resp = self.submit(item)
+            except Exception as e:
+                results.put((item, None, e))
+                slots.release()
+                return
+            reconcilers.submit(do_reconcile, item, resp)
+
+        def feed():
+            for item in items:
+                slots.acquire()
+                if self.stopped.is_set():
+                    slots.release()
+                    break
+                counter["submitted"] += 1
+                submitters.submit(do_submit, item)
+            results.put(_DONE)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        received = 0
+        fed = False
+        try:
+            while not fed or received < counter["submitted"]:
+                res = results.get()
+                if res is _DONE:
+                    fed = True
+                    continue
+                received += 1
+                yield res
+        finally:
+            self.stop()
+            submitters.shutdown(wait=False)
+            reconcilers.shutdown(wait=False)
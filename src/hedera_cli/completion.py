@@ -0,0 +1,296 @@
+"""Tab completion: subcommands and options from the commands' docstrings, entity ids
+from a local index of the ids the CLI has created or looked up.
+
+The index is a prefix tree per kind of entity (account, token, topic, file, contract)
+and network, with the number of ids below every node, so a completion only walks
+the nodes it returns.  When more ids match than fit on a screen, completions stop at
+the next character that tells them apart, e.g. 0.0.1 .. 0.0.9 instead of 40,000 ids.
+The index is persisted as an append-only log in ~/.hedera-cli/ids/<network>.log,
+loaded in the background and compacted at start, and keeps the MAX_IDS most
+recently seen ids.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from hedera_cli.store import data_path
+
+KINDS = ("account", "token", "topic", "file", "contract")
+MAX_IDS = 100_000
+MAX_MATCHES = 50
+
+# docstring placeholders naming an entity, e.g. `token kyc token_id account_id`
+PLACEHOLDER_KINDS = (
+    ("acc", "account"),
+    ("token", "token"),
+    ("nft", "token"),
+    ("topic", "topic"),
+    ("file_id", "file"),
+    ("contract", "contract"),
+    )
+
+_VERB_RE = re.compile(r"^[a-z][a-z_-]*$")
+_OPTION_RE = re.compile(r"--[a-z][a-z-]*")
+
+
+class _Node:
+    __slots__ = ("children", "count", "end")
+
+    def __init__(self):
+        self.children = {}
+        self.count = 0
+        self.end = False
+
+
+class PrefixTree:
+    "a set of strings with prefix lookups"
+
+    def __init__(self):
+        self.root = _Node()
+        self.words = set()
+
+    def __len__(self):
+        return len(self.words)
+
+    def add(self, word):
+        if word in self.words:
+            return False
+        self.words.add(word)
+        node = self.root
+        node.count += 1
+        for c in word:
+            child = node.children.get(c)
+            if child is None:
+                child = node.children[c] = _Node()
+            child.count += 1
+            node = child
+        node.end = True
+        return True
+
+    def remove(self, word):
+        if word not in self.words:
+            return False
+        self.words.discard(word)
+        path = [self.root]
+        node = self.root
+        for c in word:
+            node = node.children[c]
+            path.append(node)
+        node.end = False
+        for n in path:
+            n.count -= 1
+        # prune the branch that no longer leads anywhere
+        for i in range(len(word), 0, -1):
+            if path[i].count:
+                break
+            del path[i - 1].children[word[i - 1]]
+        return True
+
+    def find(self, prefix):
+        node = self.root
+        for c in prefix:
+            node = node.children.get(c)
+            if node is None:
+                return None
+        return node
+
+
+def _walk(node, prefix, out):
+    if node.end:
+        out.append(prefix)
+    for c in sorted(node.children):
+        _walk(node.children[c], prefix + c, out)
+
+
+def complete_nodes(nodes, prefix, limit=MAX_MATCHES):
+    """completions of `prefix` in the trees whose nodes for `prefix` are `nodes`: every
+    match if there are at most `limit`, otherwise the prefix extended to where the
+    matches branch, one completion per branch
+    """
+    nodes = [n for n in nodes if n is not None and n.count]
+    if sum(n.count for n in nodes) <= limit:
+        out = []
+        for n in nodes:
+            _walk(n, prefix, out)
+        return sorted(set(out))
+    while True:
+        if any(n.end for n in nodes):
+            break
+        chars = {c for n in nodes for c in n.children}
+        if len(chars) != 1:
+            break
+        c = chars.pop()
+        prefix += c
+        nodes = [n.children[c] for n in nodes if c in n.children]
+    out = [prefix] if any(n.end for n in nodes) else []
+    out += sorted({prefix + c for n in nodes for c in n.children})
+    return out
+
+
+class IdIndex:
+    """entity ids seen on one network, most recent last, in a prefix tree per kind"""
+
+    def __init__(self, network, path=None, max_ids=MAX_IDS):
+        self.network = network
+        self.path = path or data_path("ids", network + ".log")
+        self.max_ids = max_ids
+        self.lock = threading.Lock()
+        self.trees = {kind: PrefixTree() for kind in KINDS}
+        self.recent = OrderedDict()
+        self.fh = None
+        self.lines = 0
+        # building the trees takes a while with many ids, don't hold up the start
+        self.ready = threading.Event()
+        threading.Thread(target=self._load, daemon=True).start()
+
+    def _load(self):
+        with self.lock:
+            try:
+                if os.path.isfile(self.path):
+                    with open(self.path) as fh:
+                        for line in fh:
+                            try:
+                                kind, entity = line.split()
+                            except ValueError:
+                                # a torn last line from a crash
+                                continue
+                            self.lines += 1
+                            self._add(kind, entity)
+                    if self.lines > 2 * len(self.recent):
+                        self.compact()
+            finally:
+                self.ready.set()
+
+    def __len__(self):
+        return len(self.recent)
+
+    def _add(self, kind, entity):
+        "False if there's nothing to log: an unknown kind, or already the most recent id"
+        if kind not in self.trees:
+            return False
+        key = (kind, entity)
+        if key in self.recent:
+            if next(reversed(self.recent)) == key:
+                return False
+            # logged again so the order survives a restart, compaction drops the old line
+            self.recent.move_to_end(key)
+            return True
+        self.recent[key] = None
+        self.trees[kind].add(entity)
+        while len(self.recent) > self.max_ids:
+            old_kind, old = self.recent.popitem(last=False)[0]
+            self.trees[old_kind].remove(old)
+        return True
+
+    def add(self, kind, entity):
+        "remember `entity` (shard.realm.num) as a `kind`"
+        entity = str(entity).split("-")[0]
+        with self.lock:
+            if not self._add(kind, entity):
+                return
+            if self.fh is None:
+                self.fh = open(self.path, "a")
+            self.fh.write("{} {}\n".format(kind, entity))
+            self.fh.flush()
+            self.lines += 1
+
+    def complete(self, prefix, kinds=KINDS, limit=MAX_MATCHES):
+        if not self.ready.is_set():
+            return []
+        with self.lock:
+            return complete_nodes([self.trees[k].find(prefix) for k in kinds], prefix, limit)
+
+    def compact(self):
+        "rewrite the log with one line per remembered id"
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as fh:
+            for kind, entity in self.recent:
+                fh.write("{} {}\n".format(kind, entity))
+        if self.fh is not None:
+            self.fh.close()
+            self.fh = None
+        os.replace(tmp, self.path)
+        self.lines = len(self.recent)
+
+    def close(self):
+        if self.fh is not None:
+            self.fh.close()
+            self.fh = None
+
+
+class CommandSpec:
+    """what a command's docstring says about its arguments: the subcommand verbs, each
+    verb's options and the entity kind expected at each positional argument
+    """
+
+    def __init__(self, name, doc):
+        self.verbs = []
+        self.options = {None: set()}
+        self.positions = {}
+        verb = None
+        indent = 0
+        for line in (doc or "").splitlines()[1:]:
+            text = line.split("(")[0]
+            words = text.split()
+            if words and words[0] == name:
+                verb = words[1] if len(words) > 1 and _VERB_RE.match(words[1]) else None
+                if verb is not None and verb not in self.options:
+                    self.verbs.append(verb)
+                    self.options[verb] = set()
+                self.positions.setdefault(verb, self._positions(words[1 if verb is None else 2:]))
+                indent = len(line) - len(line.lstrip())
+            elif line.strip() and len(line) - len(line.lstrip()) <= indent:
+                # a note after the usage lines, e.g. `--yes answers the prompts`, is about
+                # every verb; only the indented continuation of a usage line is about its verb
+                verb = None
+            self.options[verb].update(_OPTION_RE.findall(line))
+
+    @staticmethod
+    def _positions(words):
+        "entity kind (or None) of each positional placeholder"
+        kinds = []
+        skip = False
+        for word in words:
+            if skip:
+                skip = False
+                continue
+            if word.lstrip("[").startswith("--"):
+                skip = not word.endswith("]")
+                continue
+            kind = None
+            name = word.strip("[]").lower()
+            for prefix, k in PLACEHOLDER_KINDS:
+                if name.startswith(prefix):
+                    kind = k
+                    break
+            kinds.append(kind)
+        return kinds
+
+    def complete(self, words, text, ids, default_kind=None):
+        """completions of `text` given the `words` before it (without the command)"""
+        if not words and self.verbs:
+            return [v for v in self.verbs if v.startswith(text)]
+        verb = words[0] if words and words[0] in self.options else None
+        if text.startswith("-"):
+            return sorted(o for o in self.options[verb] | self.options[None] if o.startswith(text))
+        # the position of `text` among the positional arguments after the verb,
+        # an option is taken to have a value
+        index = 0
+        skip = False
+        for word in words[1 if verb else 0:]:
+            if skip:
+                skip = False
+            elif word.startswith("--"):
+                skip = True
+            else:
+                index += 1
+        if skip:
+            return []
+        kinds = self.positions.get(verb, [])
+        kind = kinds[index] if index < len(kinds) else None
+        if kind is None and not kinds:
+            kind = default_kind
+        if kind is None or ids is None:
+            return []
+        return ids.complete(text, (kind,))
@@ -0,0 +1,143 @@
+"""Entity ids (shard.realm.num, optionally with a HIP-15 checksum) parsed in Python.
+
+The SDK's AccountId.fromString() and friends are a JNI round trip each, which adds
+up over a CSV of tens of thousands of ids.  Ids are parsed and checksum validated
+here and only turned into SDK objects with to_java() when a transaction is built.
+"""
+import re
+from functools import lru_cache
+
+# HIP-15 ledger ids
+LEDGER_IDS = {
+    "mainnet": b"\x00",
+    "testnet": b"\x01",
+    "previewnet": b"\x02",
+    }
+
+ID_RE = re.compile(r"^(\d+)\.(\d+)\.(\d+)(?:-([a-z]{5}))?$")
+
+_P3 = 26 ** 3
+_P5 = 26 ** 5
+_M = 1_000_003
+_W = 31
+
+
+@lru_cache(maxsize=65536)
+def checksum(network, address):
+    "the 5 letter HIP-15 checksum of `address` (shard.realm.num) on `network`"
+    ledger = LEDGER_IDS.get(network)
+    if ledger is None:
+        raise ValueError("no ledger id for network {}".format(network))
+    d = [10 if c == "." else ord(c) - 48 for c in address]
+    sd0 = sd1 = sd = sh = 0
+    for i, di in enumerate(d):
+        sd = (_W * sd + di) % _P3
+        if i % 2 == 0:
+            sd0 = (sd0 + di) % 11
+        else:
+            sd1 = (sd1 + di) % 11
+    for b in ledger + bytes(6):
+        sh = (_W * sh + b) % _P5
+    c = ((((len(d) % 5) * 11 + sd0) * 11 + sd1) * _P3 + sd + sh) % _P5
+    cp = (c * _M) % _P5
+    letters = []
+    for _ in range(5):
+        letters.append(chr(97 + cp % 26))
+        cp //= 26
+    return "".join(reversed(letters))
+
+
+class EntityId:
+    __slots__ = ("shard", "realm", "num", "checksum")
+
+    def __init__(self, shard, realm, num, checksum=None):
+        self.shard = shard
+        self.realm = realm
+        self.num = num
+        self.checksum = checksum
+
+    def __str__(self):
+        return "{}.{}.{}".format(self.shard, self.realm, self.num)
+
+    def __repr__(self):
+        return "EntityId({!r})".format(self.to_string(self.checksum is not None))
+
+    def __eq__(self, other):
+        return isinstance(other, EntityId) and self.key() == other.key()
+
+    def __lt__(self, other):
+        return self.key() < other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self):
+        return (self.shard, self.realm, self.num)
+
+    def to_string(self, with_checksum=False, network=None):
+        if not with_checksum:
+            return str(self)
+        return "{}-{}".format(self, checksum(network, str(self)) if network else self.checksum)
+
+    def validate(self, network):
+        "raise ValueError if the id has a checksum that doesn't match `network`"
+        if self.checksum is None or network not in LEDGER_IDS:
+            return
+        expected = checksum(network, str(self))
+        if self.checksum != expected:
+            raise ValueError("{}-{} has an invalid checksum for {}, expected {}-{}".format(
+                             self, self.checksum, network, self, expected))
+
+    def to_java(self, cls):
+        "the SDK object, e.g. to_java(AccountId), made once per id"
+        return _java(cls, self.shard, self.realm, self.num)
+
+
+@lru_cache(maxsize=65536)
+def _java(cls, shard, realm, num):
+    # SDK ids are immutable, a batch naming the same token or account a thousand
+    # times makes one JNI call for it
+    return cls(shard, realm, num)
+
+
+def parse(text, network=None):
+    """parse shard.realm.num[-checksum], the checksum is validated when `network` is
+    given (and has a ledger id)
+    """
+    m = ID_RE.match(text.strip())
+    if m is None:
+        raise ValueError("invalid entity id: {}".format(text))
+    shard, realm, num, check = m.groups()
+    eid = EntityId(int(shard), int(realm), int(num), check)
+    if network is not None:
+        eid.validate(network)
+    return eid
+
+
+def parse_many(values, network=None):
+    """parse a column of ids in one pass, returns (ids, errors) where errors is a
+    list of (index, message)
+    """
+    ids = []
+    errors = []
+    match = ID_RE.match
+    ledger = network in LEDGER_IDS
+    for i, text in enumerate(values):
+        m = match(text.strip())
+        if m is None:
+            ids.append(None)
+            errors.append((i, "invalid entity id: {}".format(text)))
+            continue
+        shard, realm, num, check = m.groups()
+        eid = EntityId(int(shard), int(realm), int(num), check)
+        if check is not None and ledger and check != checksum(network, "{}.{}.{}".format(shard, realm, num)):
+            ids.append(None)
+            errors.append((i, "{} has an invalid checksum for {}".format(text.strip(), network)))
+            continue
+        ids.append(eid)
+    return ids, errors
+
+
+def bare(text, network=None):
+    "shard.realm.num without the checksum, the form the mirror node takes"
+    return str(parse(text, network))
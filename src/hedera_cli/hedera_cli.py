@@ -4,15 +4,19 @@ import json
 import cmd
 import math
 import base64
+import getpass
+import time
+import threading
 from pprint import pprint
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
 from colorama import init, Fore, Back, Style
 from dotenv import load_dotenv
 from hedera import (
     Hbar,
     Client,
     PrivateKey,
+    PublicKey,
     AccountId,
     AccountInfoQuery,
     AccountCreateTransaction,
@@ -20,6 +24,8 @@ from hedera import (
     AccountBalanceQuery,
     TransferTransaction,
     TransactionId,
+    Transaction,
+    TransactionReceiptQuery,
     TopicCreateTransaction,
     TopicId,
     TopicMessageSubmitTransaction,
@@ -29,6 +35,7 @@ from hedera import (
     TokenType,
     TokenMintTransaction,
     TokenBurnTransaction,
+    TokenWipeTransaction,
     FileId,
     FileInfoQuery,
     FileCreateTransaction,
@@ -42,13 +49,31 @@ from hedera import (
     TokenGrantKycTransaction,
     ContractId,
     ContractCreateTransaction,
-    ContractFunctionParameters,
     ContractInfoQuery,
     ContractCallQuery,
     )
 from jnius import autoclass, cast
 from hedera_cli._version import version
 from hedera_cli.price import get_Hbar_price
+from hedera_cli import abi
+from hedera_cli import keystore
+from hedera_cli import presign
+from hedera_cli import httpcache
+from hedera_cli import mirror
+from hedera_cli import entity_id
+from hedera_cli import runninghash
+from hedera_cli import analytics
+from hedera_cli.bulk import Pipeline, DEFAULT_CONCURRENCY
+from hedera_cli.scheduler import Scheduler, status_name
+from hedera_cli.journal import Journal
+from hedera_cli.payers import PayerPool, payers_from_env, read_payers
+from hedera_cli.metrics import metrics
+from hedera_cli.registry import ContractRegistry
+from hedera_cli.uploads import UploadIndex, digest
+from hedera_cli.completion import CommandSpec, IdIndex
+from hedera_cli.watch import Watcher, Cursor, DEFAULT_INTERVAL
+from hedera_cli.serials import SerialSet, describe
+from hedera_cli.script import MissingAnswer, parse_answers, positional_args
 # getch doesn't work on Mac, so disable for now
 #if sys.platform == "win32":
 #    from msvcrt import getch
@@ -58,9 +83,27 @@ from hedera_cli.price import get_Hbar_price
 
 ArrayList = autoclass('java.util.ArrayList')
 Long = autoclass('java.lang.Long')
+ByteString = autoclass('com.google.protobuf.ByteString')
+
+# entity kinds remembered for tab completion
+ID_KINDS = {
+    AccountId: "account",
+    TokenId: "token",
+    TopicId: "topic",
+    FileId: "file",
+    ContractId: "contract",
+    }
 
 FILE_CREATE_SIZE = 5000  # don't know exactly the size, 5000 works, 6000 doesn't
 CHUNK_SIZE = 1024
+DEFAULT_GAS = 1_000_000
+MAX_GAS = 15_000_000
+GAS_MARGIN = 1.2
+CALL_WORKERS = 8
+EVENTUAL_TTL = 2  # seconds an eventual read may be served from the HTTP cache
+CONSISTENCY = ("strong", "eventual")
+TOKEN_TYPES = {"fungible": "0", "nft": "1", "non-fungible": "1"}
+PAST = {"burn": "burned", "wipe": "wiped"}
 
 mirror_address = {
     "testnet": "https://testnet.mirrornode.hedera.com",
@@ -91,6 +134,38 @@ mirror_address = {
 current_price = get_Hbar_price()
 
 
+def split_options(args, flags=()):
+    """split `--name value` options from positional arguments,
+    names listed in `flags` take no value and are set to True
+    """
+    positional, options = [], {}
+    i = 0
+    while i < len(args):
+        if args[i].startswith("--"):
+            name = args[i][2:]
+            if name in flags:
+                options[name] = True
+            elif i + 1 < len(args):
+                options[name] = args[i + 1]
+                i += 1
+            else:
+                raise ValueError("option --{} needs a value".format(name))
+        else:
+            positional.append(args[i])
+        i += 1
+    return positional, options
+
+
+class CommandState(threading.local):
+    """the command being run on this thread: the answers to its prompts given as
+    options, and for scripts, its result and error
+    """
+    answers = {}
+    scripted = False
+    result = None
+    error = None
+
+
 class HederaCli(cmd.Cmd):
     #use_rawinput = False  # if True, colorama prompt will not work on Windows
     intro = """
@@ -112,8 +187,15 @@ Type help or ? to list commands.\n""".format(version, current_price)
     def __init__(self, *args, **kwargs):
         init()  # colorama
         super().__init__(*args, **kwargs)
+        self.journal = None
+        self.ids = None
+        self.specs = {}
+        self.state = CommandState()
+        self.payers = PayerPool()
+        self.scheduler = Scheduler(lambda: self.client, get_journal=lambda: self.journal,
+                                   get_pool=lambda: self.payers)
         if "HEDERA_OPERATOR_ID" in os.environ:
-            self.operator_id = AccountId.fromString(os.environ["HEDERA_OPERATOR_ID"])
+            self.operator_id = entity_id.parse(os.environ["HEDERA_OPERATOR_ID"]).to_java(AccountId)
         else:
             self.operator_id = None
         if "HEDERA_OPERATOR_KEY" in os.environ:
@@ -121,16 +203,169 @@ Type help or ? to list commands.\n""".format(version, current_price)
         else:
             self.operator_key = ""
         self.network = os.environ.get("HEDERA_NETWORK", "testnet")
+        self.consistency = os.environ.get("HEDERA_READ_CONSISTENCY", "strong")
         self.setup_network(self.network)
         if self.operator_id and self.operator_key:
             self.client.setOperator(self.operator_id, self.operator_key)
         self.hbar_price = current_price
+        self.registry = ContractRegistry()
+        self.uploads = UploadIndex()
+        try:
+            for account_id, key in payers_from_env(self.network):
+                self.payers.add(account_id, key)
+        except Exception as e:
+            print(Fore.RED + "invalid payer: {}".format(e) + Style.RESET_ALL)
+        self.start_payer_monitor()
         self.set_prompt()
 
+    def execute(self, build, params=None, key=None, journal=None):
+        """Submit a transaction through the scheduler (throttling, BUSY retries, journal).
+        `build` returns a new, unexecuted transaction each time it's called.
+        """
+        return self.scheduler.submit(build, params, key, journal=journal)
+
+    def to_java(self, text, cls):
+        "parse an entity id in Python (checksum checked against the network), then make the SDK object"
+        eid = entity_id.parse(text, self.network)
+        self.ids.add(ID_KINDS[cls], eid)
+        return eid.to_java(cls)
+
+    def bare(self, text, kind):
+        "shard.realm.num of a `kind` of entity for the mirror node, remembered for completion"
+        eid = entity_id.bare(text, self.network)
+        self.ids.add(kind, eid)
+        return eid
+
+    def mirror_get(self, path, params=None, ttl=httpcache.DEFAULT_TTL, immutable=False):
+        "GET a mirror node REST path through the HTTP cache"
+        url = path if path.startswith("http") else mirror_address[self.network] + path
+        return httpcache.session().get(url, params=params, ttl=ttl, immutable=immutable)
+
+    def mirror_pages(self, path, params=None, full_pages_immutable=False, cached=True):
+        """yield every page of a mirror node list, following links.next.
+        in ascending order, a page followed by another one can't change any more.
+        `cached=False` skips the HTTP cache, for listings too large to be worth keeping
+        """
+        immutable = False
+        if full_pages_immutable:
+            immutable = lambda d: bool(d.get("links", {}).get("next"))
+        while path:
+            if cached:
+                resp = self.mirror_get(path, params, immutable=immutable)
+            else:
+                url = path if path.startswith("http") else mirror_address[self.network] + path
+                resp = httpcache.session().fetch(url, params)
+            if resp.status_code != 200:
+                raise Exception("mirror node: {} {}".format(resp.status_code, resp.text[:200]))
+            data = resp.json()
+            yield data
+            path = (data.get("links") or {}).get("next")
+            params = None
+
+    def mirror_json(self, path, params=None, ttl=EVENTUAL_TTL):
+        resp = self.mirror_get(path, params, ttl=ttl)
+        if resp.status_code != 200:
+            raise Exception("mirror node: {} {}".format(resp.status_code, resp.text[:200]))
+        return resp.json()
+
+    def pop_consistency(self, args):
+        """remove `--consistency strong|eventual` from args,
+        returns (args, consistency), the default is set with the `consistency` command
+        """
+        if "--consistency" not in args:
+            return args, self.consistency
+        i = args.index("--consistency")
+        value = args[i + 1] if i + 1 < len(args) else ""
+        if value not in CONSISTENCY:
+            raise ValueError("--consistency must be strong or eventual")
+        return args[:i] + args[i + 2:], value
+
+    def do_consistency(self, arg):
+        """Default consistency of info and balance queries:
+        consistency           (show the default)
+        consistency strong    (query consensus nodes through the SDK, always up to date, may cost fees)
+        consistency eventual  (read from the mirror node, a few seconds behind, free)
+        every info/balance command also takes --consistency strong|eventual
+        """
+        arg = arg.strip()
+        if arg in CONSISTENCY:
+            self.consistency = arg
+        elif arg:
+            return self.err_return("consistency must be strong or eventual")
+        print("read consistency:", self.consistency)
+
+    def get_receipt(self, resp):
+        "wait for a receipt and record its outcome in the journal"
+        receipt = resp.getReceipt(self.client)
+        if self.journal is not None:
+            entity = receipt.accountId or receipt.tokenId or receipt.topicId or receipt.fileId or receipt.contractId
+            self.journal.outcome(resp.transactionId.toString(), receipt.status.toString(),
+                                 entity.toString() if entity else None)
+        self.remember_created(receipt)
+        return receipt
+
+    def remember_created(self, receipt):
+        "add the entity a receipt created to the completion index"
+        for attr, kind in (("accountId", "account"), ("tokenId", "token"), ("topicId", "topic"),
+                           ("fileId", "file"), ("contractId", "contract")):
+            entity = getattr(receipt, attr)
+            if entity:
+                self.ids.add(kind, entity.toString())
+                self.set_result(entity.toString())
+                return
+
+    def do_metrics(self, arg):
+        """Show submission counters, rates, queue depths and latencies:
+        metrics        (show metrics)
+        metrics reset  (clear all metrics)
+        """
+        if arg.strip() == "reset":
+            metrics.reset()
+            return
+        lines = metrics.report()
+        if not lines:
+            print("no metrics yet")
+        for line in lines:
+            print(line)
+
+    def do_cache(self, arg):
+        """HTTP cache of mirror node and price lookups (hit/miss counters are in `metrics`):
+        cache info   (size of the cache)
+        cache clear  (empty the cache)
+        """
+        cache = httpcache.session()
+        if arg.strip() == "clear":
+            cache.clear()
+            print("cache cleared")
+        elif arg.strip() == "info":
+            print("{}: {:.1f} MB of {:.0f} MB".format(cache.path, cache.size / 1024 / 1024,
+                                                      cache.cap / 1024 / 1024))
+        else:
+            return self.err_return("invalid cache command")
+
     def emptyline(self):
         "If this is not here, last command will be repeated"
         pass
 
+    def preloop(self):
+        try:
+            import readline
+            # entity ids and --options complete as whole words
+            readline.set_completer_delims(" \t\n")
+        except ImportError:
+            pass
+
+    def completedefault(self, text, line, begidx, endidx):
+        "subcommands and options from the command's docstring, entity ids from the index of seen ids"
+        words = line[:begidx].split()
+        func = getattr(self, "do_" + words[0], None) if words else None
+        if func is None:
+            return []
+        spec = self.specs.get(words[0])
+        if spec is None:
+            spec = self.specs[words[0]] = CommandSpec(words[0], func.__doc__)
+        return spec.complete(words[1:], text, self.ids, words[0] if words[0] in ID_KINDS.values() else None)
+
     def set_prompt(self):
         if self.operator_id:
             self.prompt = Fore.YELLOW + '{}@['.format(self.operator_id.toString()) + Fore.GREEN + self.network + Fore.YELLOW + '] > ' + Style.RESET_ALL
@@ -139,33 +374,87 @@ Type help or ? to list commands.\n""".format(version, current_price)
 
     def err_return(self, msg):
         print(Fore.RED + msg)
+        self.state.error = msg
         self.set_prompt()
         return
 
+    def onecmd(self, line):
+        self.state.answers = parse_answers(line)
+        return super().onecmd(line)
+
+    def run_scripted(self, line):
+        """run one command without prompting, for scripts.
+        returns (ok, result, error), result is what the command reported with set_result
+        """
+        self.state.scripted = True
+        self.state.result = self.state.error = None
+        try:
+            self.onecmd(line)
+        except MissingAnswer as e:
+            self.state.error = self.state.error or str(e)
+        except SystemExit:
+            self.state.error = "exit in a script"
+        except Exception as e:
+            print(Fore.RED + str(e) + Style.RESET_ALL)
+            self.state.error = str(e)
+        return self.state.error is None, self.state.result, self.state.error
+
+    def set_result(self, value):
+        "what a script's `$name = command` keeps from this command"
+        self.state.result = str(value)
+
+    def answer(self, name):
+        return self.state.answers.get(name)
+
+    def ask(self, prompt, name, default=None, secret=False):
+        """prompt for input, unless --`name` gave it on the command line.
+        in a script a missing answer takes `default`, or fails the command
+        """
+        value = self.answer(name)
+        if value is not None and value is not True:
+            return value
+        if self.state.scripted:
+            if default is not None:
+                return default
+            self.state.error = "missing --{}".format(name)
+            raise MissingAnswer(self.state.error)
+        if secret:
+            return getpass.getpass(prompt)
+        print(prompt, end="", flush=True)
+        return input()
+
+    def confirm(self, prompt):
+        "ask a yes or no question, --yes answers yes"
+        if self.answer("yes"):
+            return True
+        if self.state.scripted:
+            self.state.error = "needs --yes in a script"
+            raise MissingAnswer(self.state.error)
+        return input(prompt).strip().lower() in ("y", "yes")
+
     def do_exit(self, arg):
         'exit hedera-cli'
         exit()
 
     def do_setup(self, arg):
         """Set up hedera client by setting operator id and key.
-        setup  (no argument)
+        setup  (asks for them)
+        setup --account-id 0.0.xxxx --private-key key
         """
         # these doesn't work on Windows
         # acc_id = input(Fore.YELLOW + "Operator Account ID (0.0.xxxx): " + Style.RESET_ALL)
         # acc_key = input(Fore.YELLOW + "Private Key: " + Style.RESET_ALL)
-        print(Fore.YELLOW + "Operator Account ID (0.0.xxxx): " + Style.RESET_ALL, end='')
-        acc_id = input()
-        print(Fore.YELLOW + "Private Key: " + Style.RESET_ALL, end='', flush=True)
+        acc_id = self.ask(Fore.YELLOW + "Operator Account ID (0.0.xxxx): " + Style.RESET_ALL, "account-id")
         # this doesn't work on Mac, will fix later
         # acc_key = getPrivateKey()
-        acc_key = input()
+        acc_key = self.ask(Fore.YELLOW + "Private Key: " + Style.RESET_ALL, "private-key")
         try:
-            self.operator_id = AccountId.fromString(acc_id)
+            self.operator_id = self.to_java(acc_id, AccountId)
             self.operator_key = PrivateKey.fromString(acc_key)
             self.client.setOperator(self.operator_id, self.operator_key)
             print(Fore.GREEN + "operator is set up")
         except Exception:
-            print(Fore.RED + "Invalid operator id or key")
+            return self.err_return("Invalid operator id or key")
         self.set_prompt()
 
     def one_node(self):   
@@ -176,6 +465,14 @@ Type help or ? to list commands.\n""".format(version, current_price)
 
     def setup_network(self, name):
         self.network = name
+        if self.journal is not None:
+            self.journal.close()
+        if self.ids is not None:
+            self.ids.close()
+        self.ids = IdIndex(name)
+        if os.environ.get("HEDERA_CLI_JOURNAL", "1") != "0":
+            self.journal = Journal(name, mirror_address[name])
+            self.journal.start()
         if name == "mainnet":
             self.client = Client.forMainnet()
         elif name == "previewnet":
@@ -191,52 +488,123 @@ Type help or ? to list commands.\n""".format(version, current_price)
         """
         if arg == self.network:
             return self.err_return("no change")
+        if self.network == "simulator":
+            return self.err_return("can't switch networks in a simulated session")
 
         if arg in ("mainnet", "testnet", "previewnet"):
             self.setup_network(arg)
             self.operator_id = None
+            self.payers = PayerPool()
             print(Fore.GREEN + "you switched to {}, you must do `setup` again!".format(arg))
         else:
-            print(Fore.RED + "invalid network")
+            self.err_return("invalid network")
         self.set_prompt()
 
     def do_keygen(self, arg):
         """Generate a pair of private and public keys
         keygen  (no argument)
+        keygen --count N --out keystore_path [--type ed25519|ecdsa] [--workers W] [--encrypt]
+                (generate N keys on a pool of worker processes into a keystore file,
+                 with a public key index in keystore_path.idx.  --encrypt prompts for a passphrase
+                 unless --passphrase gives it)
         """
-        prikey = PrivateKey.generate()
-        print(Fore.YELLOW + "Private Key: " + Fore.GREEN + prikey.toString())
-        print(Fore.YELLOW + "Public Key: " + Fore.GREEN + prikey.getPublicKey().toString())
+        try:
+            _, opts = split_options(arg.split(), flags=("encrypt",))
+        except ValueError as e:
+            return self.err_return(str(e))
+
+        if "count" not in opts:
+            prikey = PrivateKey.generate()
+            print(Fore.YELLOW + "Private Key: " + Fore.GREEN + prikey.toString())
+            print(Fore.YELLOW + "Public Key: " + Fore.GREEN + prikey.getPublicKey().toString())
+            self.set_prompt()
+            return
+
+        if "out" not in opts:
+            return self.err_return("need --out keystore_path")
+        try:
+            count = int(opts["count"])
+            workers = int(opts["workers"]) if "workers" in opts else None
+            kind = keystore.KEY_TYPES[opts.get("type", "ed25519").lower()]
+        except (ValueError, KeyError):
+            return self.err_return("invalid --count, --workers or --type")
+
+        passphrase = None
+        if opts.get("encrypt"):
+            passphrase = self.ask("keystore passphrase: ", "passphrase", secret=True)
+            if passphrase != self.ask("repeat passphrase: ", "passphrase", secret=True):
+                return self.err_return("passphrases don't match")
+
+        def progress(done, elapsed):
+            print("\r{} / {} keys, {:.0f} keys/s".format(done, count, done / max(elapsed, 1e-6)),
+                  end="", flush=True)
+
+        try:
+            done, elapsed = keystore.generate_keystore(opts["out"], count, kind, workers,
+                                                       passphrase, progress)
+        except Exception as e:
+            print()
+            return self.err_return(str(e))
+        print()
+        print(Fore.GREEN + "{} keys written to {} in {:.1f}s ({:.0f} keys/s)".format(
+              done, opts["out"], elapsed, done / max(elapsed, 1e-6)))
         self.set_prompt()
 
     def do_topic(self, arg):
         """HCS Topic:
         topic create [memo]              (create a topic with an optional memo) 
-        topic info topic_id              (get info about a topic)
-        topic send topic_id              (send message to topic_id, you will be prompted for message)
+        topic info topic_id [--consistency strong|eventual]
+                                         (get info about a topic)
+        topic send topic_id [--message text]
+                                         (send message to topic_id, you will be prompted for message)
         topic get topic_id [sequence #]  (get topic message(s).  If you specify a sequence_number,
                                           you get one message, otherwise, you get all the messages on the topic)
+                  [--out file]           (save the messages as JSON lines instead of printing them)
+        topic verify topic_id [--file export] [--workers n]
+                                         (check the running hash chain of the topic's messages, from the
+                                          mirror node or from a `topic get --out` export)
         """
-        args = arg.split()
-        if not args or args[0] not in ('create', 'send', 'info', "get"):
+        try:
+            args, consistency = self.pop_consistency(arg.split())
+        except ValueError as e:
+            return self.err_return(str(e))
+        if not args or args[0] not in ('create', 'send', 'info', "get", "verify"):
             return self.err_return("invalid topic command")
 
         if args[0] == "create":
-            txn = TopicCreateTransaction()
-            if len(args) > 1:
-                memo = " ".join(args[1:])
-                txn.setTopicMemo(memo)
+            memo = " ".join(args[1:])
             try:
-                receipt = txn.execute(self.client).getReceipt(self.client)
+                txn = self.execute(lambda: TopicCreateTransaction().setTopicMemo(memo), params={"memo": memo})
+                receipt = txn.getReceipt(self.client)
+                self.remember_created(receipt)
                 print("New topic created: ", receipt.topicId.toString())
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
+        elif args[0] == "info" and consistency == "eventual":
+            if len(args) < 2:
+                return self.err_return("need topicId")
+            try:
+                info = mirror.topic_info(self.mirror_json, self.bare(args[1], "topic"))
+                print("\n{:} info:".format(info["topic_id"]))
+                print("=========================")
+                print("memo :", info["memo"])
+                print("adminKey :" + (info["admin_key"] or ""))
+                print("submitKey :" + (info["submit_key"] or ""))
+                print("sequence# :", info["sequence_number"])
+                print("expires :", info["expiry"] or "")
+                print("autoRenewAccountId :" + (info["auto_renew_account"] or ""))
+                print("autoRenewPeriod :", info["auto_renew_days"], "days")
+                print("running hash :" + (info["running_hash"] or ""))
+                print()
+            except Exception as e:
+                self.err_return(str(e))
+
         elif args[0] == "info":
             if len(args) < 2:
                 return self.err_return("need topicId")
 
             try:
-                topicId = TopicId.fromString(args[1])
+                topicId = self.to_java(args[1], TopicId)
                 info = TopicInfoQuery().setTopicId(topicId).execute(self.client)
                 print("\n{:} info:".format(topicId.toString()))
                 print("=========================")
@@ -267,7 +635,7 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 print()
 
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
 
         elif args[0] == "get":
             # this does not use SDK, it use mirror node REST API
@@ -275,28 +643,35 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 return self.err_return("need topicId")
 
             try:
-                TopicId.fromString(args[1])
-            except Exception:
-                return self.err_return("topicId not valid")
-
-            # need to remove "-xxxx" hash from topicId
-            if "-" in args[1]:
-                topicId = args[1][:args[1].index("-")]
-            else:
-                topicId = args[1]
+                args, opts = split_options(args)
+                topicId = self.bare(args[1], "topic")
+            except ValueError as e:
+                return self.err_return(str(e))
 
-            url = "{}/api/v1/topics/{}/messages".format(mirror_address[self.network], topicId)
+            path = "/api/v1/topics/{}/messages".format(topicId)
             if len(args) > 2:
                 if args[2].isnumeric():
                     seq_num = int(args[2])
-                    req = requests.get(url, params={"sequenceNumber": seq_num})
+                    # an existing message never changes
+                    req = self.mirror_get(path, {"sequencenumber": seq_num},
+                                          immutable=lambda d: bool(d.get("messages")))
+                    msgs = req.json().get('messages', [])
                 else:
                     return self.err_return("invalid sequence number")
             else:
-                req = requests.get(url)
-            data = req.json()
-            msgs = data['messages']
+                msgs = []
+                try:
+                    for data in self.mirror_pages(path, {"order": "asc"}, full_pages_immutable=True):
+                        msgs.extend(data.get('messages', []))
+                except Exception as e:
+                    return self.err_return(str(e))
             msgs.sort(key=lambda x: x['sequence_number'])
+            if "out" in opts:
+                with open(opts["out"], "w") as fh:
+                    for msg in msgs:
+                        fh.write(json.dumps(msg) + "\n")
+                print(Fore.GREEN + "{} messages saved to {}".format(len(msgs), opts["out"]))
+                return
             for msg in msgs:
                 print("sequence_number:", msg['sequence_number'])
                 print("consensus_timestamp:", msg['consensus_timestamp'])
@@ -305,42 +680,233 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 print(base64.b64decode(msg['message']).decode())
                 print()
 
+        elif args[0] == "verify":
+            try:
+                args, opts = split_options(args)
+                if len(args) < 2:
+                    return self.err_return("need topicId")
+                topicId = self.bare(args[1], "topic")
+                workers = int(opts["workers"]) if "workers" in opts else None
+            except ValueError as e:
+                return self.err_return(str(e))
+
+            if "file" in opts:
+                messages = runninghash.read_export(opts["file"])
+            else:
+                path = "/api/v1/topics/{}/messages".format(topicId)
+                messages = (msg for data in self.mirror_pages(path, {"order": "asc"}, full_pages_immutable=True)
+                            for msg in data.get("messages", []))
+
+            def progress(done, elapsed):
+                print("\r{} messages verified, {:.0f} msg/s".format(done, done / max(elapsed, 1e-6)),
+                      end="", flush=True)
+
+            try:
+                res = runninghash.verify(messages, topicId, workers, progress=progress)
+            except Exception as e:
+                print()
+                return self.err_return(str(e))
+            print()
+            if res["first"] is None:
+                return self.err_return("no messages")
+            if res["anchored"]:
+                print(Fore.YELLOW + "chain starts at message {}, its running hash is trusted".format(res["first"])
+                      + Style.RESET_ALL)
+            print("{} links checked ({} .. {}), {:.1f} KB in {:.2f}s, {:.0f} msg/s".format(
+                  res["checked"], res["first"], res["last"], res["bytes"] / 1024, res["seconds"],
+                  res["checked"] / max(res["seconds"], 1e-6)))
+            if res["break"]:
+                seq, reason = res["break"]
+                return self.err_return("chain broken at message {}: {}".format(seq, reason))
+            print(Fore.GREEN + "running hash chain verified" + Style.RESET_ALL)
+
         elif args[0] == "send":
             if len(args) < 2:
                 return self.err_return("need topicId")
             try:
-                topicId = TopicId.fromString(args[1])
-                msg = input("Type your Message (Entering without message cancels the submission):\n\t> ")
+                topicId = self.to_java(args[1], TopicId)
+                msg = self.ask("Type your Message (Entering without message cancels the submission):\n\t> ", "message")
                 if msg.strip() == "":
                     return self.err_return("Cancelled sending message")
 
-                txn = (TopicMessageSubmitTransaction()
-                       .setTopicId(topicId)
-                       .setMessage(msg))
-                receipt = txn.execute(self.client).getReceipt(self.client)
+                txn = self.execute(lambda: (TopicMessageSubmitTransaction()
+                                            .setTopicId(topicId)
+                                            .setMessage(msg)),
+                                   params={"topic": topicId.toString(), "message": msg})
+                receipt = txn.getReceipt(self.client)
                 print("message sent, sequence #: ", receipt.topicSequenceNumber)
+                self.set_result(receipt.topicSequenceNumber)
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
         self.set_prompt()
 
+    def bulk_create_accounts(self, count, tinybars, out, keys_path, concurrency, wait=True):
+        """Create `count` accounts with keys from a keystore, receipts are reconciled in
+        the background.  `out` gets accountId,publicKey rows and `out`.secret gets
+        accountId,privateKey rows as receipts arrive.  Running the same command again
+        resumes: keys already in `out` are skipped, keys the journal has a transaction for
+        are either recovered (SUCCESS), skipped (still pending) or sent again (failed).
+        Without the session's journal, `out`.journal keeps the transactions of this run.
+        With wait=False no receipt is waited for, account ids are collected on the next run.
+        """
+        if not os.path.isfile(keys_path):
+            print("generating {} keys into {}".format(count, keys_path))
+            keystore.generate_keystore(keys_path, count)
+        available = keystore.key_count(keys_path)
+        if available < count:
+            return self.err_return("{} has {} keys, {} accounts were asked for".format(
+                                   keys_path, available, count))
+        passphrase = None
+        if keystore.is_encrypted(keys_path):
+            passphrase = self.ask("keystore passphrase: ", "passphrase", secret=True)
+            # a wrong passphrase fails here rather than after the journal is reconciled
+            next(keystore.read_keystore(keys_path, passphrase), None)
+
+        journal = self.journal
+        if journal is None:
+            journal = Journal(self.network, mirror_address[self.network], out + ".journal")
+        try:
+            self._bulk_create_accounts(count, tinybars, out, keys_path, passphrase, concurrency, wait, journal)
+        finally:
+            if journal is not self.journal:
+                journal.close()
+
+    def _bulk_create_accounts(self, count, tinybars, out, keys_path, passphrase, concurrency, wait, journal):
+
+        done = set()
+        if os.path.isfile(out):
+            with open(out) as fh:
+                for line in fh:
+                    done.add(line.strip().split(",")[-1])
+        if done:
+            print("resuming, {} accounts already created".format(len(done)))
+
+        def journal_entry(pub):
+            return journal.get_by_key("account-create:" + pub)
+
+        def keys():
+            for i, (pri, pub) in enumerate(keystore.read_keystore(keys_path, passphrase)):
+                if i >= count:
+                    break
+                if pub not in done:
+                    yield pri, pub
+
+        secret = out + ".secret"
+        created = failed = pending = 0
+        with open(out, "a") as out_fh, open(secret, "a") as secret_fh:
+            os.chmod(secret, 0o600)
+
+            def write(accountId, pri, pub):
+                out_fh.write("{},{}\n".format(accountId, pub))
+                secret_fh.write("{},{}\n".format(accountId, pri))
+                out_fh.flush()
+                secret_fh.flush()
+                done.add(pub)
+
+            journal.reconcile()
+            for pri, pub in keys():
+                entry = journal_entry(pub)
+                if entry and entry["status"] == "SUCCESS" and entry.get("entity_id"):
+                    write(entry["entity_id"], pri, pub)
+                    created += 1
+            if created:
+                print("{} accounts recovered from {}".format(created, journal.path))
+
+            def todo():
+                for pri, pub in keys():
+                    entry = journal_entry(pub)
+                    if entry and entry["status"] == "PENDING":
+                        continue
+                    yield pri, pub
+
+            def submit(item):
+                return self.execute(lambda: (AccountCreateTransaction()
+                                             .setKey(PublicKey.fromString(item[1]))
+                                             .setInitialBalance(Hbar.fromTinybars(tinybars))),
+                                    params={"publicKey": item[1], "tinybars": tinybars},
+                                    key="account-create:" + item[1], journal=journal)
+
+            def reconcile(item, resp):
+                if not wait:
+                    return None
+                receipt = self.get_receipt(resp)
+                if journal is not self.journal:
+                    journal.outcome(resp.transactionId.toString(), receipt.status.toString(),
+                                    receipt.accountId.toString())
+                return receipt.accountId.toString()
+
+            for (pri, pub), accountId, error in Pipeline(submit, reconcile, concurrency).run(todo()):
+                if error:
+                    failed += 1
+                    print("\n" + Fore.RED + str(error) + Style.RESET_ALL)
+                    continue
+                if accountId is None:
+                    pending += 1
+                else:
+                    created += 1
+                    write(accountId, pri, pub)
+                print("\r{} created, {} submitted, {} failed".format(created, pending, failed),
+                      end="", flush=True)
+        print()
+        print(Fore.GREEN + "accounts in {}, private keys in {}".format(out, secret))
+        if pending:
+            print(Fore.YELLOW + "{} accounts are waiting for receipts, run the same command again "
+                  "to collect them".format(pending))
+
     def do_account(self, arg):
         """account:
-        account create               (create an account, account id and privatekey will be printed)
+        account create [--initial-hbars X]
+                                     (create an account, account id and privatekey will be printed)
+        account create --count N --initial-hbars X [--out accounts.csv] [--keystore path] [--concurrency C]
+                       [--no-wait]   (create N accounts concurrently, accountId,publicKey rows go to
+                                      the out file, private keys to out.secret.  Keys are taken from
+                                      the keystore, generated into out.keys if not given,
+                                      an encrypted keystore asks for its passphrase (--passphrase).
+                                      Run it again to resume after an interruption, with --no-wait
+                                      receipts are not waited for and collected on the next run)
         account info [accoun_id]     (get account info for current account if no accountId is provided,
                                       or for a different account if accountId is provided)
         account balance [account_id] (get account balance for current account if no accountId,
                                       or for a different account if accountId is provided)
-        account delete account_id    (delete the account identified by accountId.
+                                     info and balance take --consistency strong|eventual
+        account delete account_id [--private-key key]
+                                     (delete the account identified by accountId.
                                       you will be prompted for that account's private key)
         """
-        args = arg.split()
+        try:
+            args, consistency = self.pop_consistency(arg.split())
+        except ValueError as e:
+            return self.err_return(str(e))
         if not args or args[0] not in ('create', 'balance', 'delete', 'info'):
             return self.err_return("invalid account command")
 
-        if args[0] == "balance":
+        if args[0] in ("balance", "info") and consistency == "eventual":
+            try:
+                account_id = self.bare(args[1], "account") if len(args) > 1 else self.operator_id.toString()
+                if args[0] == "balance":
+                    balance = mirror.account_balance(self.mirror_json, account_id)
+                    print("Hbar balance for {}: {}".format(balance["account"], balance["hbars"]))
+                    for token_id, amount in balance["tokens"]:
+                        print("Token {} = {}".format(token_id, amount))
+                else:
+                    info = mirror.account_info(self.mirror_json, account_id)
+                    print("\n{:} info:".format(info["account"]))
+                    print("=========================")
+                    print("hbar balance :", info["balance"])
+                    print("public key :", info["key"])
+                    print("isReceiverSignatureRequired? :", info["receiver_sig_required"])
+                    print("tokenRelationships :")
+                    for rel in info["tokens"]:
+                        print("{:20} symbol: {:6}  kycStatus: {}   freezeStatus: {}   balance: {} ".format(
+                              rel["token_id"], rel["symbol"], rel["kyc_status"], rel["freeze_status"],
+                              rel["balance"]))
+                    print()
+            except Exception as e:
+                self.err_return(str(e))
+        elif args[0] == "balance":
             try:
                 if len(args) > 1:
-                    accountId = AccountId.fromString(args[1])
+                    accountId = self.to_java(args[1], AccountId)
                 else:
                     accountId = self.operator_id
                 balance = AccountBalanceQuery().setAccountId(accountId).execute(self.client)
@@ -349,21 +915,39 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 for tokenId in tokens.keySet().toArray():
                     print("Token {} = {}".format(tokenId.toString(), tokens[tokenId]))
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
+        elif args[0] == "create" and "--count" in args:
+            try:
+                _, opts = split_options(args[1:], flags=("no-wait",))
+                count = int(opts["count"])
+                tinybars = int(float(opts.get("initial-hbars", 0)) * 100_000_000)
+                concurrency = int(opts.get("concurrency", DEFAULT_CONCURRENCY))
+            except (ValueError, KeyError):
+                return self.err_return("invalid --count, --initial-hbars or --concurrency")
+            out = opts.get("out", "accounts.csv")
+            try:
+                self.bulk_create_accounts(count, tinybars, out, opts.get("keystore", out + ".keys"),
+                                          concurrency, wait=not opts.get("no-wait"))
+            except KeyboardInterrupt:
+                print()
+                print(Fore.YELLOW + "interrupted, run the same command again to resume")
+            except Exception as e:
+                self.err_return(str(e))
         elif args[0] == "create":
-            initHbars = int(input("Set initial Hbars > "))
+            initHbars = int(self.ask("Set initial Hbars > ", "initial-hbars"))
             prikey = PrivateKey.generate()
             print(Fore.YELLOW + "New Private Key: " + Fore.GREEN + prikey.toString())
-            txn = (AccountCreateTransaction()
-                   .setKey(prikey.getPublicKey())
-                   .setInitialBalance(Hbar(initHbars))
-                   .execute(self.client))
+            txn = self.execute(lambda: (AccountCreateTransaction()
+                                        .setKey(prikey.getPublicKey())
+                                        .setInitialBalance(Hbar(initHbars))),
+                               params={"publicKey": prikey.getPublicKey().toString(), "hbars": initHbars})
             receipt = txn.getReceipt(self.client)
+            self.remember_created(receipt)
             print(Fore.YELLOW + "New AccountId: " + Fore.GREEN + receipt.accountId.toString())
         elif args[0] == "info":
             try:
                 if len(args) > 1:
-                    accountId = AccountId.fromString(args[1])
+                    accountId = self.to_java(args[1], AccountId)
                 else:
                     accountId = self.operator_id
                 info = AccountInfoQuery().setAccountId(accountId).execute(self.client)
@@ -388,44 +972,48 @@ Type help or ? to list commands.\n""".format(version, current_price)
                           tokenId.toString(), rel.symbol, rel.kycStatus, rel.freezeStatus, rel.balance))
                 print()
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
 
         elif args[0] == "delete":
             if len(args) != 2:
-                print(Fore.RED + "need accountId")
+                self.err_return("need accountId")
             else:
                 try:
-                    accountId = AccountId.fromString(args[1])
-                    prikey = PrivateKey.fromString(input("Enter this account's private key > "))
-                    txn = (AccountDeleteTransaction()
-                           .setAccountId(accountId)
-                           .setTransferAccountId(self.operator_id)
-                           .setTransactionId(TransactionId.generate(accountId))
-                           .freezeWith(self.client)
-                           .sign(prikey)
-                           .execute(self.client))
+                    accountId = self.to_java(args[1], AccountId)
+                    prikey = PrivateKey.fromString(self.ask("Enter this account's private key > ", "private-key"))
+                    txn = self.execute(lambda: (AccountDeleteTransaction()
+                                                .setAccountId(accountId)
+                                                .setTransferAccountId(self.operator_id)
+                                                .setTransactionId(TransactionId.generate(accountId))
+                                                .freezeWith(self.client)
+                                                .sign(prikey)),
+                                       params={"account": accountId.toString(),
+                                               "transferTo": self.operator_id.toString()})
                     txn.getReceipt(self.client)
                     print(Fore.YELLOW + "account deleted!" + Fore.GREEN + txn.transactionId.toString())
                 except Exception as e:
-                    print(e)
+                    self.err_return(str(e))
 
         self.set_prompt()
 
     def do_send(self, arg):
         """send Hbars to another account:
         send  (no argument, you will prompted for recipient account and amount)
+        send --to account_id --amount hbars
         """
         try:
-            accountId = AccountId.fromString(input("Receipient account id: > "))
-            hbars = input("amount of Hbars(minimum is 0.00000001): > ")
+            accountId = self.to_java(self.ask("Receipient account id: > ", "to"), AccountId)
+            hbars = self.ask("amount of Hbars(minimum is 0.00000001): > ", "amount")
             amount = Hbar.fromTinybars(int(float(hbars) * 100_000_000))
-            txn = (TransferTransaction()
-                   .addHbarTransfer(self.operator_id, amount.negated())
-                   .addHbarTransfer(accountId, amount)
-                   .execute(self.client))
+            txn = self.execute(lambda: (TransferTransaction()
+                                        .addHbarTransfer(self.operator_id, amount.negated())
+                                        .addHbarTransfer(accountId, amount)),
+                               params={"from": self.operator_id.toString(), "to": accountId.toString(),
+                                       "tinybars": amount.toTinybars()})
             print(Fore.YELLOW + "Hbar sent!" + Fore.GREEN + txn.transactionId.toString())
+            self.set_result(txn.transactionId.toString())
         except Exception as e:
-            print(e)
+            self.err_return(str(e))
 
         self.set_prompt()
 
@@ -442,6 +1030,9 @@ Type help or ? to list commands.\n""".format(version, current_price)
             return fh.read(), filesize
 
     def get_content_from_input(self):
+        if self.answer("contents") is not None or self.state.scripted:
+            contents = self.ask("file content: ", "contents")
+            return contents, len(contents)
         print("Enter your file content line by line, enter EOF to finish:\n") 
         lines = []
         while True:
@@ -453,21 +1044,94 @@ Type help or ? to list commands.\n""".format(version, current_price)
         filesize = len(contents)
         return contents, filesize
 
+    def file_cost_in_hbar(self, filesize):
+        # single sig only
+        # use 0.039 + $0.011 per 1kB
+        cost = 0.039 + 0.011 * math.ceil(filesize / 1000.0)
+        self.hbar_price = get_Hbar_price()
+        return cost / self.hbar_price
+
+    def find_uploaded(self, contents, memo=None):
+        """FileId of a live file we uploaded with the same contents and the operator key
+        (and memo, if given), checked with FileInfoQuery (size, expiry, not deleted)
+        """
+        if not self.operator_key:
+            return None
+        file_id = self.uploads.lookup(self.network, contents, self.operator_key.getPublicKey().toString(), memo)
+        if file_id is None:
+            return None
+        try:
+            fileId = self.to_java(file_id, FileId)
+            info = FileInfoQuery().setFileId(fileId).execute(self.client)
+            entry = self.uploads.file(self.network, file_id)
+            if (not info.isDeleted and info.size == entry["size"]
+                    and info.expirationTime.getEpochSecond() > time.time()):
+                self.uploads.record(self.network, file_id, contents, entry["key"],
+                                    info.expirationTime.getEpochSecond())
+                return fileId
+        except Exception:
+            pass
+        self.uploads.forget(self.network, file_id)
+        return None
+
+    def create_file(self, contents, memo="", max_cost=1):
+        """Create a file owned by the operator key.  Only the first FILE_CREATE_SIZE
+        bytes go in FileCreateTransaction, the rest is sent as chunked appends.
+        """
+        txn = self.execute(lambda: (FileCreateTransaction()
+                                    .setFileMemo(memo)
+                                    .setKeys(self.operator_key.getPublicKey())
+                                    .setContents(contents[:FILE_CREATE_SIZE])
+                                    .setMaxTransactionFee(Hbar(1))),
+                           params={"memo": memo, "size": len(contents[:FILE_CREATE_SIZE]),
+                                   "sha256": digest(contents[:FILE_CREATE_SIZE])})
+        receipt = txn.getReceipt(self.client)
+        self.remember_created(receipt)
+        fileId = receipt.fileId
+
+        rest = contents[FILE_CREATE_SIZE:]
+        if rest:
+            self.append_file(fileId, rest, max_cost)
+        self.uploads.record(self.network, fileId.toString(), contents,
+                            self.operator_key.getPublicKey().toString(), memo=memo)
+        return fileId
+
+    def append_file(self, fileId, contents, max_cost=1):
+        """Append `contents` one CHUNK_SIZE transaction at a time, each after the previous
+        one's receipt.  A BUSY retry then sends only the chunk that wasn't committed, where
+        retrying one multi-chunk FileAppendTransaction would append the file again from
+        its first chunk.
+        """
+        data = contents.encode() if isinstance(contents, str) else contents
+        for offset in range(0, len(data), CHUNK_SIZE):
+            chunk = data[offset:offset + CHUNK_SIZE]
+            txn = self.execute(lambda: (FileAppendTransaction()
+                                        .setNodeAccountIds(self.one_node())
+                                        .setFileId(fileId)
+                                        .setContents(chunk)
+                                        .setMaxTransactionFee(Hbar(max(max_cost, 1)))),
+                               params={"file": fileId.toString(), "offset": offset, "size": len(chunk),
+                                       "sha256": digest(chunk)})
+            txn.getReceipt(self.client)
+
     def do_file(self, arg):
         """Hedera File Service:
         file create [file_path]          (create a file, if file_path is provided, file content will be uploaded,
-                                          otherwise, you will be prompted to enter the content)
+                                          otherwise, you will be prompted to enter the content.  the file id
+                                          of an earlier upload of the same contents and memo is reused
+                                          unless --force is given)
         file info file_id                (get info about a file)
         file contents file_id            (get content of a file)
         file append file_id [file_path]  (append the file with more contents)
         file delete file_id              (delete a file)
+        create and append take --memo text, --contents text and --yes to answer their prompts
         """
-        args = arg.split()
+        args = positional_args(arg)
         if not args or args[0] not in ('create', 'contents', 'info', 'append', 'delete'):
             return self.err_return("invalid file command")
 
         if args[0] == "create":
-            memo = input("file memo [optional]:")
+            memo = self.ask("file memo [optional]:", "memo", default="")
             if len(args) > 1:
                 contents, filesize = self.get_local_file_content(args[1])
                 if not contents:
@@ -477,42 +1141,19 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 if filesize == 0:
                     return self.err_return("no content")
 
-            # calculate price
-            # single sig only
-            # use 0.039 + $0.011 per 1kB
-            cost = 0.039 + 0.011 * math.ceil(filesize / 1000.0)
-            self.hbar_price = get_Hbar_price()
-            cost_in_hbar = cost / self.hbar_price 
-            answer = input("It will cost about {:.5f} hbars to create this file, is this OK? type yes or no: ".format(cost_in_hbar))
-            if answer.lower() == "yes":
-                first_chunk = contents if filesize <= FILE_CREATE_SIZE else contents[:FILE_CREATE_SIZE]
-                try:
-                    txn = (FileCreateTransaction()
-                           .setFileMemo(memo)
-                           .setKeys(self.operator_key.getPublicKey())
-                           .setContents(first_chunk)
-                           .setMaxTransactionFee(Hbar(1))
-                           .execute(self.client))
-                    receipt = txn.getReceipt(self.client)
-                    fileId = receipt.fileId
-
-                    if filesize > FILE_CREATE_SIZE:
-                        num_chunks = math.ceil((filesize - FILE_CREATE_SIZE) / CHUNK_SIZE)
-                        max_cost = math.ceil(cost_in_hbar)
-                        txn = (FileAppendTransaction()
-                               .setNodeAccountIds(self.one_node())
-                               .setFileId(fileId)
-                               .setContents(contents[FILE_CREATE_SIZE:])
-                               .setMaxChunks(num_chunks)
-                               .setMaxTransactionFee(Hbar(max_cost))
-                               .freezeWith(self.client)
-                               .execute(self.client))
-                        receipt = txn.getReceipt(self.client)
+            fileId = None if self.answer("force") else self.find_uploaded(contents, memo)
+            if fileId:
+                print("Same content already uploaded.  FileId =", fileId.toString())
+                self.set_result(fileId.toString())
+                return
 
+            cost_in_hbar = self.file_cost_in_hbar(filesize)
+            if self.confirm("It will cost about {:.5f} hbars to create this file, is this OK? type yes or no: ".format(cost_in_hbar)):
+                try:
+                    fileId = self.create_file(contents, memo, math.ceil(cost_in_hbar))
                     print("File created.  FileId =", fileId.toString())
-
                 except Exception as e:
-                    print(e)
+                    self.err_return(str(e))
 
             else:
                 print("canceled")
@@ -522,35 +1163,41 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 return self.err_return("fileId is needed")
             
             try:
-                fileId = FileId.fromString(args[1])
+                fileId = self.to_java(args[1], FileId)
                 info = FileInfoQuery().setFileId(fileId).execute(self.client)
                 print("filesize before appending is ", info.size)
+                delta = None
 
                 if len(args) > 2:
-                    contents, filesize = self.get_local_file_content(args[2], info.size)
+                    contents, filesize = self.get_local_file_content(args[2])
                     if not contents:
                         return
+                    # local file = what's on the network + new content: only send the new part
+                    delta = self.uploads.delta(self.network, fileId.toString(), contents, info.size)
+                    if delta == b"":
+                        print("{} is what the file already holds, nothing to append".format(args[2]))
+                        return
+                    if delta is not None:
+                        print("{} starts with the current file content, appending the last {} bytes".format(
+                              args[2], len(delta)))
+                        full, contents, filesize = contents, delta, len(delta)
+                    if filesize + info.size > 1024 * 1000:
+                        return self.err_return("file is too large, the maximum file size is 1024 kB")
                 else:
                     contents, filesize = self.get_content_from_input()
                     if filesize == 0:
                         return self.err_return("no content")
 
-                cost = 0.039 + 0.011 * math.ceil(filesize / 1000.0)
-                self.hbar_price = get_Hbar_price()
-                cost_in_hbar = cost / self.hbar_price
+                cost_in_hbar = self.file_cost_in_hbar(filesize)
                 max_cost = math.ceil(cost_in_hbar + 0.5)  # 0.5 is margin 
-                answer = input("It will cost about {:.5f} hbars to append to this file, is this OK? type yes or no: ".format(cost_in_hbar))
-                if answer.lower() == "yes":
-                    num_chunks = math.ceil(filesize / CHUNK_SIZE)
-                    txn = (FileAppendTransaction()
-                           .setNodeAccountIds(self.one_node())
-                           .setFileId(fileId)
-                           .setContents(contents)
-                           .setMaxChunks(num_chunks)
-                           .setMaxTransactionFee(Hbar(max_cost))
-                           .freezeWith(self.client)
-                           .execute(self.client))
-                    receipt = txn.getReceipt(self.client)
+                if self.confirm("It will cost about {:.5f} hbars to append to this file, is this OK? type yes or no: ".format(cost_in_hbar)):
+                    self.append_file(fileId, contents, max_cost)
+                    if delta is not None:
+                        self.uploads.record(self.network, fileId.toString(), full,
+                                            self.operator_key.getPublicKey().toString())
+                    else:
+                        # content hash is unknown now
+                        self.uploads.forget(self.network, fileId.toString())
                     print("File appended")
                 else:
                     print("canceled")
@@ -563,20 +1210,20 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 return self.err_return("fileId is needed")
             
             try:
-                fileId = FileId.fromString(args[1])
+                fileId = self.to_java(args[1], FileId)
                 info = FileInfoQuery().setFileId(fileId).execute(self.client)
                 print("file memo:", info.fileMemo)
                 print("file size:", info.size)
                 print("expires:", info.expirationTime.toString())
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
 
         elif args[0] == "contents":
             if len(args) < 2:
                 return self.err_return("fileId is needed")
             
             try:
-                fileId = FileId.fromString(args[1])
+                fileId = self.to_java(args[1], FileId)
                 resp = FileContentsQuery().setFileId(fileId).execute(self.client)
                 contents = resp.toStringUtf8()
                 with open(args[1], 'w') as fh:
@@ -587,56 +1234,184 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 print(contents[:1024])
                 print()
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
 
         elif args[0] == "delete":
             if len(args) < 2:
                 return self.err_return("fileId is needed")
             
             try:
-                fileId = FileId.fromString(args[1])
-                txn = FileDeleteTransaction().setFileId(fileId).execute(self.client)
+                fileId = self.to_java(args[1], FileId)
+                txn = self.execute(lambda: FileDeleteTransaction().setFileId(fileId),
+                                   params={"file": fileId.toString()})
                 receipt = txn.getReceipt(self.client)
+                self.uploads.forget(self.network, fileId.toString())
             except Exception as e:
                 print(e.innermessage)
 
+    def token_holders(self, args):
+        try:
+            args, opts = split_options(args, flags=("all", "totals"))
+            if not args:
+                return self.err_return("need token_id")
+            token_id = self.bare(args[0], "token")
+            if "out" not in opts:
+                return self.err_return("need --out file")
+            params = {"limit": 100, "order": "asc"}
+            if not opts.get("all"):
+                params["account.balance"] = "gt:0"
+            if "at" in opts:
+                params["timestamp"] = "lte:" + mirror.parse_timestamp(opts["at"])
+        except ValueError as e:
+            return self.err_return(str(e))
+
+        try:
+            decimals = mirror.token_info(self.mirror_json, token_id)["decimals"]
+            path = "/api/v1/tokens/{}/balances".format(token_id)
+            start = time.time()
+            holders = total = 0
+            snapshot = None
+            with open(opts["out"], "w") as fh:
+                fh.write("account,balance,amount\n")
+                # rows are written page by page, nothing but the current page is kept
+                for data in mirror.prefetch(self.mirror_pages(path, params, cached=False)):
+                    snapshot = snapshot or data.get("timestamp")
+                    for row in data.get("balances", []):
+                        fh.write("{},{},{}\n".format(row["account"], row["balance"],
+                                                     mirror.token_amount(row["balance"], decimals)))
+                        holders += 1
+                        total += row["balance"]
+                    print("\r{} holders".format(holders), end="", flush=True)
+            print()
+        except Exception as e:
+            print()
+            return self.err_return(str(e))
+        print(Fore.GREEN + "{} holders of {} saved to {} in {:.1f}s".format(
+              holders, token_id, opts["out"], time.time() - start) + Style.RESET_ALL)
+        if snapshot:
+            print("balances as of", mirror.timestamp_string(snapshot))
+        if opts.get("totals"):
+            print("holders:", holders)
+            print("total balance:", total)
+            print("total amount:", mirror.token_amount(total, decimals))
+
+    def remove_nfts(self, action, tokenId, accountId, serials, holder, opts):
+        """burn (from the treasury) or wipe (from accountId) NFT serials, in batches as large
+        as a transaction takes, submitted concurrently
+        """
+        if opts.get("held"):
+            held = self.held_serials(tokenId.toString(), holder, serials)
+            missing = serials - held
+            if missing:
+                print(Fore.YELLOW + "skipping {} serials {} doesn't hold: {}".format(
+                      len(missing), holder, missing) + Style.RESET_ALL)
+            serials = held
+        if not serials:
+            return self.err_return("no serials to {}".format(action))
+        concurrency = int(opts.get("concurrency", DEFAULT_CONCURRENCY))
+
+        def submit(batch):
+            def build():
+                if action == "burn":
+                    txn = TokenBurnTransaction().setTokenId(tokenId)
+                else:
+                    txn = TokenWipeTransaction().setTokenId(tokenId).setAccountId(accountId)
+                for serial in batch:
+                    txn.addSerial(serial)
+                return txn
+            params = {"token": tokenId.toString(), "serials": describe(batch)}
+            if accountId:
+                params["account"] = accountId.toString()
+            return self.execute(build, params=params)
+
+        def reconcile(batch, resp):
+            return self.get_receipt(resp)
+
+        start = time.time()
+        done = failed = batches = 0
+        supply = None
+        for batch, receipt, error in Pipeline(submit, reconcile, concurrency).run(serials.batches()):
+            batches += 1
+            if error:
+                failed += len(batch)
+                print(Fore.RED + "{} {}: {}".format(action, describe(batch), error) + Style.RESET_ALL)
+                continue
+            done += len(batch)
+            supply = receipt.totalSupply if supply is None else min(supply, receipt.totalSupply)
+            print("{} {}: {}".format(action, describe(batch), receipt.status.toString()))
+        print(Fore.GREEN + "{} serials {}, {} failed, in {} transactions, {:.1f}s".format(
+              done, PAST[action], failed, batches, time.time() - start) + Style.RESET_ALL)
+        if supply is not None:
+            print("total supply now =", supply)
+            self.set_result(supply)
+        if failed:
+            return self.err_return("{} of {} serials failed".format(failed, len(serials)))
+
+    def held_serials(self, token_id, holder, serials):
+        "the serials in `serials` that `holder` holds, as the mirror node sees it"
+        params = {"account.id": holder, "order": "asc", "limit": 100,
+                  "serialnumber": ["gte:{}".format(serials.first()), "lte:{}".format(serials.last())]}
+        pages = mirror.prefetch(self.mirror_pages("/api/v1/tokens/{}/nfts".format(token_id), params, cached=False))
+        held = SerialSet.from_sorted(nft["serial_number"] for page in pages for nft in page.get("nfts", [])
+                                     if not nft.get("deleted"))
+        return serials & held
+
     def do_token(self, arg):
         """Hedera Token Service:
-        token create                          (create a token, you will be prompted for details)
-        token info token_id                   (get info about a token)
-        token mint token_id                   (mint token[s])
-        token burn token_id                   (burn token[s])
+        token create                          (create a token, you will be prompted for details,
+                                               or give them with --token-type fungible|nft --name name
+                                               --symbol symbol --decimals n --initial-supply n --yes)
+        token info token_id                   (get info about a token, takes --consistency strong|eventual)
+        token mint token_id                   (mint token[s], --metadata text or --amount n)
+        token burn token_id                   (burn token[s], --amount n, or NFT serials with --serials
+                                               1-5000,7000-7100 or --from-file path, burned 10 a
+                                               transaction, --concurrency n at a time (default 16),
+                                               --held skips serials the treasury doesn't hold)
+        token wipe token_id account_id        (wipe an account's token[s], options as for burn)
         token nftinfo nft_id                  (get info about a nft, nft_id must be of format:
                                                shard.realm.tokenId-checksum@serial#)
         token associate token_id account_id   (associate token with another account)
         token kyc token_id account_id         (grant token kyc to another account)
-        token transfer                        (transfer a token, you will be prompted for details)
+        token transfer                        (transfer a token, you will be prompted for details,
+                                               or give them with --token token_id --to account_id --amount n)
+        token holders token_id --out file [--at timestamp] [--all] [--totals]
+                                              (save the token's holders and balances as CSV, at a
+                                               timestamp (seconds or ISO date) if given, --all includes
+                                               zero balances, --totals sums them up)
         """
-        args = arg.split()
-        if not args or args[0] not in ('create', 'mint', 'burn', 'info', 'nftinfo', 'associate', 'kyc', 'transfer'):
+        try:
+            args, consistency = self.pop_consistency(arg.split())
+        except ValueError as e:
+            return self.err_return(str(e))
+        if not args or args[0] not in ('create', 'mint', 'burn', 'wipe', 'info', 'nftinfo', 'associate', 'kyc', 'transfer',
+                                       'holders'):
             return self.err_return("invalid file command")
 
+        if args[0] == "holders":
+            return self.token_holders(args[1:])
+
         if args[0] == "create":
             try:
-                ttype = int(input("Token type (fungible - 0 or non-fungible - 1, default is 0): "))
+                ttype = self.ask("Token type (fungible - 0 or non-fungible - 1, default is 0): ", "token-type", "0")
+                ttype = int(TOKEN_TYPES.get(ttype.lower(), ttype))
             except ValueError:
                 ttype = 0
             if ttype > 1:
                 ttype = 0
-            name = input("Token name: ")
-            symbol = input("Token symbol: ")
+            name = self.ask("Token name: ", "name")
+            symbol = self.ask("Token symbol: ", "symbol")
 
             if ttype == 0:
                 try:
                     # TODO: max decimal?
-                    decimals = int(input("Token decimals (0-6 default 0): "))
+                    decimals = int(self.ask("Token decimals (0-6 default 0): ", "decimals", "0"))
                 except ValueError:
                     decimals = 0
                 if decimals > 6:
                     decimals = 0
 
                 try:
-                    initialSupply = int(input("initial token supply? (default 0): "))
+                    initialSupply = int(self.ask("initial token supply? (default 0): ", "initial-supply", "0"))
                 except ValueError:
                     initialSupply = 0
             else:
@@ -652,44 +1427,43 @@ Type help or ? to list commands.\n""".format(version, current_price)
 
             initialSupply *= 10 ** decimals
             
-            isitok = input("\ncontinue? (y-yes or n-no): ").lower()
-            if isitok == "y" or isitok == "yes":
+            if self.confirm("\ncontinue? (y-yes or n-no): "):
                 pubkey = self.operator_key.getPublicKey()
                 try:
                     # TODO: bug? if setTokenType and setDecimals/InitialSupply, core dumps
                     if ttype == 0:
-                        txn = (TokenCreateTransaction()
-                               .setNodeAccountIds(self.one_node())
-                               .setTokenName(name)
-                               .setTokenSymbol(symbol)
-                               .setDecimals(decimals)
-                               .setInitialSupply(initialSupply)
-                               .setTreasuryAccountId(self.operator_id)
-                               .setAdminKey(pubkey)
-                               .setFreezeKey(pubkey)
-                               .setWipeKey(pubkey)
-                               .setKycKey(pubkey)
-                               .setSupplyKey(pubkey)
-                               .setFreezeDefault(False)
-                               .execute(self.client))
+                        txn = self.execute(lambda: (TokenCreateTransaction()
+                                                    .setNodeAccountIds(self.one_node())
+                                                    .setTokenName(name)
+                                                    .setTokenSymbol(symbol)
+                                                    .setDecimals(decimals)
+                                                    .setInitialSupply(initialSupply)
+                                                    .setTreasuryAccountId(self.operator_id)
+                                                    .setAdminKey(pubkey)
+                                                    .setFreezeKey(pubkey)
+                                                    .setWipeKey(pubkey)
+                                                    .setKycKey(pubkey)
+                                                    .setSupplyKey(pubkey)
+                                                    .setFreezeDefault(False)))
                     else:
-                        txn = (TokenCreateTransaction()
-                               .setNodeAccountIds(self.one_node())
-                               .setTokenName(name)
-                               .setTokenSymbol(symbol)
-                               .setTokenType(TokenType.NON_FUNGIBLE_UNIQUE)
-                               .setTreasuryAccountId(self.operator_id)
-                               .setAdminKey(pubkey)
-                               .setFreezeKey(pubkey)
-                               .setWipeKey(pubkey)
-                               .setKycKey(pubkey)
-                               .setSupplyKey(pubkey)
-                               .setFreezeDefault(False)
-                               .execute(self.client))
-                    tokenId = txn.getReceipt(self.client).tokenId
+                        txn = self.execute(lambda: (TokenCreateTransaction()
+                                                    .setNodeAccountIds(self.one_node())
+                                                    .setTokenName(name)
+                                                    .setTokenSymbol(symbol)
+                                                    .setTokenType(TokenType.NON_FUNGIBLE_UNIQUE)
+                                                    .setTreasuryAccountId(self.operator_id)
+                                                    .setAdminKey(pubkey)
+                                                    .setFreezeKey(pubkey)
+                                                    .setWipeKey(pubkey)
+                                                    .setKycKey(pubkey)
+                                                    .setSupplyKey(pubkey)
+                                                    .setFreezeDefault(False)))
+                    receipt = txn.getReceipt(self.client)
+                    self.remember_created(receipt)
+                    tokenId = receipt.tokenId
                     print("Token created.  Token_id =", tokenId.toString())
                 except Exception as e:
-                    print(e)
+                    self.err_return(str(e))
             else:
                 print("cancelled")
 
@@ -698,67 +1472,104 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 return self.err_return("tokenId is needed")
 
             try:
-                tokenId = TokenId.fromString(args[1])
+                tokenId = self.to_java(args[1], TokenId)
                 info = TokenInfoQuery().setTokenId(tokenId).execute(self.client)
                 if info.tokenType == TokenType.NON_FUNGIBLE_UNIQUE:
-                    meta = input("enter the metadata for this NFT: ")
-                    txn = (TokenMintTransaction()
-                           .setTokenId(tokenId)
-                           .addMetadata(meta.encode())
-                           .execute(self.client))
+                    meta = self.ask("enter the metadata for this NFT: ", "metadata")
+                    txn = self.execute(lambda: (TokenMintTransaction()
+                                                .setTokenId(tokenId)
+                                                .addMetadata(meta.encode())),
+                                       params={"token": tokenId.toString(), "metadata": meta})
                     receipt = txn.getReceipt(self.client)
                     print("Token minted, serial #:", receipt.serials.toArray()[0])
+                    self.set_result(receipt.serials.toArray()[0])
                 else:
-                    amount = int(input("How many tokens to mint? : "))
-                    txn = (TokenMintTransaction()
-                           .setTokenId(tokenId)
-                           .setAmount(amount)
-                           .execute(self.client))
+                    amount = int(self.ask("How many tokens to mint? : ", "amount"))
+                    txn = self.execute(lambda: (TokenMintTransaction()
+                                                .setTokenId(tokenId)
+                                                .setAmount(amount)),
+                                       params={"token": tokenId.toString(), "amount": amount})
                     receipt = txn.getReceipt(self.client)
                     print("Token minted, total supply =", receipt.totalSupply)
 
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
 
-        elif args[0] == "burn":
-            if len(args) < 2:
+        elif args[0] in ("burn", "wipe"):
+            try:
+                positional, opts = split_options(args[1:], flags=("held",))
+            except ValueError as e:
+                return self.err_return(str(e))
+            if args[0] == "burn" and len(positional) < 1:
                 return self.err_return("tokenId is needed")
+            if args[0] == "wipe" and len(positional) < 2:
+                return self.err_return("need tokenId and accountId")
 
             try:
-                tokenId = TokenId.fromString(args[1])
-                txn = TokenBurnTransaction().setTokenId(tokenId)
+                tokenId = self.to_java(positional[0], TokenId)
+                accountId = self.to_java(positional[1], AccountId) if args[0] == "wipe" else None
                 info = TokenInfoQuery().setTokenId(tokenId).execute(self.client)
                 if info.tokenType == TokenType.NON_FUNGIBLE_UNIQUE:
-                    snum = input("enter the serial number(s) for this NFT, \n"
-                                 "(if more than one token, seperate with spaces)\n> ")
-                    snum = [int(a) for a in snum.split()]
-                    serials = ArrayList()
-                    for i in snum:
-                        serials.add(Long(i))
-                    txn = (TokenBurnTransaction()
-                           .setTokenId(tokenId)
-                           .setSerials(serials)
-                           .execute(self.client))
-                    txn.getReceipt(self.client)
-                    print("token burned.")
+                    if "from-file" in opts:
+                        serials = SerialSet.read(opts["from-file"])
+                    else:
+                        serials = SerialSet.parse(self.ask(
+                            "enter the serial number(s) for this NFT, \n"
+                            "(serials and ranges like 1-100, seperated with commas or spaces)\n> ", "serials"))
+                    holder = accountId if accountId else info.treasuryAccountId
+                    self.remove_nfts(args[0], tokenId, accountId, serials, holder.toString(), opts)
                 else:
-                    amount = int(input("How many tokens to burn? : "))
-                    txn = (TokenBurnTransaction()
-                           .setTokenId(tokenId)
-                           .setAmount(amount)
-                           .execute(self.client))
+                    amount = int(self.ask("How many tokens to {}? : ".format(args[0]), "amount"))
+                    if args[0] == "burn":
+                        txn = self.execute(lambda: (TokenBurnTransaction()
+                                                    .setTokenId(tokenId)
+                                                    .setAmount(amount)),
+                                           params={"token": tokenId.toString(), "amount": amount})
+                    else:
+                        txn = self.execute(lambda: (TokenWipeTransaction()
+                                                    .setTokenId(tokenId)
+                                                    .setAccountId(accountId)
+                                                    .setAmount(amount)),
+                                           params={"token": tokenId.toString(), "account": accountId.toString(),
+                                                   "amount": amount})
                     receipt = txn.getReceipt(self.client)
-                    print("token burned. total supply now =", receipt.totalSupply)
+                    print("token {}. total supply now =".format(PAST[args[0]]), receipt.totalSupply)
+                    self.set_result(receipt.totalSupply)
 
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
+
+        elif args[0] == "info" and consistency == "eventual":
+            if len(args) < 2:
+                return self.err_return("tokenId is needed")
+            try:
+                info = mirror.token_info(self.mirror_json, self.bare(args[1], "token"))
+                print("tokenId:", info["token_id"])
+                print("tokenType:", info["type"])
+                print("name:", info["name"])
+                print("symbol:", info["symbol"])
+                print("decimals:", info["decimals"])
+                print("totalSupply", info["total_supply"])
+                print("maxSupply", info["max_supply"])
+                print("defaultKycStatus:", info["default_kyc_status"])
+                print("defaultFreezeStatus:", info["default_freeze_status"])
+                print("expirationTime:", info["expiry"])
+                print("autoRenewAccount:", info["auto_renew_account"])
+                print("autoRenewPeriod (days):", info["auto_renew_days"])
+                print("customFees:", info["custom_fees"])
+                print("feeScheduleKey:", info["fee_schedule_key"])
+                print("kycKey:", info["kyc_key"])
+                print("supplyKey:", info["supply_key"])
+                print("wipeKey:", info["wipe_key"])
+            except Exception as e:
+                self.err_return(str(e))
 
         elif args[0] == "info":
             if len(args) < 2:
                 return self.err_return("tokenId is needed")
             
             try:
-                tokenId = TokenId.fromString(args[1])
+                tokenId = self.to_java(args[1], TokenId)
                 info = TokenInfoQuery().setTokenId(tokenId).execute(self.client)
                 print("tokenId:", info.tokenId.toString())
                 print("tokenType:", info.tokenType.toString())
@@ -778,7 +1589,7 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 print("supplyKey:", info.supplyKey and info.supplyKey.toString())
                 print("wipeKey:", info.wipeKey and info.wipeKey.toString())
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
 
         elif args[0] == "nftinfo":
             if len(args) < 2:
@@ -790,7 +1601,7 @@ Type help or ? to list commands.\n""".format(version, current_price)
                     info = TokenNftInfoQuery().byNftId(nftId).execute(self.client)
                     #info = info.get(0)  # singleton list
                 else:
-                    tokenId = TokenId.fromString(args[1])
+                    tokenId = self.to_java(args[1], TokenId)
                     tokenInfo = TokenInfoQuery().setTokenId(tokenId).execute(self.client)
                     totalSupply = tokenInfo.totalSupply
                     info = (TokenNftInfoQuery()
@@ -805,67 +1616,157 @@ Type help or ? to list commands.\n""".format(version, current_price)
                     print()
 
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
 
         elif args[0] == "associate":
             if len(args) < 2:
                 return self.err_return("need tokenId")
 
             try:
-                tokenId = TokenId.fromString(args[1])
+                tokenId = self.to_java(args[1], TokenId)
                 listOne = ArrayList()
                 listOne.add(tokenId)
-                txn = (TokenAssociateTransaction()
-                       .setAccountId(self.operator_id)
-                       .setTokenIds(listOne)
-                       .freezeWith(self.client)
-                       .sign(self.operator_key)
-                       .execute(self.client))
+                txn = self.execute(lambda: (TokenAssociateTransaction()
+                                            .setAccountId(self.operator_id)
+                                            .setTokenIds(listOne)
+                                            .freezeWith(self.client)
+                                            .sign(self.operator_key)),
+                                   params={"account": self.operator_id.toString(), "tokens": [tokenId.toString()]})
                 receipt = txn.getReceipt(self.client)
                 print(receipt.status)
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
 
         elif args[0] == "kyc":
             if len(args) < 3:
                 return self.err_return("need tokenId and accountId")
             try:
-                tokenId = TokenId.fromString(args[1])
-                accountId = AccountId.fromString(args[2])
-                txn = (TokenGrantKycTransaction()
-                       .setAccountId(accountId)
-                       .setTokenId(tokenId)
-                       .execute(self.client))
+                tokenId = self.to_java(args[1], TokenId)
+                accountId = self.to_java(args[2], AccountId)
+                txn = self.execute(lambda: (TokenGrantKycTransaction()
+                                            .setAccountId(accountId)
+                                            .setTokenId(tokenId)),
+                                   params={"token": tokenId.toString(), "account": accountId.toString()})
                 receipt = txn.getReceipt(self.client)
                 print(receipt.status.toString())
+                self.set_result(txn.transactionId.toString())
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
 
         elif args[0] == "transfer":
             try:
-                tokenId = TokenId.fromString(input("token id: "))
-                accountId = AccountId.fromString(input("account id: "))
-                amount = int(input("Enter the amount (number of tokens multiply by 1[0...], number of 0's is the token decimals),\n"
-                                   "For example, if you want to transfer 100.55 and token decimals is 2, you enter 10055.\n"
-                                   "\tamount: "))
-                txn = (TransferTransaction()
-                       .addTokenTransfer(tokenId, self.operator_id, -amount)
-                       .addTokenTransfer(tokenId, accountId, amount)
-                       .execute(self.client))
+                tokenId = self.to_java(self.ask("token id: ", "token"), TokenId)
+                accountId = self.to_java(self.ask("account id: ", "to"), AccountId)
+                amount = int(self.ask("Enter the amount (number of tokens multiply by 1[0...], number of 0's is the token decimals),\n"
+                                      "For example, if you want to transfer 100.55 and token decimals is 2, you enter 10055.\n"
+                                      "\tamount: ", "amount"))
+                txn = self.execute(lambda: (TransferTransaction()
+                                            .addTokenTransfer(tokenId, self.operator_id, -amount)
+                                            .addTokenTransfer(tokenId, accountId, amount)),
+                                   params={"token": tokenId.toString(), "from": self.operator_id.toString(),
+                                           "to": accountId.toString(), "amount": amount})
                 receipt = txn.getReceipt(self.client)
                 print(receipt.status.toString())
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
+
+    def estimate_gas(self, contractId, data):
+        "ask the mirror node to estimate gas for a call, fall back to DEFAULT_GAS"
+        url = "{}/api/v1/contracts/call".format(mirror_address[self.network])
+        body = {"to": "0x" + abi.entity_to_address(contractId.toString()).hex(),
+                "data": "0x" + data.hex(),
+                "estimate": True}
+        try:
+            resp = httpcache.session().post(url, json=body, timeout=10)
+            gas = int(int(resp.json()["result"], 16) * GAS_MARGIN)
+        except Exception:
+            return DEFAULT_GAS
+        return min(max(gas, 21_000), MAX_GAS)
+
+    def call_contract(self, contractId, func, args, gas=None):
+        "run a read-only ContractCallQuery and decode the result with the function's ABI"
+        data = func.encode_input(args)
+        if gas is None:
+            gas = self.estimate_gas(contractId, data)
+        resp = (ContractCallQuery()
+                .setGas(gas)
+                .setContractId(contractId)
+                .setFunctionParameters(ByteString.copyFrom(data))
+                .execute(self.client))
+        if resp.errorMessage:
+            raise Exception(resp.errorMessage)
+        return func.decode_output(bytes(resp.asBytes().toByteArray().tostring()))
+
+    def contract_call_batch(self, batch_path):
+        """Run every line of a NDJSON file as a read-only call, concurrently.
+        each line: {"contract": "0.0.x", "function": "name", "params": [...]}
+        ABIs come from the contract registry, gas is estimated once per (contract, function).
+        """
+        calls = []
+        with open(batch_path) as fh:
+            for line in fh:
+                if line.strip():
+                    calls.append(json.loads(line))
+
+        gas_cache = {}
+
+        def run(call):
+            func = self.contract_function(call["contract"], call["function"])
+            contractId = self.to_java(call["contract"], ContractId)
+            args = call.get("params", [])
+            key = (call["contract"], func.signature)
+            if key not in gas_cache:
+                gas_cache[key] = self.estimate_gas(contractId, func.encode_input(args))
+            return self.call_contract(contractId, func, args, gas_cache[key])
+
+        with ThreadPoolExecutor(max_workers=CALL_WORKERS) as pool:
+            futures = [pool.submit(run, c) for c in calls]
+            for i, (call, fut) in enumerate(zip(calls, futures)):
+                try:
+                    out = {"line": i + 1, "function": call.get("function"), "result": fut.result()}
+                except Exception as e:
+                    out = {"line": i + 1, "function": call.get("function"), "error": str(e)}
+                print(json.dumps(out))
+
+    def contract_function(self, contract_id, name):
+        compiled = self.registry.get(self.network, contract_id)
+        if compiled is None:
+            raise Exception("no ABI registered for {}, use `contract register`".format(contract_id))
+        func = compiled.function(name)
+        if func is None:
+            raise Exception("no function {} in the ABI of {}".format(name, contract_id))
+        return func
+
+    def complete_contract(self, text, line, begidx, endidx):
+        args = line[:begidx].split()
+        if len(args) == 2 and args[1] in ('call', 'info', 'register', 'decode'):
+            registered = [c for c in self.registry.contract_ids(self.network) if c.startswith(text)]
+            return sorted(set(registered + self.completedefault(text, line, begidx, endidx)))
+        if len(args) == 3 and args[1] == 'call':
+            return [f for f in self.registry.function_names(self.network, args[2]) if f.startswith(text)]
+        return self.completedefault(text, line, begidx, endidx)
 
     def do_contract(self, arg):
         """Hedera Smart Contract (HTS & HCS recommended for most use cases):
-        contract create            (create a contract, you will be prompted for details)
-        contract call contract_id  (call a contract,
-                                    you will be prompted for function name and parameter)
-        contract info contract_id  (get info about a contract)
+        contract create                           (create a contract, you will be prompted for details,
+                                                   or give them with --artifact json_path
+                                                   --args "constructor args" --yes)
+        contract call contract_id [function]      (call a contract, you will be prompted for parameters,
+                                                   they are encoded with the registered ABI,
+                                                   --function name and --params "args" answer the prompts)
+        contract call --batch ndjson_path         (run read-only calls listed in a NDJSON file concurrently,
+                                                   one {"contract", "function", "params"} object per line)
+        contract register contract_id json_path   (remember the ABI of an already deployed contract)
+        contract decode contract_id call_data     (the function and arguments of a call's 0x.. input data,
+                                                   found by its selector in the registered ABI)
+        contract info contract_id                 (get info about a contract,
+                                                   takes --consistency strong|eventual)
         """
-        args = arg.split()
-        if not args or args[0] not in ('create', 'call', 'info'):
+        try:
+            args, consistency = self.pop_consistency(arg.split())
+        except ValueError as e:
+            return self.err_return(str(e))
+        if not args or args[0] not in ('create', 'call', 'info', 'register', 'decode'):
             return self.err_return("invalid contract command")
 
         if args[0] == "create":
@@ -882,94 +1783,170 @@ Type help or ? to list commands.\n""".format(version, current_price)
             # contract create is $1, file create is 0.05
             # cost = int(1.10/self.hbar_price) + initBalance
             cost = int(1.10/self.hbar_price)
-            confirm = input("It cost %d hbars to create a contract, continue? y/n: " % cost)
-            if confirm.lower() != "y":
+            if not self.confirm("It cost %d hbars to create a contract, continue? y/n: " % cost):
                 return self.err_return("cancelled")
 
-            where = input("Enter the contract JSON file path: ")
+            where = self.ask("Enter the contract JSON file path: ", "artifact")
             if not os.path.isfile(where):
                 return self.err_return("no such file")
 
-            contract_file = open(where)
             try:
-                contract_json = json.load(contract_file)
-                contract_file.close()
-            except ValueError:
-                return self.err_return("invalid contract JSON file")
-
-            if "abi" not in contract_json or "bytecode" not in contract_json:
-                return self.err_return("contract JSON file must have abi and bytecode")
-
-            if "contractName" in contract_json:
-                name = contract_json['contractName']
-                print("contract name:", name)
-            else:
-                name = "contract"
+                name, contract_abi, bytecode = abi.load_artifact(where)
+            except ValueError as e:
+                return self.err_return("invalid contract JSON file: {}".format(e))
+            print("contract name:", name)
 
             try:
-                txn = (FileCreateTransaction()
-                       .setKeys(self.operator_key.getPublicKey())
-                       .setFileMemo(name)
-                       .setContents(contract_json['bytecode'].encode())
-                       .execute(self.client))
-                receipt = txn.getReceipt(self.client)
-                file_id = receipt.fileId
-                print("contract file created: ", file_id.toString())
+                bytecode = bytecode.encode()
+                file_id = self.find_uploaded(bytecode)
+                if file_id:
+                    print("reusing contract file: ", file_id.toString())
+                else:
+                    file_id = self.create_file(bytecode, name, math.ceil(self.file_cost_in_hbar(len(bytecode))))
+                    print("contract file created: ", file_id.toString())
             except Exception as e:
-                return self.err_return(e)
+                return self.err_return(str(e))
 
-            inputs = contract_json["abi"][0]["inputs"]
-            params = ContractFunctionParameters() 
-            for i in inputs:
-                params.add(input("input - name:" + i['name'] + " type:" + i['type'] + " = "))
+            constructor = abi.constructor(contract_abi)
+            values = []
+            if constructor and self.answer("args") is not None:
+                try:
+                    values = abi.parse_args(constructor.inputs, self.answer("args"))
+                except Exception as e:
+                    return self.err_return(str(e))
+            elif constructor:
+                for t, n in zip(constructor.inputs, constructor.input_names):
+                    values.append(abi.parse_value(t, self.ask("input - name:" + n + " type:" + t + " = ", "args")))
 
             try:
                 # will CONTRACT_REVERT_EXECUTED if setInitialBalance
                 #       .setInitialBalance(Hbar(initBalance))
-                txn = (ContractCreateTransaction()
-                       .setGas(1000000)
-                       .setBytecodeFileId(file_id)
-                       .setAdminKey(self.operator_key)
-                       .setMaxTransactionFee(Hbar(cost))
-                       .execute(self.client))
-                receipt = txn.getReceipt(self.client)
+                def build():
+                    txn = (ContractCreateTransaction()
+                           .setGas(DEFAULT_GAS)
+                           .setBytecodeFileId(file_id)
+                           .setAdminKey(self.operator_key)
+                           .setMaxTransactionFee(Hbar(cost)))
+                    if constructor:
+                        txn.setConstructorParameters(abi.encode(constructor.inputs, values))
+                    return txn
+
+                params = {"bytecodeFile": file_id.toString(), "gas": DEFAULT_GAS, "contract": name,
+                          "constructorArgs": values}
+                receipt = self.execute(build, params=params).getReceipt(self.client)
+                self.remember_created(receipt)
                 print("contract created : ", receipt.contractId.toString())
+                self.registry.register(self.network, receipt.contractId.toString(), name, contract_abi)
             except Exception as e:
-                print(e)
- 
+                self.err_return(str(e))
+
         elif args[0] == "call":
             if len(args) < 2:
                 return self.err_return("need contract_id")
+            if args[1] == "--batch":
+                if len(args) < 3:
+                    return self.err_return("need NDJSON file")
+                try:
+                    self.contract_call_batch(args[2])
+                except Exception as e:
+                    return self.err_return(str(e))
+                return
+
             try:
-                contractId = ContractId.fromString(args[1])
+                contractId = self.to_java(args[1], ContractId)
             except Exception as e:
-                return self.err_return(e)
+                return self.err_return(str(e))
+
+            if len(args) > 2 and not args[2].startswith("--"):
+                func_name = args[2]
+            else:
+                func_name = self.ask("Enter the function name: ", "function")
+            if self.registry.get(self.network, args[1]) is None:
+                # without ABI we can only call functions without parameters and returning a string
+                try:
+                    resp = (ContractCallQuery()
+                            .setGas(DEFAULT_GAS)
+                            .setContractId(contractId)
+                            .setFunction(func_name)
+                            .execute(self.client))
+                except Exception as e:
+                    return self.err_return(str(e))
+
+                if resp.errorMessage:
+                    print(resp.errorMessage)
+                else:
+                    print("result:\n", resp.getString(0))
+                    print()
+                return
 
-            # params = ContractFunctionParameters() 
-            func_name = input("Enter the function name: ")
-            input_params = input("Enter the parameters: ")
             try:
-                resp = (ContractCallQuery()
-                        .setGas(1000000)
-                        .setContractId(contractId)
-                        .setFunction(func_name)
-                        .execute(self.client))
+                func = self.contract_function(args[1], func_name)
             except Exception as e:
-                return self.err_return(e)
+                return self.err_return(str(e))
 
-            if resp.errorMessage:
-                print(resp.errorMessage)
-            else:
-                print("result:\n", resp.getString(0))
-                print()
+            input_params = self.ask("Enter the parameters ({}): ".format(", ".join(func.inputs)), "params")
+            try:
+                result = self.call_contract(contractId, func, abi.parse_args(func.inputs, input_params))
+            except Exception as e:
+                return self.err_return(str(e))
+            print("result:")
+            for t, v in zip(func.outputs, result):
+                print("\t{}: {}".format(t, v))
+            print()
+
+        elif args[0] == "register":
+            if len(args) < 3:
+                return self.err_return("need contract_id and contract JSON file")
+            try:
+                self.to_java(args[1], ContractId)
+                name, contract_abi, _ = abi.load_artifact(args[2])
+                compiled = self.registry.register(self.network, args[1], name, contract_abi)
+                print("registered {} with {} functions".format(name, len(compiled.by_signature)))
+            except Exception as e:
+                return self.err_return(str(e))
+
+        elif args[0] == "decode":
+            if len(args) < 3:
+                return self.err_return("need contract_id and call data")
+            try:
+                contract_id = self.bare(args[1], "contract")
+                data = bytes.fromhex(args[2][2:] if args[2].startswith("0x") else args[2])
+                if self.registry.get(self.network, contract_id) is None:
+                    raise Exception("no ABI registered for {}, use `contract register`".format(contract_id))
+                func, values = self.registry.decode_call(self.network, contract_id, data)
+                if func is None:
+                    raise Exception("no function with selector 0x{} in the ABI of {}".format(
+                        data[:4].hex(), contract_id))
+                print(func.signature)
+                for t, n, v in zip(func.inputs, func.input_names, values):
+                    print("\t{} {}: {}".format(t, n, v))
+                self.set_result(func.name)
+            except Exception as e:
+                return self.err_return(str(e))
+
+        elif args[0] == "info" and consistency == "eventual":
+            if len(args) < 2:
+                return self.err_return("need contract_id")
+            try:
+                info = mirror.contract_info(self.mirror_json, self.bare(args[1], "contract"))
+                print("accountId:", info["account_id"])
+                print("adminKey:", info["admin_key"])
+                print("expires:", info["expiry"])
+                print("autoRenewPeriod (days):", info["auto_renew_days"])
+                print("storage:", info["storage"])
+                print("memo:", info["memo"])
+                print("balance:", info["balance"])
+                print("isDeleted:", info["deleted"])
+            except Exception as e:
+                self.err_return(str(e))
 
         elif args[0] == "info":
             if len(args) < 2:
                 return self.err_return("need contract_id")
             try:
-                contractId = ContractId.fromString(args[1])
+                contractId = self.to_java(args[1], ContractId)
             except Exception as e:
-                return self.err_return(e)
+                return self.err_return(str(e))
 
             try:
                 info = ContractInfoQuery().setContractId(contractId).execute(self.client)
@@ -982,23 +1959,139 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 print("balance:", info.balance.toString())
                 print("isDeleted:", info.isDeleted)
             except Exception as e:
-                print(e)
+                self.err_return(str(e))
+
+    def node_ids(self):
+        "node account ids, once each, the network map has an entry per address"
+        return sorted({a.toString() for a in self.client.getNetwork().values().toArray()},
+                      key=lambda n: entity_id.parse(n).key())
+
+    def prepare_transactions(self, batch_path, out, opts):
+        extra_keys = []
+        if "sign-with" in opts:
+            with open(opts["sign-with"]) as fh:
+                extra_keys = [line.strip() for line in fh if line.strip()]
+
+        def progress(prepared, failed, elapsed):
+            print("\r{} prepared, {} failed, {:.0f} txn/s".format(
+                  prepared, failed, prepared / max(elapsed, 1e-6)), end="", flush=True)
+
+        prepared, failed, elapsed = presign.prepare(
+            batch_path, out, self.operator_id.toString(), self.operator_key.toString(),
+            self.node_ids(), extra_keys,
+            start_in=int(opts.get("start-in", 0)),
+            valid_duration=int(opts.get("valid-duration", presign.MAX_VALID_DURATION)),
+            workers=int(opts["workers"]) if "workers" in opts else None,
+            progress=progress)
+        print()
+        print(Fore.GREEN + "{} transactions signed into {} in {:.1f}s".format(prepared, out, elapsed))
+
+    def submit_prepared(self, path, concurrency, wait_receipts):
+        "send pre-signed transactions, results go to path.results"
+        def submit(item):
+            if "error" in item:
+                raise Exception(item["error"])
+            raw = base64.b64decode(item["bytes"])
+            # a BUSY node didn't take the transaction, the same bytes are sent again
+            # for as long as they are valid
+            try:
+                return self.scheduler.submit(lambda: Transaction.fromBytes(raw), until=item["valid_until"])
+            except Exception as e:
+                if status_name(e) != "DUPLICATE_TRANSACTION":
+                    raise
+                # an earlier submission (this run's or a previous one's) got through
+                return None
+
+        def reconcile(item, resp):
+            if not wait_receipts:
+                return "SUBMITTED"
+            if resp is not None:
+                return self.get_receipt(resp).status.toString()
+            txid = TransactionId.fromString(item["transaction_id"])
+            receipt = TransactionReceiptQuery().setTransactionId(txid).execute(self.client)
+            if receipt.status.toString() != "SUCCESS":
+                raise Exception("transaction {} failed with {}".format(item["transaction_id"],
+                                                                      receipt.status.toString()))
+            return receipt.status.toString()
+
+        ok = failed = 0
+        start = time.time()
+        with open(path + ".results", "w") as out:
+            def waiting(seconds):
+                print("\nwaiting {:.0f}s for the transactions' valid start".format(seconds), flush=True)
+
+            items = presign.read_prepared(path, waiting)
+            for item, status, error in Pipeline(submit, reconcile, concurrency).run(items):
+                res = {"index": item["index"], "transaction_id": item.get("transaction_id")}
+                if error:
+                    failed += 1
+                    res["error"] = str(error)
+                else:
+                    ok += 1
+                    res["status"] = status
+                out.write(json.dumps(res) + "\n")
+                print("\r{} sent, {} failed".format(ok, failed), end="", flush=True)
+        elapsed = time.time() - start
+        print()
+        print(Fore.GREEN + "{} transactions in {:.1f}s ({:.0f} txn/s), results in {}.results".format(
+              ok, elapsed, ok / max(elapsed, 1e-6), path))
 
     def do_txn(self, arg):
         """Transaction info:
         txn info transaction_id    (get info of a transaction,
                                     transaction_id is of format: 0.0.accountId-seconds-nanos)
+        txn prepare batch_path out_path [--sign-with keys_file] [--start-in S] [--valid-duration V]
+                [--workers W]      (freeze and sign the transfers, mints and topic messages in a NDJSON
+                                    batch file offline.  keys_file has extra private keys, one per line.
+                                    transactions are valid from S seconds from now for V seconds,
+                                    180 at most and by default)
+        txn submit prepared_path [--concurrency C] [--receipts]
+                                   (send pre-signed transactions, optionally waiting for receipts.
+                                    transactions not valid yet are held until they are, BUSY ones
+                                    are sent again while they are valid and a duplicate of an
+                                    earlier submission counts as submitted)
         """
         args = arg.split()
-        if not args or args[0] not in ('info'):
+        if not args or args[0] not in ('info', 'prepare', 'submit'):
             return self.err_return("invalid txn command")
 
-        if args[0] == "info":
+        if args[0] == "prepare":
+            try:
+                args, opts = split_options(args[1:])
+            except ValueError as e:
+                return self.err_return(str(e))
+            if len(args) < 2:
+                return self.err_return("need batch file and output file")
+            if not self.operator_key:
+                return self.err_return("operator is not set up")
+            try:
+                self.prepare_transactions(args[0], args[1], opts)
+            except Exception as e:
+                print()
+                return self.err_return(str(e))
+
+        elif args[0] == "submit":
+            try:
+                args, opts = split_options(args[1:], flags=("receipts",))
+                concurrency = int(opts.get("concurrency", 64))
+            except ValueError as e:
+                return self.err_return(str(e))
+            if not args:
+                return self.err_return("need prepared file")
+            try:
+                self.submit_prepared(args[0], concurrency, opts.get("receipts", False))
+            except Exception as e:
+                print()
+                return self.err_return(str(e))
+
+        elif args[0] == "info":
             if len(args) < 2:
                 return self.err_return("need transaction_id")
 
-            url = "{}/api/v1/transactions/{}".format(mirror_address[self.network], args[1])
-            req = requests.get(url)
+            # a transaction with a result is final
+            req = self.mirror_get("/api/v1/transactions/{}".format(args[1]),
+                                  immutable=lambda d: bool(d.get('transactions'))
+                                  and all('result' in t for t in d['transactions']))
             data = req.json()
             if '_status' in data:
                 print(data['_status'])
@@ -1006,6 +2099,382 @@ Type help or ? to list commands.\n""".format(version, current_price)
                 d = data['transactions'][0]
                 pprint(d)
 
+    def do_journal(self, arg):
+        """Journal of submitted transactions:
+        journal status     (number of transactions per outcome)
+        journal pending    (list transactions without a known outcome)
+        journal reconcile  (look up pending transactions on the mirror node now)
+        """
+        args = arg.split()
+        if not args or args[0] not in ('status', 'pending', 'reconcile'):
+            return self.err_return("invalid journal command")
+        if self.journal is None:
+            return self.err_return("journal is disabled (HEDERA_CLI_JOURNAL=0)")
+
+        if args[0] == "status":
+            for status, n in sorted(self.journal.counts().items()):
+                print("{:40} {}".format(status, n))
+        elif args[0] == "pending":
+            for entry in self.journal.pending():
+                print(entry["id"], entry["type"], json.dumps(entry.get("params")))
+        elif args[0] == "reconcile":
+            print("{} transactions reconciled, {} still pending".format(
+                  self.journal.reconcile(), len(self.journal.pending())))
+
+    def check_payers(self):
+        for payer in self.payers.check_balances(self.client):
+            print(Fore.YELLOW + "payer {} is low on hbars: {}".format(
+                  payer.name, payer.tinybars / 100_000_000) + Style.RESET_ALL)
+
+    def start_payer_monitor(self):
+        "check payer balances in the background, HEDERA_PAYER_CHECK_INTERVAL seconds apart"
+        interval = float(os.environ.get("HEDERA_PAYER_CHECK_INTERVAL", 300))
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                if len(self.payers):
+                    try:
+                        self.check_payers()
+                    except Exception:
+                        pass
+        threading.Thread(target=loop, daemon=True).start()
+
+    def do_payers(self, arg):
+        """Pool of fee paying accounts, transactions are spread over them:
+        payers                 (list payers with balance, in-flight and submitted transactions)
+        payers load file_path  (add payers from a file of accountId,privateKey lines,
+                                such as the .secret file of `account create --count`)
+        payers refresh         (refresh balances, warn about payers under HEDERA_PAYER_MIN_HBARS)
+        payers topup hbars     (send hbars from the operator to every payer that is low)
+        payers clear           (go back to paying everything from the operator)
+        the pool is also loaded from HEDERA_PAYERS=id:key,id:key and HEDERA_PAYERS_FILE
+        """
+        args = arg.split()
+        if not args:
+            if not len(self.payers):
+                print("no payers, the operator pays all transactions")
+            print("strategy:", self.payers.strategy)
+            for p in self.payers.payers:
+                balance = "?" if p.tinybars is None else p.tinybars / 100_000_000
+                print("{:20} hbars: {:<16} in flight: {:<6} submitted: {}{}".format(
+                      p.name, balance, p.inflight, p.submitted, "  LOW" if p.low else ""))
+        elif args[0] == "load":
+            if len(args) < 2:
+                return self.err_return("need file_path")
+            try:
+                for account_id, key in read_payers(args[1], self.network):
+                    self.payers.add(account_id, key)
+                print("{} payers in the pool".format(len(self.payers)))
+            except Exception as e:
+                return self.err_return(str(e))
+        elif args[0] == "refresh":
+            try:
+                self.check_payers()
+            except Exception as e:
+                return self.err_return(str(e))
+        elif args[0] == "topup":
+            if len(args) < 2:
+                return self.err_return("need amount of hbars")
+            amount = Hbar.fromTinybars(int(float(args[1]) * 100_000_000))
+            for p in self.payers.payers:
+                if not p.low:
+                    continue
+                try:
+                    # the operator pays, not the pool
+                    txn = self.execute(lambda: (TransferTransaction()
+                                                .addHbarTransfer(self.operator_id, amount.negated())
+                                                .addHbarTransfer(p.account_id, amount)
+                                                .freezeWith(self.client)),
+                                       params={"from": self.operator_id.toString(), "to": p.name,
+                                               "tinybars": amount.toTinybars()})
+                    self.get_receipt(txn)
+                    print("sent {} to {}".format(amount.toString(), p.name))
+                except Exception as e:
+                    self.err_return(str(e))
+        elif args[0] == "clear":
+            self.payers = PayerPool()
+        else:
+            return self.err_return("invalid payers command")
+
+    def do_watch(self, arg):
+        """Repeat info and balance commands, printing only what changed:
+        watch account balance [account_id ...]
+        watch account info [account_id ...]
+        watch token info token_id [token_id ...]
+        watch topic info topic_id [topic_id ...]
+        watch topic get topic_id [topic_id ...]   (print new messages)
+              [--interval s] [--max-interval s] [--duration s]
+        commands are separated by ; and take --consistency strong|eventual.
+        Identical requests are made once per poll and polls back off up to --max-interval
+        (default 12 x interval) while nothing changes.  Eventual reads only fetch the
+        transactions or messages after the last one seen.  Ctrl-C stops watching.
+        """
+        words = arg.split()
+        opts = {}
+        for name in ("interval", "max-interval", "duration"):
+            if "--" + name in words:
+                i = words.index("--" + name)
+                try:
+                    opts[name] = float(words[i + 1])
+                except (IndexError, ValueError):
+                    return self.err_return("--{} needs a number of seconds".format(name))
+                del words[i:i + 2]
+        watcher = Watcher(opts.get("interval", DEFAULT_INTERVAL), opts.get("max-interval"))
+        try:
+            for part in " ".join(words).split(";"):
+                args, consistency = self.pop_consistency(part.split())
+                self.watch_items(watcher, args, consistency)
+        except Exception as e:
+            return self.err_return(str(e))
+        print(Fore.GREEN + "watching {} requests, Ctrl-C to stop".format(len(watcher.sources)) + Style.RESET_ALL)
+        try:
+            watcher.run(opts.get("duration"))
+        except KeyboardInterrupt:
+            print()
+        print("{} polls".format(watcher.polls))
+        self.set_prompt()
+
+    def watch_items(self, watcher, args, consistency):
+        "add the items for one watched command, e.g. account balance 0.0.5 0.0.6"
+        command = " ".join(args[:2])
+        if command not in ("account balance", "account info", "token info", "topic info", "topic get"):
+            raise ValueError("can't watch `{}`".format(" ".join(args)))
+        kind = args[0]
+        ids = args[2:]
+        if not ids and kind == "account" and self.operator_id:
+            ids = [self.operator_id.toString()]
+        if not ids:
+            raise ValueError("{} needs an id".format(command))
+        fresh = lambda path, params=None: self.mirror_json(path, params, ttl=0)
+        for text in ids:
+            entity = self.bare(text, kind)
+            label = "{} {}".format(command, entity)
+            if command == "topic get" or (kind == "topic" and consistency == "eventual"):
+                source = watcher.source(("messages", entity), self.message_cursor(entity))
+                if command == "topic get":
+                    # the new messages are printed by the source
+                    watcher.add(label, source, lambda msgs, first: None)
+                else:
+                    watcher.add(label + " (eventual)", source, self.topic_render(entity, fresh))
+            elif kind == "account" and consistency == "eventual":
+                source = watcher.source(("transactions", entity), self.transaction_cursor(entity))
+                fetch = {"account balance": self.mirror_balance_snapshot,
+                         "account info": self.mirror_account_snapshot}[command]
+                watcher.add(label + " (eventual)", source,
+                            lambda txs, first, fetch=fetch, entity=entity: fetch(fresh, entity) if first or txs else None)
+            elif consistency == "eventual":
+                source = watcher.source((command + " eventual", entity),
+                                        lambda entity=entity: (self.mirror_token_snapshot(fresh, entity), []))
+                watcher.add(label + " (eventual)", source)
+            else:
+                query = {"account balance": self.balance_snapshot, "account info": self.account_snapshot,
+                         "token info": self.token_snapshot, "topic info": self.topic_snapshot}[command]
+                java_id = self.to_java(text, {"account": AccountId, "token": TokenId, "topic": TopicId}[kind])
+                source = watcher.source((command, entity), lambda query=query, java_id=java_id: (query(java_id), []))
+                watcher.add(label, source)
+
+    def transaction_cursor(self, account):
+        "poll for an account's transactions after the last one seen, one line each"
+        cursor = Cursor(lambda params: self.mirror_pages("/api/v1/transactions",
+                                                         dict(params, **{"account.id": account}), cached=False),
+                        lambda page: page.get("transactions", []),
+                        "timestamp", lambda tx: tx["consensus_timestamp"])
+
+        def poll():
+            txs = cursor.poll()
+            lines = []
+            for tx in txs:
+                hbars = sum(t["amount"] for t in tx.get("transfers") or [] if t["account"] == account)
+                tokens = ["{} {:+d}".format(t["token_id"], t["amount"])
+                          for t in tx.get("token_transfers") or [] if t["account"] == account]
+                lines.append("{} {} {} {} {}{}".format(account, tx["transaction_id"], tx["name"], tx["result"],
+                             mirror.hbar_string(hbars), "".join(", " + t for t in tokens)))
+            return txs, lines
+        return poll
+
+    def message_cursor(self, topic):
+        "poll for a topic's messages after the last one seen, one line each"
+        cursor = Cursor(lambda params: self.mirror_pages("/api/v1/topics/{}/messages".format(topic), params,
+                                                         cached=False),
+                        lambda page: page.get("messages", []),
+                        "sequencenumber", lambda msg: msg["sequence_number"])
+
+        def poll():
+            msgs = cursor.poll()
+            return msgs, ["{} #{}: {}".format(topic, msg["sequence_number"],
+                                              base64.b64decode(msg["message"]).decode(errors="replace"))
+                          for msg in msgs]
+        return poll
+
+    def topic_render(self, topic, get):
+        "topic info from the mirror node once, then from the new messages"
+        last = {}
+
+        def render(msgs, first):
+            if first:
+                info = mirror.topic_info(get, topic)
+                last.update({"memo": info["memo"], "sequence#": info["sequence_number"],
+                             "running hash": info["running_hash"] or "",
+                             "adminKey": info["admin_key"] or "", "submitKey": info["submit_key"] or ""})
+            elif msgs:
+                last.update({"sequence#": msgs[-1]["sequence_number"],
+                             "running hash": base64.b64decode(msgs[-1]["running_hash"]).hex()})
+            else:
+                return None
+            return dict(last)
+        return render
+
+    def mirror_balance_snapshot(self, get, account):
+        balance = mirror.account_balance(get, account)
+        snapshot = {"hbars": balance["hbars"]}
+        for token_id, amount in balance["tokens"]:
+            snapshot["token " + token_id] = str(amount)
+        return snapshot
+
+    def mirror_account_snapshot(self, get, account):
+        info = mirror.account_info(get, account)
+        snapshot = {"balance": info["balance"], "key": info["key"],
+                    "isReceiverSignatureRequired": info["receiver_sig_required"]}
+        for rel in info["tokens"]:
+            snapshot["token " + rel["token_id"]] = "balance {} kyc {} freeze {}".format(
+                rel["balance"], rel["kyc_status"], rel["freeze_status"])
+        return snapshot
+
+    def mirror_token_snapshot(self, get, token):
+        info = mirror.token_info(get, token)
+        return {"name": info["name"], "symbol": info["symbol"], "totalSupply": info["total_supply"],
+                "maxSupply": info["max_supply"], "kycKey": info["kyc_key"],
+                "supplyKey": info["supply_key"], "wipeKey": info["wipe_key"]}
+
+    def balance_snapshot(self, accountId):
+        balance = AccountBalanceQuery().setAccountId(accountId).execute(self.client)
+        snapshot = {"hbars": balance.hbars.toString()}
+        tokens = balance.tokens
+        for tokenId in tokens.keySet().toArray():
+            snapshot["token " + tokenId.toString()] = str(tokens[tokenId])
+        return snapshot
+
+    def account_snapshot(self, accountId):
+        info = AccountInfoQuery().setAccountId(accountId).execute(self.client)
+        snapshot = {"balance": info.balance.toString(), "key": info.key.toString(),
+                    "isReceiverSignatureRequired": info.isReceiverSignatureRequired}
+        for tokenId in info.tokenRelationships.keySet().toArray():
+            rel = info.tokenRelationships[tokenId]
+            snapshot["token " + tokenId.toString()] = "balance {} kyc {} freeze {}".format(
+                rel.balance, rel.kycStatus, rel.freezeStatus)
+        return snapshot
+
+    def token_snapshot(self, tokenId):
+        info = TokenInfoQuery().setTokenId(tokenId).execute(self.client)
+        return {"name": info.name, "symbol": info.symbol, "totalSupply": info.totalSupply,
+                "maxSupply": info.maxSupply, "kycKey": info.kycKey and info.kycKey.toString(),
+                "supplyKey": info.supplyKey and info.supplyKey.toString(),
+                "wipeKey": info.wipeKey and info.wipeKey.toString()}
+
+    def topic_snapshot(self, topicId):
+        info = TopicInfoQuery().setTopicId(topicId).execute(self.client)
+        return {"memo": info.topicMemo, "sequence#": info.sequenceNumber,
+                "running hash": info.runningHash.toByteArray().tostring().hex() if info.runningHash else "",
+                "adminKey": info.adminKey.toString() if info.adminKey else "",
+                "submitKey": info.submitKey.toString() if info.submitKey else ""}
+
+    def do_analytics(self, arg):
+        """Local store of account activity (~/.hedera-cli/analytics/), for aggregate queries:
+        analytics sync [account_id] [--since timestamp]
+                                  (copy the account's transactions and transfers from the mirror node,
+                                   after the last one already stored, or from --since the first time.
+                                   a later sync can't start before the first one's --since)
+        analytics query fees [account_id] [--since timestamp] [--until timestamp]
+                                  (fees paid by the account, per transaction type)
+        analytics query flows [account_id] [--token token_id] [--since ..] [--until ..] [--limit n]
+                                  (hbars and tokens received from and sent to each counterparty)
+        analytics query daily [account_id] [--token token_id] [--since ..] [--until ..]
+                                  (transfers and amounts received and sent per UTC day)
+        analytics info            (the accounts stored)
+        the account is the operator if not given, timestamps are seconds or ISO dates,
+        use `hbar` as the token for hbars
+        """
+        args = arg.split()
+        if not args or args[0] not in ("sync", "query", "info"):
+            return self.err_return("invalid analytics command")
+        try:
+            positional, opts = split_options(args[1:])
+            if args[0] == "query":
+                if not positional or positional[0] not in ("fees", "flows", "daily"):
+                    return self.err_return("query fees, flows or daily")
+                query, positional = positional[0], positional[1:]
+            if positional:
+                account = self.bare(positional[0], "account")
+            elif self.operator_id:
+                account = self.operator_id.toString()
+            elif args[0] != "info":
+                return self.err_return("need account_id")
+            since = analytics.ns(mirror.parse_timestamp(opts["since"])) if "since" in opts else 0
+            until = analytics.ns(mirror.parse_timestamp(opts["until"])) if "until" in opts else None
+            token = opts.get("token")
+            if token and token != analytics.HBAR:
+                token = self.bare(token, "token")
+            limit = int(opts.get("limit", 50))
+        except ValueError as e:
+            return self.err_return(str(e))
+
+        store = analytics.Store(self.network)
+        try:
+            if args[0] == "sync":
+                self.analytics_sync(store, account, since)
+            elif args[0] == "info":
+                for account, count, first, last in store.accounts():
+                    print("{:16} {:>10} transactions  {} .. {}".format(
+                          account, count, mirror.timestamp_string(analytics.timestamp(first)),
+                          mirror.timestamp_string(analytics.timestamp(last))))
+            else:
+                started = time.time()
+                if query == "fees":
+                    rows = [(t, n, mirror.hbar_string(fee)) for t, n, fee in store.fees(account, since, until)]
+                    header = ("type", "count", "fees")
+                elif query == "flows":
+                    rows = [(party, tok, analytics.amount_string(tok, received), analytics.amount_string(tok, sent),
+                             analytics.amount_string(tok, net))
+                            for party, tok, received, sent, net in store.flows(account, token, since, until, limit)]
+                    header = ("counterparty", "token", "received", "sent", "net")
+                else:
+                    rows = [(day, tok, n, analytics.amount_string(tok, received), analytics.amount_string(tok, sent))
+                            for day, tok, n, received, sent in store.daily(account, token, since, until)]
+                    header = ("day", "token", "transfers", "received", "sent")
+                elapsed = time.time() - started
+                widths = [max([len(str(h))] + [len(str(r[i])) for r in rows]) for i, h in enumerate(header)]
+                for row in [header] + rows:
+                    print("  ".join(str(v).rjust(w) if i else str(v).ljust(w)
+                                    for i, (v, w) in enumerate(zip(row, widths))))
+                print("{} rows in {:.1f} ms".format(len(rows), elapsed * 1000))
+        except Exception as e:
+            self.err_return(str(e))
+        finally:
+            store.close()
+        self.set_prompt()
+
+    def analytics_sync(self, store, account, since=0):
+        "fetch the account's transactions after the last one stored"
+        first = store.since(account)
+        if since and first is not None and since < first:
+            return self.err_return("{} is stored from {}, sync can't fill in before that".format(
+                                   account, mirror.timestamp_string(analytics.timestamp(first))))
+        last = max(store.last(account) or 0, since - 1 if since else 0)
+        params = {"account.id": account, "order": "asc", "limit": analytics.PAGE_LIMIT}
+        if last:
+            params["timestamp"] = "gt:" + analytics.timestamp(last)
+
+        def progress(count, elapsed):
+            print("\r{} transactions, {:.0f}/s".format(count, count / max(elapsed, 1e-6)), end="", flush=True)
+
+        pages = mirror.prefetch(self.mirror_pages("/api/v1/transactions", params, cached=False))
+        try:
+            count = store.sync(account, pages, progress, since)
+        finally:
+            print()
+        print(Fore.GREEN + "{} new transactions for {}".format(count, account) + Style.RESET_ALL)
+
     def do_hbar(self, arg):
         """Hbar info:
         hbar price   (get hbar price)
@@ -1017,7 +2486,8 @@ Type help or ? to list commands.\n""".format(version, current_price)
         price = get_Hbar_price(True)
         print("Hbar price (per Hbar):")
         for d in ('usd', 'btc', 'eth', 'eur', 'gbp', 'jpy', 'cny'):
-            print(price[d], d)
+            if d in price:
+                print(price[d], d)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+"""On-disk HTTP cache for mirror node and price lookups.
+
+Callers say how long a response stays fresh: `immutable` responses (a finalized
+transaction, a topic message with a sequence number) are kept until evicted,
+others for `ttl` seconds and then revalidated with If-None-Match/If-Modified-Since
+when the server gave an ETag or Last-Modified.  The cache directory is capped at
+HEDERA_CLI_CACHE_MB (default 100) megabytes, least recently used entries go first.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+import requests
+
+from hedera_cli.store import data_path
+from hedera_cli.metrics import metrics
+
+DEFAULT_TTL = 10
+DEFAULT_CAP_MB = 100
+
+
+def cache_key(url, params):
+    key = url + "?" + json.dumps(params or {}, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def make_response(url, status, headers, body):
+    resp = requests.Response()
+    resp.url = url
+    resp.status_code = status
+    resp.headers.update(headers)
+    resp._content = body.encode()
+    resp.encoding = "utf-8"
+    return resp
+
+
+class CachedSession:
+    def __init__(self, path=None, cap_mb=None):
+        self.path = path or os.path.dirname(data_path("http", "x"))
+        if cap_mb is None:
+            cap_mb = float(os.environ.get("HEDERA_CLI_CACHE_MB", DEFAULT_CAP_MB))
+        self.cap = int(cap_mb * 1024 * 1024)
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.size = sum(e.stat().st_size for e in self._entries())
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def _entries(self):
+        "the cached responses, not the temporary files of writes in progress"
+        return [e for e in os.scandir(self.path) if e.name.endswith(".json") and e.is_file()]
+
+    def _load(self, key):
+        try:
+            with open(self._file(key)) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key, entry):
+        "write to a temporary file and rename it, readers never see a partial entry"
+        data = json.dumps(entry).encode()
+        path = self._file(key)
+        tmp = "{}.{}.tmp".format(path, threading.get_ident())
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        with self.lock:
+            try:
+                self.size -= os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, path)
+            self.size += len(data)
+            if self.size > self.cap:
+                self._evict()
+
+    def _evict(self):
+        "drop least recently used entries down to 90% of the cap"
+        entries = []
+        for e in self._entries():
+            try:
+                entries.append((e.stat().st_mtime, e.stat().st_size, e.path))
+            except FileNotFoundError:
+                pass
+        for _, size, path in sorted(entries):
+            if self.size <= self.cap * 0.9:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
+            metrics.incr("http_cache.evicted")
+
+    def get(self, url, params=None, ttl=DEFAULT_TTL, immutable=False, timeout=30):
+        """GET through the cache.  `immutable` is a bool or a function of the decoded
+        JSON telling whether this response can never change
+        """
+        key = cache_key(url, params)
+        entry = self._load(key)
+        now = time.time()
+        if entry and (entry["expires"] is None or entry["expires"] > now):
+            try:
+                # mtime is the LRU clock
+                os.utime(self._file(key))
+            except FileNotFoundError:
+                # evicted since it was read, a miss like any other
+                entry = None
+            else:
+                metrics.incr("http_cache.hit")
+                return make_response(url, entry["status"], entry["headers"], entry["body"])
+
+        headers = {}
+        if entry:
+            if entry["headers"].get("ETag"):
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if entry["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        resp = self.session.get(url, params=params, headers=headers, timeout=timeout)
+
+        if resp.status_code == 304 and entry:
+            metrics.incr("http_cache.revalidated")
+            entry["expires"] = now + ttl
+            self._store(key, entry)
+            return make_response(url, entry["status"], entry["headers"], entry["body"])
+
+        metrics.incr("http_cache.miss")
+        if resp.status_code == 200:
+            if callable(immutable):
+                try:
+                    immutable = immutable(resp.json())
+                except ValueError:
+                    immutable = False
+            kept = {h: resp.headers[h] for h in ("ETag", "Last-Modified", "Content-Type")
+                    if h in resp.headers}
+            self._store(key, {"url": resp.url, "status": 200, "headers": kept, "body": resp.text,
+                              "expires": None if immutable else now + ttl})
+        return resp
+
+    def fetch(self, url, params=None, timeout=30):
+        "GET without the cache, for large one-off listings, still on the pooled connections"
+        return self.session.get(url, params=params, timeout=timeout)
+
+    def post(self, url, json=None, timeout=30):
+        "POST without the cache, on the pooled connections"
+        return self.session.post(url, json=json, timeout=timeout)
+
+    def clear(self):
+        with self.lock:
+            for e in os.scandir(self.path):
+                if e.is_file():
+                    os.remove(e.path)
+            self.size = 0
+
+
+_session = None
+
+
+def session():
+    "the shared cache"
+    global _session
+    if _session is None:
+        _session = CachedSession()
+    return _session
@@ -0,0 +1,179 @@
+"""Write-ahead journal of submitted transactions.
+
+Every transaction is recorded, with its transaction id, type, parameters and an
+optional idempotency key, before it is sent to the network.  Outcomes are appended
+later, either right after submission (precheck errors) or by the reconciler, which
+looks pending transactions up on the mirror node.  A transaction that is not on the
+mirror node once its valid window has passed never reached consensus and is safe
+to send again.
+
+When the journal is opened, the log is rewritten without the finished transactions,
+except those with an idempotency key from the last KEEP_KEYED_DAYS, which resumed
+bulk commands look up.
+"""
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from hedera_cli.store import data_path
+
+PENDING = "PENDING"
+EXPIRED = "EXPIRED"
+VALID_DURATION = 180
+# how long after the valid window the mirror node gets to catch up
+MIRROR_GRACE = 60
+RECONCILE_INTERVAL = 5
+RECONCILE_WORKERS = 8
+KEEP_KEYED_DAYS = 7
+
+
+def mirror_txid(txid):
+    "0.0.123@1650000000.000000001 -> 0.0.123-1650000000-000000001"
+    account, start = txid.split("@")
+    seconds, nanos = _strip(start).split(".")
+    return "{}-{}-{}".format(account, seconds, nanos.ljust(9, "0"))
+
+
+def _strip(start):
+    "drop ?scheduled and /nonce suffixes"
+    return start.split("?")[0].split("/")[0]
+
+
+def valid_start(txid):
+    return float(_strip(txid.split("@")[1]))
+
+
+class Journal:
+    def __init__(self, network, mirror_url, path=None):
+        self.network = network
+        self.mirror_url = mirror_url
+        self.path = path or data_path("journal", network + ".log")
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.by_key = {}
+        if os.path.isfile(self.path):
+            with open(self.path) as fh:
+                for line in fh:
+                    try:
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        # a torn last line from a crash
+                        pass
+            self._compact()
+        self.fh = open(self.path, "a")
+        self.session = requests.Session()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def _apply(self, record):
+        if record["op"] == "submit":
+            entry = dict(record, status=PENDING)
+            self.entries[record["id"]] = entry
+            if record.get("key"):
+                self.by_key[record["key"]] = entry
+        elif record["id"] in self.entries:
+            self.entries[record["id"]].update(status=record["status"],
+                                              entity_id=record.get("entity_id"))
+
+    def _compact(self):
+        "drop finished entries from memory and rewrite the log with what's left"
+        cutoff = time.time() - KEEP_KEYED_DAYS * 86400
+        keep = {txid: e for txid, e in self.entries.items()
+                if e["status"] == PENDING or (e.get("key") and e.get("ts", 0) > cutoff)}
+        if len(keep) == len(self.entries):
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as fh:
+            for e in keep.values():
+                submit = {k: e.get(k) for k in ("id", "type", "params", "key", "ts")}
+                fh.write(json.dumps(dict(submit, op="submit")) + "\n")
+                if e["status"] != PENDING:
+                    fh.write(json.dumps({"op": "outcome", "id": e["id"], "status": e["status"],
+                                         "entity_id": e.get("entity_id")}) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+        self.entries = keep
+        self.by_key = {e["key"]: e for e in keep.values() if e.get("key")}
+
+    def _write(self, record):
+        with self.lock:
+            self._apply(record)
+            self.fh.write(json.dumps(record) + "\n")
+            self.fh.flush()
+            os.fsync(self.fh.fileno())
+
+    def submitted(self, txid, kind, params=None, key=None):
+        self._write({"op": "submit", "id": txid, "type": kind, "params": params,
+                     "key": key, "ts": time.time()})
+
+    def outcome(self, txid, status, entity_id=None):
+        self._write({"op": "outcome", "id": txid, "status": status, "entity_id": entity_id})
+
+    def get_by_key(self, key):
+        return self.by_key.get(key)
+
+    def pending(self):
+        with self.lock:
+            return [e for e in self.entries.values() if e["status"] == PENDING]
+
+    def counts(self):
+        out = {}
+        with self.lock:
+            for e in self.entries.values():
+                out[e["status"]] = out.get(e["status"], 0) + 1
+        return out
+
+    def lookup(self, entry):
+        "status of one transaction from the mirror node, PENDING if it can't be decided yet"
+        url = "{}/api/v1/transactions/{}".format(self.mirror_url, mirror_txid(entry["id"]))
+        resp = self.session.get(url, timeout=10)
+        if resp.status_code == 404:
+            if time.time() > valid_start(entry["id"]) + VALID_DURATION + MIRROR_GRACE:
+                return EXPIRED, None
+            return PENDING, None
+        resp.raise_for_status()
+        for txn in resp.json().get("transactions", []):
+            # scheduled or child transactions share the id, the parent has nonce 0
+            if txn.get("nonce", 0) == 0 and not txn.get("scheduled"):
+                return txn["result"], txn.get("entity_id")
+        return PENDING, None
+
+    def reconcile(self):
+        "look up all pending transactions in parallel, returns how many got an outcome"
+        pending = self.pending()
+        if not pending:
+            return 0
+        resolved = 0
+        with ThreadPoolExecutor(RECONCILE_WORKERS) as pool:
+            for entry, res in zip(pending, pool.map(self._safe_lookup, pending)):
+                if res and res[0] != PENDING:
+                    self.outcome(entry["id"], res[0], res[1])
+                    resolved += 1
+        return resolved
+
+    def _safe_lookup(self, entry):
+        try:
+            return self.lookup(entry)
+        except Exception:
+            return None
+
+    def start(self):
+        "reconcile in a background thread"
+        def loop():
+            while not self.stopped.wait(RECONCILE_INTERVAL):
+                self.reconcile()
+        self.thread = threading.Thread(target=loop, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        "stop the reconciler, waiting for a reconcile in progress, then close the log"
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        with self.lock:
+            self.fh.close()
@@ -0,0 +1,229 @@
+"""Compact keystore for bulk generated keys.
+
+A keystore file is a 24 byte header followed by fixed size records:
+
+    header: b"HKS2" | flags (1 byte) | reserved (3 bytes) | salt (16 bytes)
+    record: key type (1 byte) | private key (32 bytes) | public key (33 bytes)
+
+ED25519 public keys are 32 bytes and are left padded with a zero byte.  When the
+keystore is encrypted, the private key of record i is sealed with AES-256-GCM under
+scrypt(passphrase, salt), nonce i and the header, key type and public key as associated
+data, which makes it 48 bytes, and a GCM tag over the header with nonce = the number of
+records ends the file so a truncated keystore is refused.  Public keys are never
+encrypted, `<keystore>.idx` maps each public key to its record number.
+"""
+import os
+import time
+import hashlib
+import multiprocessing
+from collections import deque
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+MAGIC = b"HKS2"
+HEADER_SIZE = 24
+RECORD_SIZE = 66
+TAG_SIZE = 16
+SEALED_RECORD_SIZE = RECORD_SIZE + TAG_SIZE
+ENCRYPTED = 1
+BATCH_SIZE = 500
+
+ED25519 = 0
+ECDSA = 1
+KEY_TYPES = {"ed25519": ED25519, "ecdsa": ECDSA}
+
+# DER prefixes the SDK uses in PrivateKey/PublicKey.toString()
+PRIVATE_PREFIX = {
+    ED25519: bytes.fromhex("302e020100300506032b657004220420"),
+    ECDSA: bytes.fromhex("3030020100300706052b8104000a04220420"),
+    }
+PUBLIC_PREFIX = {
+    ED25519: bytes.fromhex("302a300506032b6570032100"),
+    ECDSA: bytes.fromhex("302d300706052b8104000a032200"),
+    }
+PUBLIC_SIZE = {ED25519: 32, ECDSA: 33}
+
+_PrivateKey = None
+
+
+def _init_worker():
+    global _PrivateKey
+    # each worker process starts its own JVM
+    from hedera_cli import simulator
+    simulator.install_in_worker()
+    from hedera import PrivateKey
+    _PrivateKey = PrivateKey
+
+
+def generate_batch(args):
+    "runs in a worker: returns `count` plain records"
+    kind, count = args
+    if kind == ECDSA:
+        generate = _PrivateKey.generateECDSA
+    elif hasattr(_PrivateKey, "generateED25519"):
+        generate = _PrivateKey.generateED25519
+    else:
+        generate = _PrivateKey.generate
+    out = bytearray()
+    for _ in range(count):
+        prikey = generate()
+        pri = bytes.fromhex(prikey.toString())[-32:]
+        pub = bytes.fromhex(prikey.getPublicKey().toString())[-PUBLIC_SIZE[kind]:]
+        out.append(kind)
+        out += pri
+        out += pub.rjust(33, b"\0")
+    return bytes(out)
+
+
+def derive_key(passphrase, salt):
+    return hashlib.scrypt(passphrase.encode(), salt=salt, n=2 ** 14, r=8, p=1, dklen=32)
+
+
+def _nonce(index):
+    return index.to_bytes(12, "big")
+
+
+def _end_tag(aead, header, count):
+    return aead.encrypt(_nonce(count), b"", header + b"end")
+
+
+def private_key_string(kind, raw):
+    "hex DER string accepted by PrivateKey.fromString"
+    return (PRIVATE_PREFIX[kind] + raw).hex()
+
+
+def public_key_string(kind, raw):
+    return (PUBLIC_PREFIX[kind] + raw[-PUBLIC_SIZE[kind]:]).hex()
+
+
+class KeystoreWriter:
+    def __init__(self, path, passphrase=None):
+        self.path = path
+        self.count = 0
+        salt = os.urandom(16)
+        self.header = MAGIC + bytes([ENCRYPTED if passphrase else 0]) + b"\0" * 3 + salt
+        self.aead = AESGCM(derive_key(passphrase, salt)) if passphrase else None
+        self.fh = open(path, "wb")
+        os.chmod(path, 0o600)
+        self.idx = open(path + ".idx", "w")
+        self.fh.write(self.header)
+
+    def write_records(self, records):
+        out = bytearray()
+        for off in range(0, len(records), RECORD_SIZE):
+            rec = records[off:off + RECORD_SIZE]
+            kind, pri, pub = rec[0], rec[1:33], rec[33:]
+            self.idx.write("{} {}\n".format(public_key_string(kind, pub), self.count))
+            if self.aead:
+                pri = self.aead.encrypt(_nonce(self.count), pri, self.header + rec[:1] + pub)
+            out.append(kind)
+            out += pri
+            out += pub
+            self.count += 1
+        self.fh.write(out)
+
+    def close(self):
+        if self.aead:
+            self.fh.write(_end_tag(self.aead, self.header, self.count))
+        self.fh.close()
+        self.idx.close()
+
+
+def _header(path):
+    with open(path, "rb") as fh:
+        header = fh.read(HEADER_SIZE)
+    if header[:4] != MAGIC:
+        raise ValueError("{} is not a keystore".format(path))
+    return header
+
+
+def is_encrypted(path):
+    return bool(_header(path)[4] & ENCRYPTED)
+
+
+def key_count(path):
+    "the number of records in a keystore, without reading them"
+    header = _header(path)
+    size = os.path.getsize(path) - HEADER_SIZE
+    if header[4] & ENCRYPTED:
+        return (size - TAG_SIZE) // SEALED_RECORD_SIZE
+    return size // RECORD_SIZE
+
+
+def read_keystore(path, passphrase=None):
+    """yield (private key string, public key string) for every record,
+    reads one record at a time so memory use does not grow with the keystore size
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as fh:
+        header = fh.read(HEADER_SIZE)
+        if header[:4] != MAGIC:
+            raise ValueError("{} is not a keystore".format(path))
+        aead = None
+        end, record_size, pri_size = size, RECORD_SIZE, 32
+        if header[4] & ENCRYPTED:
+            if not passphrase:
+                raise ValueError("keystore is encrypted, a passphrase is needed")
+            aead = AESGCM(derive_key(passphrase, header[8:24]))
+            end -= TAG_SIZE
+            record_size, pri_size = SEALED_RECORD_SIZE, 32 + TAG_SIZE
+            # a wrong passphrase, a changed header or a truncated file fail here,
+            # before any key is handed out
+            count, extra = divmod(end - HEADER_SIZE, record_size)
+            fh.seek(end)
+            try:
+                if extra or end < HEADER_SIZE:
+                    raise InvalidTag
+                aead.decrypt(_nonce(count), fh.read(TAG_SIZE), header + b"end")
+            except InvalidTag:
+                raise ValueError("wrong passphrase or corrupted keystore") from None
+            fh.seek(HEADER_SIZE)
+        index = 0
+        while fh.tell() < end:
+            rec = fh.read(record_size)
+            kind, pri, pub = rec[0], rec[1:1 + pri_size], rec[1 + pri_size:]
+            if aead:
+                try:
+                    pri = aead.decrypt(_nonce(index), pri, header + rec[:1] + pub)
+                except InvalidTag:
+                    raise ValueError("keystore record {} is corrupted".format(index)) from None
+            yield private_key_string(kind, pri), public_key_string(kind, pub)
+            index += 1
+
+
+def find_record(path, public_key):
+    "record number of a public key, using the .idx file"
+    with open(path + ".idx") as fh:
+        for line in fh:
+            pub, num = line.split()
+            if pub == public_key:
+                return int(num)
+    return None
+
+
+def generate_keystore(path, count, kind=ED25519, workers=None, passphrase=None, progress=None):
+    """Generate `count` keys across a process pool and stream them into a keystore.
+    At most 2 batches per worker are in flight, so memory stays flat for any count.
+    returns (number of keys, seconds)
+    """
+    workers = workers or os.cpu_count() or 1
+    # the JVM doesn't survive fork, workers must be spawned
+    ctx = multiprocessing.get_context("spawn")
+    writer = KeystoreWriter(path, passphrase)
+    start = time.time()
+    remaining = count
+    pending = deque()
+    try:
+        with ctx.Pool(workers, initializer=_init_worker) as pool:
+            while remaining or pending:
+                while remaining and len(pending) < workers * 2:
+                    n = min(BATCH_SIZE, remaining)
+                    pending.append(pool.apply_async(generate_batch, ((kind, n),)))
+                    remaining -= n
+                writer.write_records(pending.popleft().get())
+                if progress:
+                    progress(writer.count, time.time() - start)
+    finally:
+        writer.close()
+    return writer.count, time.time() - start
@@ -1,18 +1,42 @@
-import hedera_cli.check_java
 import sys
+import argparse
 from typing import List, Optional
 import colorama
 from dotenv import load_dotenv
-from hedera_cli.hedera_cli import HederaCli
 
 
 def main(args: Optional[List[str]] = None) -> int:
     if args is None:
         args = sys.argv[1:]
-    if len(args) > 0:
-        dotenv = args[0]
+    parser = argparse.ArgumentParser(prog="hedera-cli")
+    parser.add_argument("dotenv", nargs="?", default=".env", help="env file to load (default .env)")
+    parser.add_argument("--simulate", action="store_true",
+                        help="run against an in-process simulated network instead of Hedera")
+    parser.add_argument("--sim-config", help="simulator settings, a JSON file or inline JSON")
+    parser.add_argument("--script", help="run the commands in a file instead of the interactive prompt")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="script lines run concurrently (default 8)")
+    opts = parser.parse_args(args)
+    load_dotenv(opts.dotenv)
+    mirror_url = None
+    if opts.simulate:
+        # must come before hedera_cli.hedera_cli imports the SDK
+        from hedera_cli import simulator
+        mirror_url = simulator.start(opts.sim_config)
     else:
-        dotenv = ".env"
-    load_dotenv(dotenv)
+        import hedera_cli.check_java
+    from hedera_cli import hedera_cli
+    if mirror_url:
+        hedera_cli.mirror_address["simulator"] = mirror_url
     colorama.init()
-    HederaCli().cmdloop()
+    if opts.script:
+        from hedera_cli import script
+        with open(opts.script) as fh:
+            text = fh.read()
+        try:
+            failed = script.run(hedera_cli.HederaCli(), text, opts.jobs or script.DEFAULT_JOBS)
+        except ValueError as e:
+            print(e)
+            return 2
+        return 1 if failed else 0
+    hedera_cli.HederaCli().cmdloop()
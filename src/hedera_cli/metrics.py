@@ -0,0 +1,61 @@
+import threading
+from collections import defaultdict, deque
+
+SAMPLES = 10000
+
+
+class Metrics:
+    "counters, gauges and latency samples shown by the `metrics` command"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self.gauges = {}
+        self.timings = defaultdict(lambda: deque(maxlen=SAMPLES))
+
+    def incr(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def add_gauge(self, name, n):
+        with self.lock:
+            self.gauges[name] = self.gauges.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        with self.lock:
+            self.timings[name].append(seconds)
+
+    def percentiles(self, name, points=(50, 90, 99)):
+        with self.lock:
+            samples = sorted(self.timings.get(name, ()))
+        if not samples:
+            return {}
+        out = {p: samples[min(len(samples) - 1, len(samples) * p // 100)] for p in points}
+        out["max"] = samples[-1]
+        return out
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.timings.clear()
+
+    def report(self):
+        lines = []
+        for name in sorted(self.counters):
+            lines.append("{:48} {}".format(name, self.counters[name]))
+        for name in sorted(self.gauges):
+            value = self.gauges[name]
+            lines.append("{:48} {}".format(name, round(value, 2) if isinstance(value, float) else value))
+        for name in sorted(self.timings):
+            pct = self.percentiles(name)
+            lines.append("{:48} n={} p50={:.3f}s p90={:.3f}s p99={:.3f}s max={:.3f}s".format(
+                name, len(self.timings[name]), pct[50], pct[90], pct[99], pct["max"]))
+        return lines
+
+
+metrics = Metrics()
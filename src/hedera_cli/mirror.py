@@ -0,0 +1,232 @@
+"""Mirror node REST versions of the SDK info and balance queries.
+
+Each function takes `get(path, params=None)` returning decoded JSON and gives back the
+fields the SDK based commands print, already formatted the way the SDK formats them
+(DER encoded keys, ISO timestamps, hbar amounts).  Mirror node data is eventually
+consistent, a few seconds behind consensus, and free.
+"""
+import queue
+import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from hedera_cli.keystore import PUBLIC_PREFIX, ED25519, ECDSA
+
+# token lookups made at once for an account's token relationships
+TOKEN_WORKERS = 8
+# how long the prefetch thread waits on a full queue before checking if the reader stopped
+PREFETCH_PUT_TIMEOUT = 0.2
+
+KEY_PREFIX = {
+    "ED25519": PUBLIC_PREFIX[ED25519],
+    "ECDSA_SECP256K1": PUBLIC_PREFIX[ECDSA],
+    }
+
+
+def key_string(key):
+    "mirror node key object to the DER hex string PublicKey.toString() gives"
+    if not key:
+        return None
+    prefix = KEY_PREFIX.get(key.get("_type"))
+    if prefix is None:
+        # ProtobufEncoded (key lists, contract ids), printed as is
+        return key["key"]
+    return prefix.hex() + key["key"]
+
+
+def timestamp_string(ts):
+    "seconds.nanos to the ISO format of java.time.Instant"
+    if not ts:
+        return None
+    seconds, _, nanos = ts.partition(".")
+    dt = datetime.fromtimestamp(int(seconds), tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    nanos = nanos.rstrip("0")
+    if nanos:
+        # Instant prints 3, 6 or 9 fraction digits
+        nanos = nanos.ljust(3 * ((len(nanos) + 2) // 3), "0")
+        return "{}.{}Z".format(dt, nanos)
+    return dt + "Z"
+
+
+def hbar_string(tinybars):
+    "same as Hbar.toString()"
+    if -10000 < tinybars < 10000:
+        return "{} tℏ".format(tinybars)
+    hbars = (Decimal(tinybars) / Decimal(100_000_000)).normalize()
+    return "{} ℏ".format(format(hbars, "f"))
+
+
+def token_amount(balance, decimals):
+    "integer token balance to the decimals adjusted amount, as a string"
+    if not decimals:
+        return str(balance)
+    return format(Decimal(balance).scaleb(-decimals), "f")
+
+
+def parse_timestamp(text):
+    "seconds[.nanos] or an ISO date/time (UTC unless it says otherwise) to seconds.nanos"
+    seconds, _, nanos = text.partition(".")
+    if seconds.isdigit() and (nanos.isdigit() or not nanos):
+        return "{}.{}".format(int(seconds), nanos[:9].ljust(9, "0"))
+    try:
+        dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError("invalid timestamp: {}".format(text))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return "{}.{:09d}".format(int(dt.timestamp()), dt.microsecond * 1000)
+
+
+def rows(get, path, key, params=None):
+    "the `key` rows of every page of a mirror node list, following links.next"
+    while path:
+        data = get(path, params)
+        yield from data.get(key, [])
+        path, params = (data.get("links") or {}).get("next"), None
+
+
+def account_info(get, account_id):
+    data = get("/api/v1/accounts/{}".format(account_id))
+    rels = list(rows(get, "/api/v1/accounts/{}/tokens".format(account_id), "tokens", {"limit": 100}))
+    token_ids = sorted({rel["token_id"] for rel in rels})
+    symbols = {}
+    if token_ids:
+        with ThreadPoolExecutor(min(TOKEN_WORKERS, len(token_ids))) as pool:
+            infos = pool.map(lambda token_id: token_info(get, token_id), token_ids)
+            symbols = {token_id: info["symbol"] for token_id, info in zip(token_ids, infos)}
+    tokens = []
+    for rel in rels:
+        tokens.append({"token_id": rel["token_id"],
+                       "symbol": symbols[rel["token_id"]],
+                       "kyc_status": rel.get("kyc_status"),
+                       "freeze_status": rel.get("freeze_status"),
+                       "balance": rel["balance"]})
+    return {"account": data["account"],
+            "balance": hbar_string(data["balance"]["balance"]),
+            "key": key_string(data.get("key")),
+            "receiver_sig_required": data.get("receiver_sig_required"),
+            "tokens": tokens}
+
+
+def account_balance(get, account_id):
+    data = get("/api/v1/accounts/{}".format(account_id))
+    return {"account": data["account"],
+            "hbars": hbar_string(data["balance"]["balance"]),
+            "tokens": [(t["token_id"], t["balance"]) for t in data["balance"].get("tokens", [])]}
+
+
+def token_info(get, token_id):
+    data = get("/api/v1/tokens/{}".format(token_id))
+    return {"token_id": data["token_id"],
+            "type": data.get("type"),
+            "name": data.get("name"),
+            "symbol": data.get("symbol"),
+            "decimals": int(data.get("decimals", 0)),
+            "total_supply": int(data.get("total_supply", 0)),
+            "max_supply": int(data.get("max_supply", 0)),
+            # not on the mirror node: null without a kyc key, tokens start with kyc revoked
+            "default_kyc_status": False if data.get("kyc_key") else None,
+            "default_freeze_status": data.get("freeze_default"),
+            "expiry": timestamp_string(_ns_to_ts(data.get("expiry_timestamp"))),
+            "auto_renew_account": data.get("auto_renew_account"),
+            "auto_renew_days": (data.get("auto_renew_period") or 0) // 86400,
+            "custom_fees": data.get("custom_fees"),
+            "fee_schedule_key": key_string(data.get("fee_schedule_key")),
+            "kyc_key": key_string(data.get("kyc_key")),
+            "supply_key": key_string(data.get("supply_key")),
+            "wipe_key": key_string(data.get("wipe_key")),
+            "treasury_account_id": data.get("treasury_account_id")}
+
+
+def topic_info(get, topic_id):
+    """without an expiration_timestamp in the response, the expiry is the creation time
+    plus the auto renew period, which holds until the topic is renewed
+    """
+    data = get("/api/v1/topics/{}".format(topic_id))
+    created = data.get("created_timestamp")
+    expires = data.get("expiration_timestamp")
+    if not expires and created:
+        expires = "{}.000000000".format(int(created.partition(".")[0]) + (data.get("auto_renew_period") or 0))
+    last = get("/api/v1/topics/{}/messages".format(topic_id), {"order": "desc", "limit": 1})
+    last = (last.get("messages") or [{}])[0]
+    return {"topic_id": data.get("topic_id", topic_id),
+            "memo": data.get("memo"),
+            "admin_key": key_string(data.get("admin_key")),
+            "submit_key": key_string(data.get("submit_key")),
+            "sequence_number": last.get("sequence_number", 0),
+            "expiry": timestamp_string(expires),
+            "auto_renew_account": data.get("auto_renew_account"),
+            "auto_renew_days": (data.get("auto_renew_period") or 0) // 86400,
+            "running_hash": last.get("running_hash") and base64.b64decode(last["running_hash"]).hex()}
+
+
+def contract_info(get, contract_id):
+    data = get("/api/v1/contracts/{}".format(contract_id))
+    account = get("/api/v1/accounts/{}".format(contract_id))
+    bytecode = data.get("bytecode") or ""
+    return {"account_id": data["contract_id"],
+            "admin_key": key_string(data.get("admin_key")),
+            "expiry": timestamp_string(data.get("expiration_timestamp")),
+            "auto_renew_days": (data.get("auto_renew_period") or 0) // 86400,
+            # bytes of bytecode, the mirror node doesn't report the contract's storage
+            "storage": len(bytecode[2:] if bytecode.startswith("0x") else bytecode) // 2,
+            "memo": data.get("memo"),
+            "balance": hbar_string(account["balance"]["balance"]),
+            "deleted": data.get("deleted")}
+
+
+def _ns_to_ts(ns):
+    "the tokens endpoint gives expiry in nanoseconds"
+    if not ns:
+        return None
+    ns = int(ns)
+    return "{}.{:09d}".format(ns // 1_000_000_000, ns % 1_000_000_000)
+
+
+def prefetch(pages, depth=2):
+    """iterate `pages` (e.g. a paginated listing) in a background thread, keeping up to
+    `depth` pages ready so the next request overlaps processing of the current page
+    """
+    q = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def put(item):
+        # a consumer that stopped early never takes another page, so don't wait on it forever
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=PREFETCH_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run():
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    return
+            put((done, None))
+        except Exception as e:
+            put((done, e))
+
+    producer = threading.Thread(target=run, daemon=True)
+    producer.start()
+    try:
+        while True:
+            page, error = q.get()
+            if error is not None:
+                raise error
+            if page is done:
+                return
+            yield page
+    finally:
+        stop.set()
+        while True:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                break
+        producer.join(PREFETCH_PUT_TIMEOUT)
@@ -0,0 +1,372 @@
+"""Mirror node REST API served from the simulator's ledger, for `hedera-cli --simulate`.
+
+Covers the endpoints the CLI reads: accounts (with tokens and nfts), tokens (with
+balances and nfts), topics (with messages), contracts, transactions and contract
+call estimates, with the mirror node's limit/order/links.next paging and the
+gt/gte/lt/lte/eq filter operators.  Data trails consensus by the simulator's
+mirror_lag_ms.
+"""
+import re
+import json
+import time
+import base64
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+from hedera_cli import simulator
+from hedera_cli.metrics import metrics
+
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 100
+ESTIMATED_GAS = 100_000
+
+_ID = r"(\d+\.\d+\.\d+)"
+_OPS = {"eq": lambda a, b: a == b, "gt": lambda a, b: a > b, "gte": lambda a, b: a >= b,
+        "lt": lambda a, b: a < b, "lte": lambda a, b: a <= b, "ne": lambda a, b: a != b}
+
+
+class NotFound(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _key(key):
+    if key is None:
+        return None
+    if key.kind == simulator.ED25519:
+        return {"_type": "ED25519", "key": key.raw.hex()}
+    return {"_type": "ECDSA_SECP256K1", "key": key.raw.hex()}
+
+
+def _ts(ns):
+    return "{}.{:09d}".format(ns // 1_000_000_000, ns % 1_000_000_000)
+
+
+def _num(text):
+    if not re.match(r"^\d+\.\d+\.\d+$", text):
+        raise BadRequest("Invalid parameter: {}".format(text))
+    return int(text.rsplit(".", 1)[1])
+
+
+def _filters(params, name, convert):
+    "the conditions of a filter parameter, e.g. timestamp=gt:1.2&timestamp=lte:3.4"
+    conds = []
+    for value in params.get(name, []):
+        op, sep, operand = value.partition(":")
+        if not sep:
+            op, operand = "eq", value
+        if op not in _OPS:
+            raise BadRequest("Invalid parameter: {}".format(name))
+        try:
+            conds.append((_OPS[op], convert(operand)))
+        except ValueError:
+            raise BadRequest("Invalid parameter: {}".format(name))
+    return conds
+
+
+def _match(conds, value):
+    return all(op(value, operand) for op, operand in conds)
+
+
+def _timestamp(text):
+    seconds, _, nanos = text.partition(".")
+    return int(seconds) * 1_000_000_000 + int(nanos.ljust(9, "0")[:9] or 0)
+
+
+class Stub:
+    def __init__(self, ledger):
+        self.ledger = ledger
+
+    def visible(self):
+        "consensus time up to which the mirror has caught up"
+        return time.time_ns() - int(self.ledger.config["mirror_lag_ms"] * 1_000_000)
+
+    # paging
+
+    def page(self, path, params, items, key, param, name, parse=int, fmt=str):
+        """order, filter on `param` and limit `items` (`key` gives an item's value of
+        `param`), with the links.next the mirror node gives: the same query with a
+        gt/lt filter past the last item
+        """
+        order = params.get("order", ["asc"])[0]
+        if order not in ("asc", "desc"):
+            raise BadRequest("Invalid parameter: order")
+        try:
+            limit = min(int(params.get("limit", [DEFAULT_LIMIT])[0]), MAX_LIMIT)
+        except ValueError:
+            raise BadRequest("Invalid parameter: limit")
+        conds = _filters(params, param, parse)
+        items = sorted((i for i in items if _match(conds, key(i))), key=key, reverse=order == "desc")
+        nxt = None
+        if len(items) > limit:
+            items = items[:limit]
+            rest = dict(params)
+            rest[param] = [v for v in params.get(param, []) if not v.startswith(("gt", "lt"))]
+            rest[param].append("{}:{}".format("gt" if order == "asc" else "lt", fmt(key(items[-1]))))
+            nxt = "{}?{}".format(path, urlencode(rest, doseq=True))
+        return {name: items, "links": {"next": nxt}}
+
+    # endpoints, called with the ledger lock held
+
+    def account(self, num):
+        led = self.ledger
+        account = led.accounts.get(num)
+        if account is None:
+            raise NotFound()
+        tokens = [{"token_id": "0.0.{}".format(t), "balance": rel["balance"]}
+                  for t, rel in sorted(account["tokens"].items())]
+        return {"account": "0.0.{}".format(num),
+                "alias": None,
+                "auto_renew_period": simulator.AUTO_RENEW,
+                "balance": {"balance": account["balance"], "timestamp": _ts(led.last_ts), "tokens": tokens},
+                "created_timestamp": _ts(account["created"]),
+                "deleted": account["deleted"],
+                "ethereum_nonce": 0,
+                "evm_address": "0x" + num.to_bytes(20, "big").hex(),
+                "expiry_timestamp": None,
+                "key": _key(account["key"]),
+                "max_automatic_token_associations": 0,
+                "memo": account["memo"],
+                "receiver_sig_required": account["receiver_sig_required"]}
+
+    def account_tokens(self, num, path, params):
+        account = self.ledger.accounts.get(num)
+        if account is None:
+            raise NotFound()
+        rels = [{"token_id": "0.0.{}".format(t), "balance": rel["balance"], "automatic_association": False,
+                 "created_timestamp": _ts(rel["created"]), "freeze_status": rel["freeze"],
+                 "kyc_status": rel["kyc"]} for t, rel in account["tokens"].items()]
+        return self.page(path, params, rels, lambda r: _num(r["token_id"]), "token.id", "tokens", _num,
+                         "0.0.{}".format)
+
+    def account_nfts(self, num, path, params):
+        if num not in self.ledger.accounts:
+            raise NotFound()
+        nfts = [self.nft(token, nft) for token in self.ledger.tokens.values() for nft in token["nfts"].values()
+                if nft["owner"] == num and not nft["deleted"]]
+        nfts.sort(key=lambda n: (_num(n["token_id"]), n["serial_number"]), reverse=True)
+        # not paged, an account's NFTs fit in one response here
+        return {"nfts": nfts, "links": {"next": None}}
+
+    def token(self, num):
+        token = self.ledger.tokens.get(num)
+        if token is None:
+            raise NotFound()
+        return {"token_id": "0.0.{}".format(num),
+                "type": str(token["type"]),
+                "name": token["name"],
+                "symbol": token["symbol"],
+                "decimals": str(token["decimals"]),
+                "initial_supply": "0",
+                "total_supply": str(token["total_supply"]),
+                "max_supply": str(token["max_supply"]),
+                "supply_type": "FINITE" if token["max_supply"] else "INFINITE",
+                "treasury_account_id": "0.0.{}".format(token["treasury"]),
+                "admin_key": _key(token["admin_key"]),
+                "kyc_key": _key(token["kyc_key"]),
+                "freeze_key": _key(token["freeze_key"]),
+                "wipe_key": _key(token["wipe_key"]),
+                "supply_key": _key(token["supply_key"]),
+                "fee_schedule_key": _key(token["fee_schedule_key"]),
+                "freeze_default": token["freeze_default"],
+                "memo": token["memo"],
+                "deleted": token["deleted"],
+                "created_timestamp": _ts(token["created"]),
+                "expiry_timestamp": token["expiry"] * 1_000_000_000,
+                "auto_renew_account": str(token["auto_renew_account"]),
+                "auto_renew_period": simulator.AUTO_RENEW,
+                "custom_fees": {"created_timestamp": _ts(token["created"]), "fixed_fees": [],
+                                "fractional_fees": [], "royalty_fees": []}}
+
+    def token_balances(self, num, path, params):
+        token = self.ledger.tokens.get(num)
+        if token is None:
+            raise NotFound()
+        conds = _filters(params, "account.balance", int)
+        rows = [{"account": "0.0.{}".format(a["num"]), "balance": a["tokens"][num]["balance"],
+                 "decimals": token["decimals"]}
+                for a in self.ledger.accounts.values() if num in a["tokens"]]
+        rows = [r for r in rows if _match(conds, r["balance"])]
+        # balances are the current ones, a timestamp filter isn't replayed
+        data = self.page(path, params, rows, lambda r: _num(r["account"]), "account.id", "balances", _num,
+                         "0.0.{}".format)
+        data["timestamp"] = _ts(self.ledger.last_ts)
+        return data
+
+    def nft(self, token, nft):
+        return {"token_id": "0.0.{}".format(token["num"]),
+                "serial_number": nft["serial"],
+                "account_id": None if nft["deleted"] else "0.0.{}".format(nft["owner"]),
+                "created_timestamp": _ts(nft["created"]),
+                "deleted": nft["deleted"],
+                "metadata": base64.b64encode(nft["metadata"]).decode(),
+                "spender": None}
+
+    def token_nfts(self, num, path, params):
+        token = self.ledger.tokens.get(num)
+        if token is None:
+            raise NotFound()
+        owners = _filters(params, "account.id", _num)
+        nfts = [self.nft(token, n) for n in token["nfts"].values()
+                if not n["deleted"] and _match(owners, n["owner"])]
+        params = dict(params)
+        params.setdefault("order", ["desc"])
+        return self.page(path, params, nfts, lambda n: n["serial_number"], "serialnumber", "nfts")
+
+    def topic(self, num):
+        topic = self.ledger.topics.get(num)
+        if topic is None:
+            raise NotFound()
+        return {"topic_id": "0.0.{}".format(num),
+                "memo": topic["memo"],
+                "admin_key": _key(topic["admin_key"]),
+                "submit_key": _key(topic["submit_key"]),
+                "auto_renew_account": topic["auto_renew_account"] and str(topic["auto_renew_account"]),
+                "auto_renew_period": simulator.AUTO_RENEW,
+                "created_timestamp": _ts(topic["created"]),
+                "deleted": topic["deleted"],
+                "timestamp": {"from": _ts(topic["created"]), "to": None}}
+
+    def topic_messages(self, num, path, params, visible):
+        topic = self.ledger.topics.get(num)
+        if topic is None:
+            raise NotFound()
+        messages = [m for m in topic["messages"] if _timestamp(m["consensus_timestamp"]) <= visible]
+        conds = _filters(params, "timestamp", _timestamp)
+        messages = [m for m in messages if _match(conds, _timestamp(m["consensus_timestamp"]))]
+        return self.page(path, params, messages, lambda m: m["sequence_number"], "sequencenumber", "messages")
+
+    def contract(self, num):
+        contract = self.ledger.contracts.get(num)
+        if contract is None:
+            raise NotFound()
+        return {"contract_id": "0.0.{}".format(num),
+                "admin_key": _key(contract["admin_key"]),
+                "auto_renew_period": simulator.AUTO_RENEW,
+                "created_timestamp": _ts(contract["created"]),
+                "deleted": contract["deleted"],
+                "evm_address": "0x" + num.to_bytes(20, "big").hex(),
+                "expiration_timestamp": "{}.000000000".format(contract["expiry"]),
+                "file_id": "0.0.{}".format(contract["file"]),
+                "memo": contract["memo"],
+                "bytecode": "0x" + contract["bytecode"].hex()}
+
+    def transaction(self, txid, visible):
+        record = self.ledger.by_txid.get(txid)
+        if record is None or _timestamp(record["consensus_timestamp"]) > visible:
+            raise NotFound()
+        return {"transactions": [record]}
+
+    def transactions(self, path, params, visible):
+        records = [r for r in self.ledger.records if _timestamp(r["consensus_timestamp"]) <= visible]
+        accounts = _filters(params, "account.id", lambda v: "0.0.{}".format(_num(v)))
+        if accounts:
+            records = [r for r in records if any(
+                _match(accounts, t["account"]) for t in r["transfers"] + r["token_transfers"])
+                or any(_match(accounts, t["sender_account_id"]) or _match(accounts, t["receiver_account_id"])
+                       for t in r["nft_transfers"])]
+        if params.get("transactiontype"):
+            kinds = {v.upper() for v in params["transactiontype"]}
+            records = [r for r in records if r["name"] in kinds]
+        if params.get("result"):
+            want = params["result"][0]
+            records = [r for r in records if (r["result"] == "SUCCESS") == (want == "success")]
+        return self.page(path, params, records, lambda r: _timestamp(r["consensus_timestamp"]), "timestamp",
+                         "transactions", _timestamp, _ts)
+
+    # dispatch
+
+    def get(self, path, params):
+        led = self.ledger
+        with led.lock:
+            led.advance()
+            visible = self.visible()
+            m = re.match(r"^/api/v1/accounts/{}(/tokens|/nfts)?$".format(_ID), path)
+            if m:
+                num = _num(m.group(1))
+                if m.group(2) == "/tokens":
+                    return self.account_tokens(num, path, params)
+                if m.group(2) == "/nfts":
+                    return self.account_nfts(num, path, params)
+                return self.account(num)
+            m = re.match(r"^/api/v1/tokens/{}(/balances|/nfts)?$".format(_ID), path)
+            if m:
+                num = _num(m.group(1))
+                if m.group(2) == "/balances":
+                    return self.token_balances(num, path, params)
+                if m.group(2) == "/nfts":
+                    return self.token_nfts(num, path, params)
+                return self.token(num)
+            m = re.match(r"^/api/v1/topics/{}(/messages)?$".format(_ID), path)
+            if m:
+                if m.group(2):
+                    return self.topic_messages(_num(m.group(1)), path, params, visible)
+                return self.topic(_num(m.group(1)))
+            m = re.match(r"^/api/v1/topics/{}/messages/(\d+)$".format(_ID), path)
+            if m:
+                messages = self.topic_messages(_num(m.group(1)), path,
+                                               {"sequencenumber": [m.group(2)]}, visible)["messages"]
+                if not messages:
+                    raise NotFound()
+                return messages[0]
+            m = re.match(r"^/api/v1/contracts/{}$".format(_ID), path)
+            if m:
+                return self.contract(_num(m.group(1)))
+            m = re.match(r"^/api/v1/transactions/(\d+\.\d+\.\d+-\d+-\d+)$", path)
+            if m:
+                return self.transaction(m.group(1), visible)
+            if path == "/api/v1/transactions":
+                return self.transactions(path, params, visible)
+        raise NotFound()
+
+
+class Handler(BaseHTTPRequestHandler):
+    stub = None
+
+    def reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def error(self, status, message):
+        self.reply(status, {"_status": {"messages": [{"message": message}]}})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        metrics.incr("sim.mirror.requests")
+        try:
+            self.reply(200, self.stub.get(url.path, parse_qs(url.query)))
+        except NotFound:
+            self.error(404, "Not found")
+        except BadRequest as e:
+            self.error(400, str(e))
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/api/v1/contracts/call":
+            return self.error(404, "Not found")
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self.error(400, "Invalid request body")
+        # contract code isn't executed, estimates are a fixed amount
+        self.reply(200, {"result": hex(ESTIMATED_GAS)})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(ledger=None, host="127.0.0.1", port=0):
+    "serve the stub in a daemon thread, returns its base URL"
+    handler = type("StubHandler", (Handler,), {"stub": Stub(ledger or simulator.ledger())})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return "http://{}:{}".format(*server.server_address[:2])
@@ -0,0 +1,134 @@
+import os
+import threading
+
+from colorama import Fore, Style
+from hedera import AccountId, PrivateKey, TransactionId, AccountBalanceQuery
+
+from hedera_cli.entity_id import EntityId, parse, parse_many
+from hedera_cli.metrics import metrics
+
+MIN_HBARS = 10
+STRATEGIES = ("least-loaded", "round-robin")
+
+
+class Payer:
+    __slots__ = ("account_id", "key", "name", "inflight", "submitted", "tinybars", "low")
+
+    def __init__(self, account_id, key):
+        eid = account_id if isinstance(account_id, EntityId) else parse(account_id)
+        self.account_id = eid.to_java(AccountId)
+        self.key = PrivateKey.fromString(key)
+        self.name = self.account_id.toString()
+        self.inflight = 0
+        self.submitted = 0
+        self.tinybars = None
+        self.low = False
+
+
+def read_payers(path, network=None):
+    """accountId,privateKey per line, the format of `account create --count`'s .secret file.
+    The account ids are parsed (and checksums checked against `network`) in one pass,
+    raises ValueError listing the bad lines
+    """
+    numbers, rows = [], []
+    with open(path) as fh:
+        for number, line in enumerate(fh, 1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                numbers.append(number)
+                rows.append(line.split(","))
+    ids, errors = parse_many([row[0] for row in rows], network)
+    errors += [(i, "no private key") for i, row in enumerate(rows) if len(row) < 2]
+    if errors:
+        errors.sort()
+        raise ValueError("{}: {}{}".format(path, ", ".join(
+            "line {}: {}".format(numbers[i], message) for i, message in errors[:5]),
+            " and {} more".format(len(errors) - 5) if len(errors) > 5 else ""))
+    return [(eid, row[1].strip()) for eid, row in zip(ids, rows)]
+
+
+def payers_from_env(network=None):
+    """HEDERA_PAYERS=0.0.1:key,0.0.2:key and/or HEDERA_PAYERS_FILE=path"""
+    payers = []
+    for item in os.environ.get("HEDERA_PAYERS", "").split(","):
+        if ":" in item:
+            account_id, key = item.split(":", 1)
+            payers.append((account_id.strip(), key.strip()))
+    if os.environ.get("HEDERA_PAYERS_FILE"):
+        payers.extend(read_payers(os.environ["HEDERA_PAYERS_FILE"], network))
+    return payers
+
+
+class PayerPool:
+    """Fee paying accounts the scheduler spreads transactions over, so transaction ids
+    don't all come from one payer.  Payers under `min_hbars` are skipped while others are
+    above it and reported by check_balances().
+    """
+
+    def __init__(self, payers=(), strategy=None, min_hbars=None):
+        self.payers = []
+        self.strategy = strategy or os.environ.get("HEDERA_PAYER_STRATEGY", "least-loaded")
+        if self.strategy not in STRATEGIES:
+            print(Fore.RED + "invalid payer strategy {}, must be one of {}, using least-loaded".format(
+                  self.strategy, ", ".join(STRATEGIES)) + Style.RESET_ALL)
+            self.strategy = "least-loaded"
+        if min_hbars is None:
+            min_hbars = float(os.environ.get("HEDERA_PAYER_MIN_HBARS", MIN_HBARS))
+        self.min_tinybars = int(min_hbars * 100_000_000)
+        self.next = 0
+        self.lock = threading.Lock()
+        for account_id, key in payers:
+            self.add(account_id, key)
+
+    def __len__(self):
+        return len(self.payers)
+
+    def add(self, account_id, key):
+        with self.lock:
+            self.payers.append(Payer(account_id, key))
+
+    def acquire(self):
+        with self.lock:
+            candidates = [p for p in self.payers if not p.low] or self.payers
+            if self.strategy == "round-robin":
+                payer = candidates[self.next % len(candidates)]
+                self.next += 1
+            else:
+                payer = min(candidates, key=lambda p: p.inflight)
+            payer.inflight += 1
+            payer.submitted += 1
+        metrics.incr("payer_submitted." + payer.name)
+        return payer
+
+    def release(self, payer):
+        with self.lock:
+            payer.inflight -= 1
+
+    def prepare(self, txn, client):
+        """pay `txn` from a pool account, returns the payer to release() once sent.
+        The SDK adds the operator's signature only to transactions the operator pays, the
+        operator still has to sign for its own transfers and keys
+        """
+        payer = self.acquire()
+        try:
+            (txn.setTransactionId(TransactionId.generate(payer.account_id))
+                .freezeWith(client)
+                .sign(payer.key))
+            if client.getOperatorAccountId() is not None:
+                txn.signWithOperator(client)
+        except Exception:
+            self.release(payer)
+            raise
+        return payer
+
+    def check_balances(self, client):
+        "refresh balances, returns the payers under the minimum"
+        low = []
+        for payer in list(self.payers):
+            balance = AccountBalanceQuery().setAccountId(payer.account_id).execute(client)
+            payer.tinybars = balance.hbars.toTinybars()
+            payer.low = payer.tinybars < self.min_tinybars
+            metrics.gauge("payer_hbars." + payer.name, payer.tinybars / 100_000_000)
+            if payer.low:
+                low.append(payer)
+        return low
@@ -0,0 +1,153 @@
+"""Two phase submission: freeze and sign transactions offline, submit the bytes later.
+
+A batch file has one JSON object per line:
+
+    {"type": "transfer", "to": "0.0.x", "hbars": 1.5}
+    {"type": "transfer", "to": "0.0.x", "token": "0.0.t", "amount": 100}
+    {"type": "mint", "token": "0.0.t", "amount": 100}
+    {"type": "mint", "token": "0.0.t", "metadata": "ipfs://..."}
+    {"type": "message", "topic": "0.0.t", "message": "hello"}
+
+The prepared file has one line per transaction with its id, valid start window
+and the base64 encoded signed bytes.
+"""
+import os
+import json
+import time
+import base64
+import multiprocessing
+
+from hedera_cli.entity_id import parse
+
+MAX_VALID_DURATION = 180  # seconds, network maximum
+TYPES = ("transfer", "mint", "message")
+
+_ctx = {}
+
+
+def _init_worker(operator_id, operator_key, extra_keys, valid_duration):
+    # each worker process starts its own JVM
+    from hedera_cli import simulator
+    simulator.install_in_worker()
+    import hedera
+    from jnius import autoclass
+    _ctx["sdk"] = hedera
+    _ctx["ArrayList"] = autoclass("java.util.ArrayList")
+    _ctx["Instant"] = autoclass("java.time.Instant")
+    _ctx["Duration"] = autoclass("java.time.Duration")
+    _ctx["operator_id"] = hedera.AccountId.fromString(operator_id)
+    _ctx["keys"] = [hedera.PrivateKey.fromString(k) for k in [operator_key] + list(extra_keys)]
+    _ctx["valid_duration"] = valid_duration
+
+
+def build_transaction(spec):
+    sdk = _ctx["sdk"]
+    payer = _ctx["operator_id"]
+    kind = spec["type"]
+    if kind == "transfer":
+        sender = parse(spec["from"]).to_java(sdk.AccountId) if "from" in spec else payer
+        to = parse(spec["to"]).to_java(sdk.AccountId)
+        if "token" in spec:
+            tokenId = parse(spec["token"]).to_java(sdk.TokenId)
+            amount = int(spec["amount"])
+            return (sdk.TransferTransaction()
+                    .addTokenTransfer(tokenId, sender, -amount)
+                    .addTokenTransfer(tokenId, to, amount))
+        amount = sdk.Hbar.fromTinybars(int(float(spec["hbars"]) * 100_000_000))
+        return (sdk.TransferTransaction()
+                .addHbarTransfer(sender, amount.negated())
+                .addHbarTransfer(to, amount))
+    if kind == "mint":
+        txn = sdk.TokenMintTransaction().setTokenId(parse(spec["token"]).to_java(sdk.TokenId))
+        if "metadata" in spec:
+            return txn.addMetadata(spec["metadata"].encode())
+        return txn.setAmount(int(spec["amount"]))
+    if kind == "message":
+        return (sdk.TopicMessageSubmitTransaction()
+                .setTopicId(parse(spec["topic"]).to_java(sdk.TopicId))
+                .setMessage(spec["message"]))
+    raise ValueError("unknown transaction type: {}".format(kind))
+
+
+def sign_one(job):
+    "runs in a worker: returns one prepared line"
+    index, spec, seconds, nanos, node = job
+    sdk = _ctx["sdk"]
+    try:
+        nodes = _ctx["ArrayList"]()
+        nodes.add(parse(node).to_java(sdk.AccountId))
+        txid = sdk.TransactionId.withValidStart(_ctx["operator_id"],
+                                                _ctx["Instant"].ofEpochSecond(seconds, nanos))
+        txn = (build_transaction(spec)
+               .setTransactionId(txid)
+               .setNodeAccountIds(nodes)
+               .setTransactionValidDuration(_ctx["Duration"].ofSeconds(_ctx["valid_duration"]))
+               .freeze())
+        for key in _ctx["keys"]:
+            txn = txn.sign(key)
+        return {"index": index,
+                "type": spec["type"],
+                "transaction_id": txid.toString(),
+                "valid_start": "{}.{:09d}".format(seconds, nanos),
+                "valid_until": seconds + _ctx["valid_duration"],
+                "bytes": base64.b64encode(bytes(txn.toBytes().tostring())).decode()}
+    except Exception as e:
+        return {"index": index, "type": spec.get("type"), "error": str(e)}
+
+
+def _jobs(batch_path, start, nodes):
+    with open(batch_path) as fh:
+        index = 0
+        for line in fh:
+            if not line.strip():
+                continue
+            # distinct valid start per transaction, so ids never collide
+            yield (index, json.loads(line), start, index % 1_000_000_000, nodes[index % len(nodes)])
+            index += 1
+
+
+def prepare(batch_path, out_path, operator_id, operator_key, nodes, extra_keys=(),
+            start_in=0, valid_duration=MAX_VALID_DURATION, workers=None, progress=None):
+    """freeze and sign every line of `batch_path` on a process pool, streaming the
+    results into `out_path` in input order.  Transactions become valid `start_in`
+    seconds from now and stay valid for `valid_duration` seconds.
+    returns (prepared, failed, seconds)
+    """
+    workers = workers or os.cpu_count() or 1
+    ctx = multiprocessing.get_context("spawn")
+    begin = time.time()
+    start = int(begin) + int(start_in)
+    prepared = failed = 0
+    with ctx.Pool(workers, initializer=_init_worker,
+                  initargs=(operator_id, operator_key, list(extra_keys), valid_duration)) as pool, \
+            open(out_path, "w") as out:
+        for res in pool.imap(sign_one, _jobs(batch_path, start, nodes), chunksize=64):
+            if "error" in res:
+                failed += 1
+            else:
+                prepared += 1
+            out.write(json.dumps(res) + "\n")
+            if progress:
+                progress(prepared, failed, time.time() - begin)
+    return prepared, failed, time.time() - begin
+
+
+def read_prepared(path, waiting=None):
+    """yield the prepared lines, expired ones with an error.  A line whose valid start
+    is still ahead (prepared with start_in) is held back until it's valid, `waiting`
+    is called with the seconds to wait first
+    """
+    with open(path) as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "error" not in item:
+                ahead = float(item["valid_start"]) - time.time()
+                if ahead > 0:
+                    if waiting:
+                        waiting(ahead)
+                    time.sleep(ahead)
+                if item["valid_until"] < time.time():
+                    item["error"] = "expired at {}".format(item["valid_until"])
+            yield item
@@ -1,9 +1,16 @@
-import requests
-import json
+import os
+
+from hedera_cli import httpcache
+
+PRICE_TTL = 60
 
 
 def get_Hbar_price(others=False):
     "doc: https://www.coingecko.com/api/documentations/v3#/"
+    if os.environ.get("HEDERA_HBAR_PRICE"):
+        # a fixed USD price, e.g. for the simulator
+        usd = float(os.environ["HEDERA_HBAR_PRICE"])
+        return {"usd": usd} if others else usd
     url = 'https://api.coingecko.com/api/v3/coins/hedera-hashgraph'
     params = {'localization': 'en',
               'tickers': 'false',
@@ -11,7 +18,7 @@ def get_Hbar_price(others=False):
               'community_data': 'false',
               'developer_data': 'false',
               'sparkline': 'false'}
-    r = requests.get(url, params=params)
+    r = httpcache.session().get(url, params=params, ttl=PRICE_TTL)
     data = r.json()
     if others:
         return data['market_data']['current_price']
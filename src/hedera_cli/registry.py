@@ -0,0 +1,79 @@
+from hedera_cli import abi
+from hedera_cli.store import data_path, load_json, save_json
+
+
+class CompiledAbi:
+    "functions of one contract, indexed by name, signature and selector"
+
+    def __init__(self, name, abi_entries, selectors=None):
+        selectors = selectors or {}
+        self.name = name
+        self.abi = abi_entries
+        self.by_name = {}
+        self.by_signature = {}
+        self.by_selector = {}
+        for entry in abi_entries:
+            if entry.get("type", "function") != "function":
+                continue
+            selector = selectors.get(abi.signature_of(entry))
+            # reuse the persisted selector instead of hashing again
+            func = abi.Function(entry, selector and bytes.fromhex(selector))
+            # first one wins for overloaded names, use the signature to pick another one
+            self.by_name.setdefault(func.name, func)
+            self.by_signature[func.signature] = func
+            self.by_selector[func.selector] = func
+        self.constructor = abi.constructor(abi_entries)
+
+    def function(self, name):
+        return self.by_signature.get(name) or self.by_name.get(name)
+
+    def selectors(self):
+        return {sig: f.selector.hex() for sig, f in self.by_signature.items()}
+
+
+class ContractRegistry:
+    """Remembers which ABI belongs to which deployed contract, per network.
+    stored in ~/.hedera-cli/contracts.json, compiled lazily and kept in memory.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or data_path("contracts.json")
+        self.entries = load_json(self.path, {})
+        self.compiled = {}
+
+    def register(self, network, contract_id, name, abi_entries):
+        contract_id = contract_id.split("-")[0]
+        compiled = CompiledAbi(name, abi_entries)
+        self.compiled[(network, contract_id)] = compiled
+        self.entries.setdefault(network, {})[contract_id] = {
+            "name": name,
+            "abi": abi_entries,
+            "selectors": compiled.selectors(),
+            }
+        save_json(self.path, self.entries)
+        return compiled
+
+    def get(self, network, contract_id):
+        contract_id = contract_id.split("-")[0]
+        key = (network, contract_id)
+        if key not in self.compiled:
+            entry = self.entries.get(network, {}).get(contract_id)
+            if entry is None:
+                return None
+            self.compiled[key] = CompiledAbi(entry["name"], entry["abi"], entry.get("selectors"))
+        return self.compiled[key]
+
+    def contract_ids(self, network):
+        return list(self.entries.get(network, {}))
+
+    def function_names(self, network, contract_id):
+        compiled = self.get(network, contract_id)
+        return list(compiled.by_name) if compiled else []
+
+    def decode_call(self, network, contract_id, data):
+        "find the function of a call data by its selector and decode the arguments"
+        compiled = self.get(network, contract_id)
+        func = compiled and compiled.by_selector.get(bytes(data[:4]))
+        if func is None:
+            return None, None
+        return func, abi.decode(func.inputs, bytes(data[4:]))
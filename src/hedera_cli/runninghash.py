@@ -0,0 +1,160 @@
+"""Verify the running hash chain of an HCS topic.
+
+Each message's running hash (version 3) is
+
+    SHA384(previous running hash || version || payer shard, realm, num ||
+           topic shard, realm, num || consensus seconds || consensus nanos ||
+           sequence number || SHA384(message))
+
+with longs and the nanos int big endian, and 48 zero bytes before message 1.
+Since every message carries its own running hash, each link only needs the previous
+message's stored hash, so chunks of the chain are checked on a process pool while the
+messages are still being downloaded.  A broken link, a gap in the sequence numbers or
+a hash version other than 3 ends the verification.
+"""
+import os
+import json
+import time
+import base64
+import struct
+import hashlib
+import multiprocessing
+from collections import deque
+
+from hedera_cli.entity_id import parse
+
+HASH_VERSION = 3
+HASH_SIZE = 48
+CHUNK_SIZE = 2000
+
+_LINK = struct.Struct(">qqqqqqqqiq")
+
+
+def link_hash(prev, topic, payer, seconds, nanos, seq, message):
+    "running hash of one message given the previous one"
+    digest = hashlib.sha384(message).digest()
+    data = _LINK.pack(HASH_VERSION, *payer, *topic, seconds, nanos, seq)
+    return hashlib.sha384(prev + data + digest).digest()
+
+
+def verify_chunk(job):
+    """runs in a worker: decode and check consecutive links, returns (sequence number of
+    the first bad link or None, links checked, message bytes)
+    """
+    topic, prev, links = job
+    size = 0
+    for count, link in enumerate(links):
+        seq, payer, seconds, nanos, message, expected = _decode(link)
+        size += len(message)
+        if link_hash(prev, topic, payer, seconds, nanos, seq, message) != expected:
+            return seq, count, size
+        prev = expected
+    return None, len(links), size
+
+
+def read_export(path):
+    """messages of a local export: one mirror node message object per line (what
+    `topic get --out` writes), or a saved mirror node page with a "messages" list
+    """
+    with open(path) as fh:
+        first = fh.readline()
+        fh.seek(0)
+        if first.strip() in ("{", "[") or '"messages"' in first:
+            data = json.load(fh)
+            yield from data["messages"] if isinstance(data, dict) else data
+            return
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _decode(link):
+    seq, payer, timestamp, message, running_hash = link
+    seconds, _, nanos = timestamp.partition(".")
+    return (seq,
+            parse(payer).key(),
+            int(seconds),
+            int(nanos.ljust(9, "0")),
+            base64.b64decode(message),
+            base64.b64decode(running_hash))
+
+
+def verify(messages, topic_id, workers=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Check the chain of `messages` (mirror node message objects, ascending sequence
+    numbers).  A chain that doesn't start at message 1 is anchored on its first message's
+    stored hash.  returns a dict with checked, first, last, anchored, break (None or
+    (sequence number, reason)), bytes and seconds
+    """
+    workers = workers or os.cpu_count() or 1
+    topic = parse(topic_id).key()
+    result = {"checked": 0, "first": None, "last": None, "anchored": False,
+              "break": None, "bytes": 0, "seconds": 0.0}
+    start = time.time()
+    pool = None
+    if workers > 1:
+        # the JVM doesn't survive fork, workers must be spawned
+        pool = multiprocessing.get_context("spawn").Pool(workers)
+    pending = deque()
+
+    def collect(res):
+        bad, count, size = res.get() if pool else res
+        result["checked"] += count
+        result["bytes"] += size
+        if bad is not None and result["break"] is None:
+            result["break"] = (bad, "running hash mismatch")
+        if progress:
+            progress(result["checked"], time.time() - start)
+
+    def dispatch(chunk_prev, chunk):
+        job = (topic, chunk_prev, chunk)
+        if pool is None:
+            collect(verify_chunk(job))
+            return
+        pending.append(pool.apply_async(verify_chunk, (job,)))
+        while len(pending) >= workers * 2:
+            collect(pending.popleft())
+
+    try:
+        chunk_prev = None
+        chunk = []
+        gap = None
+        for msg in messages:
+            seq = msg["sequence_number"]
+            if result["first"] is None:
+                result["first"] = seq
+                if seq != 1:
+                    # can't check the first link without the message before it
+                    result["anchored"] = True
+                    chunk_prev = base64.b64decode(msg["running_hash"])
+                    result["last"] = seq
+                    continue
+                chunk_prev = bytes(HASH_SIZE)
+            last = result["last"]
+            if last is not None and seq != last + 1:
+                reason = ("missing messages {}..{}".format(last + 1, seq - 1) if seq > last + 1
+                          else "sequence number {} out of order".format(seq))
+                gap = (last + 1, reason)
+                break
+            if msg.get("running_hash_version", HASH_VERSION) != HASH_VERSION:
+                gap = (seq, "unsupported running hash version {}".format(msg["running_hash_version"]))
+                break
+            # decoding is left to the workers, the main process only walks the sequence
+            chunk.append((seq, msg["payer_account_id"], msg["consensus_timestamp"],
+                          msg["message"], msg["running_hash"]))
+            result["last"] = seq
+            if len(chunk) >= chunk_size:
+                dispatch(chunk_prev, chunk)
+                chunk_prev, chunk = base64.b64decode(msg["running_hash"]), []
+            if result["break"] is not None:
+                break
+        if chunk and result["break"] is None:
+            dispatch(chunk_prev, chunk)
+        while pending:
+            collect(pending.popleft())
+        if result["break"] is None and gap is not None:
+            result["break"] = gap
+    finally:
+        if pool:
+            pool.terminate()
+    result["seconds"] = time.time() - start
+    return result
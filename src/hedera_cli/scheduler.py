@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import time
+import random
+import threading
+
+from hedera_cli.metrics import metrics
+
+# starting rates (transactions per second) from the published network throttles,
+# HEDERA_THROTTLES='{"TransferTransaction": 50}' overrides them
+THROTTLES = {
+    "TransferTransaction": 10000,
+    "AccountCreateTransaction": 2,
+    "AccountDeleteTransaction": 100,
+    "TopicCreateTransaction": 5,
+    "TopicMessageSubmitTransaction": 10000,
+    "TokenCreateTransaction": 100,
+    "TokenMintTransaction": 3000,
+    "TokenBurnTransaction": 3000,
+    "TokenWipeTransaction": 3000,
+    "TokenAssociateTransaction": 100,
+    "TokenGrantKycTransaction": 100,
+    "FileCreateTransaction": 10,
+    "FileAppendTransaction": 10,
+    "FileDeleteTransaction": 10,
+    "ContractCreateTransaction": 350,
+    "ContractExecuteTransaction": 350,
+    }
+DEFAULT_THROTTLE = 100
+
+RETRY_STATUSES = ("BUSY", "PLATFORM_TRANSACTION_NOT_CREATED", "PLATFORM_NOT_ACTIVE")
+MAX_RETRIES = 8
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 8.0
+
+
+_STATUS_RE = re.compile(r"status `?([A-Z_]+)")
+
+
+def status_name(error):
+    "the response code a precheck exception reports, e.g. INVALID_SIGNATURE"
+    m = _STATUS_RE.search(str(getattr(error, "innermessage", "") or "") + " " + str(error))
+    return m.group(1) if m else "PRECHECK_FAILED"
+
+
+def throttles():
+    table = dict(THROTTLES)
+    if os.environ.get("HEDERA_THROTTLES"):
+        table.update(json.loads(os.environ["HEDERA_THROTTLES"]))
+    return table
+
+
+def is_retryable(error):
+    text = str(getattr(error, "innermessage", "") or "") + str(error)
+    return any(status in text for status in RETRY_STATUSES)
+
+
+class RetryLater(Exception):
+    "the network is busy, the transaction should be sent again with a new id"
+
+
+class TokenBucket:
+    """Token bucket with AIMD rate adaptation: every success adds a little to the rate
+    (about 2% of the ceiling per second), a BUSY halves it, at most once per second so a
+    burst of BUSY answers to the same overload counts as one.
+    """
+
+    def __init__(self, rate, floor=0.5):
+        self.ceiling = float(rate)
+        self.floor = min(floor, self.ceiling)
+        self.rate = self.ceiling
+        self.tokens = 1.0
+        self.last = time.monotonic()
+        self.last_decrease = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                # burst capacity of one second worth of tokens
+                self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.ceiling, self.rate + self.ceiling * 0.02 / self.rate)
+
+    def on_busy(self):
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_decrease >= 1.0:
+                self.rate = max(self.floor, self.rate / 2)
+                self.tokens = 0.0
+                self.last_decrease = now
+
+
+class Scheduler:
+    """Every transaction submission goes through here.
+
+    submit() takes a function building the transaction rather than the transaction
+    itself, so that a retry after BUSY is a new transaction with a fresh transaction id.
+    With a journal, each transaction is frozen and recorded before it is sent.  With a
+    payer pool, transactions that aren't frozen yet are paid by a pool account.
+    """
+
+    def __init__(self, get_client, max_retries=MAX_RETRIES, get_journal=None, get_pool=None):
+        self.get_client = get_client
+        self.get_journal = get_journal or (lambda: None)
+        self.get_pool = get_pool or (lambda: None)
+        self.max_retries = max_retries
+        self.table = throttles()
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, kind):
+        with self.lock:
+            if kind not in self.buckets:
+                self.buckets[kind] = TokenBucket(self.table.get(kind, DEFAULT_THROTTLE))
+            return self.buckets[kind]
+
+    def submit(self, build, params=None, key=None, journal=None, until=None):
+        """send the transaction build() returns, `params` and the idempotency `key`
+        are recorded in the journal, `journal` if the session has none.  With `until`
+        (epoch seconds, the end of the transaction's valid window) BUSY is retried until
+        then instead of max_retries times, for signed bytes that are sent again as they are
+        """
+        attempt = 0
+        journal = self.get_journal() or journal
+        pool = self.get_pool()
+        while True:
+            txn = build()
+            kind = txn.getClass().getSimpleName()
+            payer = None
+            if pool and not txn.isFrozen():
+                payer = pool.prepare(txn, self.get_client())
+            try:
+                return self._send(txn, kind, journal, params, key)
+            except RetryLater as e:
+                error = e.args[0]
+                if until is None and attempt >= self.max_retries:
+                    metrics.incr("failed." + kind)
+                    raise error
+            finally:
+                if payer:
+                    pool.release(payer)
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+            if until is not None:
+                delay = min(delay, until - time.time())
+                if delay <= 0:
+                    metrics.incr("failed." + kind)
+                    raise error
+            time.sleep(random.uniform(delay / 2, delay))
+            attempt += 1
+
+    def _send(self, txn, kind, journal, params, key):
+        txid = None
+        if journal is not None:
+            if not txn.isFrozen():
+                txn.freezeWith(self.get_client())
+            txid = txn.getTransactionId().toString()
+            journal.submitted(txid, kind, params, key)
+        bucket = self.bucket(kind)
+        metrics.add_gauge("queue_depth." + kind, 1)
+        try:
+            bucket.acquire()
+        finally:
+            metrics.add_gauge("queue_depth." + kind, -1)
+        start = time.monotonic()
+        try:
+            resp = txn.execute(self.get_client())
+        except Exception as e:
+            if txid and (is_retryable(e) or "PrecheckStatusException" in str(e)) \
+                    and status_name(e) != "DUPLICATE_TRANSACTION":
+                # failed precheck, never reached consensus.  other errors (timeouts), and
+                # a duplicate of an earlier send, stay pending for the journal's reconciler
+                journal.outcome(txid, status_name(e))
+            if not is_retryable(e):
+                metrics.incr("failed." + kind)
+                raise
+            bucket.on_busy()
+            metrics.incr("busy." + kind)
+            metrics.gauge("rate." + kind, bucket.rate)
+            raise RetryLater(e)
+        bucket.on_success()
+        metrics.incr("submitted." + kind)
+        metrics.gauge("rate." + kind, bucket.rate)
+        metrics.observe("submit." + kind, time.monotonic() - start)
+        return resp
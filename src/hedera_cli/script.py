@@ -0,0 +1,285 @@
+"""Run a file of hedera-cli commands: `hedera-cli --script ops.hcli [--jobs N]`.
+
+One command per line, # starts a comment.  Prompts are answered with options named
+in each command's help (`send --to 0.0.1234 --amount 5`, `token create --name Gold
+--symbol GLD --yes`), a missing answer fails the line instead of waiting for input.
+
+    $gold = token create --name Gold --symbol GLD --decimals 2 --initial-supply 1000 --yes
+    $alice = account create --initial-hbars 10
+    token kyc $gold $alice
+
+`$name = command` keeps the command's result, the id it created (or the transaction
+id, sequence number, ... it reports), or else the last line it printed, and `$name`
+is replaced by it in later lines.
+
+Lines run concurrently on `jobs` threads unless they depend on each other: a line
+waits for the line that sets a variable it uses and for the previous line using the
+same variable or literal entity id.  setup, network, consistency, payers, journal,
+cache and metrics wait for every line before them and hold up every line after
+them, and so does a line with just `wait`.  A line that fails (or a `$name =` line
+without a result) skips the lines using its variable and, for setup and the like,
+every line after it.  Output is printed in line order and a timing table closes
+the run.
+"""
+import re
+import sys
+import time
+import shlex
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from colorama import Fore, Style
+
+DEFAULT_JOBS = 8
+# commands that change or read the session's shared state
+BARRIERS = ("setup", "network", "consistency", "payers", "journal", "cache", "metrics", "wait")
+
+_ASSIGN_RE = re.compile(r"^\$([A-Za-z_]\w*)\s*=\s*(.+)$")
+_VAR_RE = re.compile(r"\$\{?([A-Za-z_]\w*)\}?")
+_ENTITY_RE = re.compile(r"\b\d+\.\d+\.\d+\b")
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+# options that take no value
+ANSWER_FLAGS = ("yes", "force")
+# options whose values are never printed
+SECRET_OPTIONS = ("private-key", "passphrase")
+_SECRET_RE = re.compile(r"(--(?:{})\s+)(\"[^\"]*\"|'[^']*'|\S+)".format("|".join(SECRET_OPTIONS)))
+
+
+class MissingAnswer(Exception):
+    "a prompt with no answer on the command line, in a script"
+
+
+def masked(text):
+    "a command line with the values of secret options replaced by ***"
+    return _SECRET_RE.sub(r"\1***", text)
+
+
+def parse_answers(line):
+    """the `--name value` options of a command line, with shell quoting, they answer
+    the command's prompts
+    """
+    try:
+        words = shlex.split(line)
+    except ValueError:
+        words = line.split()
+    answers = {}
+    i = 0
+    while i < len(words):
+        if words[i].startswith("--"):
+            name = words[i][2:]
+            if name in ANSWER_FLAGS or i + 1 == len(words) or words[i + 1].startswith("--"):
+                answers[name] = True
+            else:
+                answers[name] = words[i + 1]
+                i += 1
+        i += 1
+    return answers
+
+
+def positional_args(line):
+    """the words of a command line without its `--name value` options, quoted words
+    stay together (with their quotes)
+    """
+    try:
+        words = shlex.split(line, posix=False)
+    except ValueError:
+        words = line.split()
+    positional = []
+    skip = False
+    for i, word in enumerate(words):
+        if skip:
+            skip = False
+        elif word.startswith("--"):
+            skip = word[2:] not in ANSWER_FLAGS and i + 1 < len(words) and not words[i + 1].startswith("--")
+        else:
+            positional.append(word)
+    return positional
+
+
+class Line:
+    __slots__ = ("number", "text", "command", "var", "uses", "deps", "after", "barrier",
+                 "status", "start", "seconds", "output", "error")
+
+    def __init__(self, number, text):
+        self.number = number
+        self.text = text
+        m = _ASSIGN_RE.match(text)
+        self.var, self.command = (m.group(1), m.group(2).strip()) if m else (None, text)
+        self.uses = set(_VAR_RE.findall(self.command))
+        # lines that must succeed first, lines that must only be done first
+        self.deps = set()
+        self.after = set()
+        self.barrier = self.command.split()[0] in BARRIERS
+        self.status = None
+        self.start = 0.0
+        self.seconds = 0.0
+        self.output = ""
+        self.error = None
+
+
+def parse(text):
+    "the command lines of a script, up to an `exit`"
+    lines = []
+    for number, raw in enumerate(text.splitlines(), 1):
+        stripped = raw.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped in ("exit", "quit"):
+            break
+        lines.append(Line(number, stripped))
+    return lines
+
+
+def plan(lines):
+    """fill in each line's dependencies, the indexes of the lines it has to wait for.
+    raises ValueError for a variable used before it is set
+    """
+    defined = {}
+    last_use = {}
+    barrier = None
+    since_barrier = []
+    for i, line in enumerate(lines):
+        if line.barrier:
+            line.after.update(since_barrier)
+            if barrier is not None:
+                line.after.add(barrier)
+            barrier, since_barrier = i, []
+            continue
+        if barrier is not None:
+            line.deps.add(barrier)
+        for var in line.uses:
+            if var not in defined:
+                raise ValueError("line {}: ${} is used before it is set".format(line.number, var))
+            line.deps.add(defined[var])
+        resources = {"$" + v for v in line.uses} | set(_ENTITY_RE.findall(line.command))
+        if line.var:
+            resources.add("$" + line.var)
+        for res in resources:
+            if res in last_use:
+                line.after.add(last_use[res])
+            last_use[res] = i
+        if line.var:
+            defined[line.var] = i
+        since_barrier.append(i)
+    return lines
+
+
+class ThreadOutput:
+    """stands in for sys.stdout: what a thread prints while running a script line goes
+    to that line's buffer
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def capture(self):
+        self.local.buffer = []
+
+    def release(self):
+        text = "".join(self.local.buffer)
+        self.local.buffer = None
+        return text
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            return self.stream.write(text)
+        buffer.append(text)
+        return len(text)
+
+    def flush(self):
+        if getattr(self.local, "buffer", None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def last_line(text):
+    for line in reversed(_ANSI_RE.sub("", text).splitlines()):
+        if line.strip():
+            return line.strip()
+    return None
+
+
+def run(cli, text, jobs=DEFAULT_JOBS):
+    """run the commands in `text` on `cli`, returns the number of lines that failed or
+    were skipped
+    """
+    lines = plan(parse(text))
+    values = {}
+    lock = threading.Lock()
+    out = ThreadOutput(sys.stdout)
+    started = time.time()
+
+    def substitute(command):
+        with lock:
+            return _VAR_RE.sub(lambda m: values[m.group(1)], command)
+
+    def execute(i, futures):
+        line = lines[i]
+        for d in sorted(line.deps | line.after):
+            if futures[d].result().status != "ok" and d in line.deps:
+                line.status = "skipped"
+                line.error = "line {} didn't succeed".format(lines[d].number)
+                return line
+        line.start = time.time() - started
+        out.capture()
+        try:
+            if line.command.split()[0] != "wait":
+                ok, result, line.error = cli.run_scripted(substitute(line.command))
+            else:
+                ok, result = True, None
+        finally:
+            line.output = out.release()
+        line.seconds = time.time() - started - line.start
+        if ok and line.var:
+            result = result if result is not None else last_line(line.output)
+            if result is None:
+                ok, line.error = False, "no result for ${}".format(line.var)
+            else:
+                with lock:
+                    values[line.var] = result
+        line.status = "ok" if ok else "failed"
+        return line
+
+    sys.stdout = out
+    try:
+        futures = []
+        with ThreadPoolExecutor(max(1, jobs)) as pool:
+            # lines are started in order, so whatever a line waits for is already running
+            for i in range(len(lines)):
+                futures.append(pool.submit(execute, i, futures))
+            for future in futures:
+                report_line(out.stream, future.result())
+    finally:
+        sys.stdout = out.stream
+    summary(lines, time.time() - started)
+    return sum(1 for line in lines if line.status != "ok")
+
+
+def report_line(stream, line):
+    color = {"ok": Fore.GREEN, "failed": Fore.RED}.get(line.status, Fore.YELLOW)
+    stream.write("{}[{}] {}{}\n".format(color, line.number, masked(line.text), Style.RESET_ALL))
+    if line.output:
+        stream.write(line.output if line.output.endswith("\n") else line.output + "\n")
+    if line.error and line.status != "ok":
+        stream.write("{}{}: {}{}\n".format(color, line.status, line.error, Style.RESET_ALL))
+    stream.flush()
+
+
+def summary(lines, elapsed):
+    print()
+    print("{:>5}  {:8} {:>8} {:>8}  {}".format("line", "status", "start", "seconds", "command"))
+    for line in lines:
+        text = masked(line.text)
+        print("{:>5}  {:8} {:>8.3f} {:>8.3f}  {}".format(
+              line.number, line.status, line.start, line.seconds,
+              text if len(text) <= 60 else text[:57] + "..."))
+    busy = sum(line.seconds for line in lines)
+    counts = {s: sum(1 for line in lines if line.status == s) for s in ("ok", "failed", "skipped")}
+    print("{} lines: {ok} ok, {failed} failed, {skipped} skipped in {:.2f}s "
+          "({:.2f}s of commands, {:.1f}x overlap)".format(len(lines), elapsed, busy, busy / max(elapsed, 1e-6),
+                                                       **counts))
@@ -0,0 +1,127 @@
+"""Sets of NFT serial numbers kept as sorted, disjoint ranges.
+
+`1-5000,7000-7100` is two ranges however many serials it covers, so parsing,
+counting, intersecting and splitting into transaction sized batches cost as much
+as the number of ranges, not serials.  Only the batches being submitted are
+expanded to individual serials.
+"""
+# serials a single TokenBurnTransaction or TokenWipeTransaction takes
+MAX_BATCH = 10
+
+
+class SerialSet:
+    def __init__(self, ranges=()):
+        "`ranges` of (first, last) serials, in any order, may overlap"
+        self.starts = []
+        self.ends = []
+        for lo, hi in sorted(ranges):
+            if lo < 1 or hi < lo:
+                raise ValueError("invalid serial range {}-{}".format(lo, hi))
+            if self.ends and lo <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], hi)
+            else:
+                self.starts.append(lo)
+                self.ends.append(hi)
+
+    @classmethod
+    def parse(cls, text):
+        "serials and first-last ranges separated by commas, spaces or new lines"
+        ranges = []
+        for part in text.replace(",", " ").split():
+            lo, sep, hi = part.partition("-")
+            try:
+                ranges.append((int(lo), int(hi) if sep else int(lo)))
+            except ValueError:
+                raise ValueError("invalid serial number or range: {}".format(part))
+        return cls(ranges)
+
+    @classmethod
+    def read(cls, path):
+        "the serials in a file, in the format `parse` takes, # starts a comment"
+        with open(path) as fh:
+            return cls.parse(" ".join(line.split("#")[0] for line in fh))
+
+    @classmethod
+    def from_sorted(cls, serials):
+        "from ascending serial numbers, e.g. streamed from the mirror node"
+        s = cls()
+        for n in serials:
+            if s.ends and n <= s.ends[-1] + 1:
+                s.ends[-1] = max(s.ends[-1], n)
+            else:
+                s.starts.append(n)
+                s.ends.append(n)
+        return s
+
+    def __len__(self):
+        return sum(hi - lo + 1 for lo, hi in zip(self.starts, self.ends))
+
+    def __bool__(self):
+        return bool(self.starts)
+
+    def __iter__(self):
+        for lo, hi in zip(self.starts, self.ends):
+            yield from range(lo, hi + 1)
+
+    def first(self):
+        return self.starts[0] if self.starts else None
+
+    def last(self):
+        return self.ends[-1] if self.ends else None
+
+    def __and__(self, other):
+        "serials in both sets, walking the two range lists once"
+        out = SerialSet()
+        i = j = 0
+        while i < len(self.starts) and j < len(other.starts):
+            lo = max(self.starts[i], other.starts[j])
+            hi = min(self.ends[i], other.ends[j])
+            if lo <= hi:
+                out.starts.append(lo)
+                out.ends.append(hi)
+            if self.ends[i] < other.ends[j]:
+                i += 1
+            else:
+                j += 1
+        return out
+
+    def __sub__(self, other):
+        "serials in this set but not in `other`"
+        out = SerialSet()
+        j = 0
+        for lo, hi in zip(self.starts, self.ends):
+            while j < len(other.starts) and other.ends[j] < lo:
+                j += 1
+            k = j
+            while lo <= hi and k < len(other.starts) and other.starts[k] <= hi:
+                if other.starts[k] > lo:
+                    out.starts.append(lo)
+                    out.ends.append(other.starts[k] - 1)
+                lo = max(lo, other.ends[k] + 1)
+                k += 1
+            if lo <= hi:
+                out.starts.append(lo)
+                out.ends.append(hi)
+        return out
+
+    def batches(self, size=MAX_BATCH):
+        "lists of at most `size` serials, every one full but the last"
+        batch = []
+        for lo, hi in zip(self.starts, self.ends):
+            while lo <= hi:
+                take = min(size - len(batch), hi - lo + 1)
+                batch.extend(range(lo, lo + take))
+                lo += take
+                if len(batch) == size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def __str__(self):
+        return ",".join(str(lo) if lo == hi else "{}-{}".format(lo, hi) for lo, hi in zip(self.starts, self.ends))
+
+
+def describe(serials):
+    "a batch as ranges, for messages"
+    return str(SerialSet.from_sorted(sorted(serials)))
@@ -0,0 +1,1927 @@
+"""In-process stand-in for the part of the hedera SDK the CLI uses, for load testing.
+
+`hedera-cli --simulate` installs this module as `hedera` (and a small `jnius`) before
+the CLI is imported and serves the "simulator" network's mirror node from mirrorstub,
+so every command runs against a local ledger: no JVM, no network, no hbars.
+
+The ledger applies transactions in consensus order with the network's checks
+(signatures, balances, associations, KYC, supply and wipe keys, NFT ownership, batch
+limits), charges fees to the payer and keeps records and topic messages (with real
+running hashes) for the mirror stub.  It is tuned with a JSON config, a file given to
+--sim-config or HEDERA_SIM_CONFIG (a path or inline JSON):
+
+    seed            random seed, default 0
+    latency_ms      precheck round trip, default 20
+    consensus_ms    submission to consensus, default 500
+    query_ms        query round trip, default 20
+    jitter          lognormal sigma applied to every latency, default 0.3
+    throttles       {"TransferTransaction": 100, ...} per second, defaults to the
+                    network's (scheduler.throttles()), over the limit answers BUSY
+    busy_rate       fraction of submissions answered BUSY on top of the throttles
+    fail_rate       fraction of transactions failing at consensus with fail_status
+    fail_status     default FAIL_INVALID
+    fees            {"TransferTransaction": tinybars, ...} on top of FEES
+    mirror_lag_ms   how far records and messages on the mirror stub trail consensus
+    operator_hbars  starting balance of the operator, default 1,000,000
+    types           {"TokenMintTransaction": {"busy_rate": .., "fail_rate": ..,
+                    "fail_status": .., "latency_ms": .., "consensus_ms": ..}}
+
+Random draws are made from the seed, the transaction type and how many transactions
+of that type came before, so the n-th TokenMintTransaction of a run always gets the
+same latencies and injected outcome.  Generated keys are the exception, they come from
+os.urandom since keystore workers generate them in parallel.
+"""
+import os
+import sys
+import json
+import math
+import time
+import types
+import heapq
+import base64
+import random
+import hashlib
+import tempfile
+import threading
+from collections import defaultdict
+
+from hedera_cli import runninghash
+from hedera_cli.entity_id import parse
+from hedera_cli.journal import mirror_txid
+from hedera_cli.keystore import PRIVATE_PREFIX, PUBLIC_PREFIX, PUBLIC_SIZE, ED25519, ECDSA
+from hedera_cli.metrics import metrics
+from hedera_cli.mirror import hbar_string, timestamp_string
+from hedera_cli.scheduler import throttles
+
+NETWORK = "simulator"
+
+DEFAULTS = {
+    "seed": 0,
+    "latency_ms": 20,
+    "consensus_ms": 500,
+    "query_ms": 20,
+    "jitter": 0.3,
+    "throttles": {},
+    "busy_rate": 0.0,
+    "fail_rate": 0.0,
+    "fail_status": "FAIL_INVALID",
+    "fees": {},
+    "mirror_lag_ms": 0,
+    "operator_hbars": 1_000_000,
+    "types": {},
+    }
+
+# rough network fees in tinybars (at about $0.05 per hbar), per transaction or per
+# unit: per NFT for mints, per chunk for topic messages and file appends
+FEES = {
+    "TransferTransaction": 200_000,
+    "AccountCreateTransaction": 100_000_000,
+    "AccountDeleteTransaction": 10_000_000,
+    "TopicCreateTransaction": 20_000_000,
+    "TopicMessageSubmitTransaction": 200_000,
+    "TokenCreateTransaction": 2_000_000_000,
+    "TokenMintTransaction": 2_000_000,
+    "TokenMintTransaction.nft": 40_000_000,
+    "TokenBurnTransaction": 2_000_000,
+    "TokenWipeTransaction": 2_000_000,
+    "TokenAssociateTransaction": 100_000_000,
+    "TokenGrantKycTransaction": 2_000_000,
+    "FileCreateTransaction": 50_000_000,
+    "FileAppendTransaction": 50_000_000,
+    "FileDeleteTransaction": 14_000_000,
+    "ContractCreateTransaction": 1_000_000_000,
+    }
+DEFAULT_FEE = 1_000_000
+QUERY_FEE = 200_000
+# the SDK's default max transaction fee, and the types that have their own
+DEFAULT_MAX_FEE = 200_000_000
+MAX_FEES = {
+    "TokenCreateTransaction": 4_000_000_000,
+    "ContractCreateTransaction": 2_000_000_000,
+    "AccountCreateTransaction": 500_000_000,
+    }
+
+MAX_BATCH = 10  # serials per mint, burn or wipe
+MAX_FILE_SIZE = 1024 * 1024
+MESSAGE_CHUNK = 1024
+FILE_CHUNK = 4096
+DEFAULT_MAX_CHUNKS = 20
+VALID_DURATION = 120
+MAX_VALID_DURATION = 180
+AUTO_RENEW = 90 * 86400
+NODES = ("0.0.3", "0.0.4", "0.0.5")
+FEE_COLLECTOR = 98
+TREASURY = 2
+
+RECORD_NAMES = {
+    "TransferTransaction": "CRYPTOTRANSFER",
+    "AccountCreateTransaction": "CRYPTOCREATEACCOUNT",
+    "AccountDeleteTransaction": "CRYPTODELETE",
+    "TopicCreateTransaction": "CONSENSUSCREATETOPIC",
+    "TopicMessageSubmitTransaction": "CONSENSUSSUBMITMESSAGE",
+    "TokenCreateTransaction": "TOKENCREATION",
+    "TokenMintTransaction": "TOKENMINT",
+    "TokenBurnTransaction": "TOKENBURN",
+    "TokenWipeTransaction": "TOKENWIPE",
+    "TokenAssociateTransaction": "TOKENASSOCIATE",
+    "TokenGrantKycTransaction": "TOKENGRANTKYC",
+    "FileCreateTransaction": "FILECREATE",
+    "FileAppendTransaction": "FILEAPPEND",
+    "FileDeleteTransaction": "FILEDELETE",
+    "ContractCreateTransaction": "CONTRACTCREATEINSTANCE",
+    }
+
+
+# -- Java flavoured basics -----------------------------------------------------------
+
+class _Class:
+    def __init__(self, name):
+        self.name = name
+
+    def getName(self):
+        return "com.hedera.hashgraph.sdk." + self.name
+
+    def getSimpleName(self):
+        return self.name
+
+
+class JavaObject:
+    java_name = None
+
+    def getClass(self):
+        return _Class(self.java_name or type(self).__name__)
+
+    def toString(self):
+        return str(self)
+
+
+class JavaException(Exception):
+    """what pyjnius raises for a Java exception: str() has the message and class name,
+    `innermessage` the message alone
+    """
+
+    def __init__(self, classname, message):
+        super().__init__("JVM exception occurred: {} {}".format(message, classname))
+        self.classname = classname
+        self.innermessage = message
+
+
+def _illegal_argument(message):
+    return JavaException("java.lang.IllegalArgumentException", message)
+
+
+def _illegal_state(message):
+    return JavaException("java.lang.IllegalStateException", message)
+
+
+def _precheck_error(txid, status):
+    return JavaException("com.hedera.hashgraph.sdk.PrecheckStatusException",
+                         "Hedera transaction `{}` failed pre-check with the status `{}`".format(txid, status))
+
+
+def _receipt_error(txid, status):
+    return JavaException("com.hedera.hashgraph.sdk.ReceiptStatusException",
+                         "receipt for transaction {} raised status {}".format(txid, status))
+
+
+class ArrayList(list):
+    def add(self, item):
+        self.append(item)
+        return True
+
+    def get(self, i):
+        return self[i]
+
+    def size(self):
+        return len(self)
+
+    def isEmpty(self):
+        return not self
+
+    def toArray(self):
+        return list(self)
+
+
+class HashMap(dict):
+    def keySet(self):
+        return ArrayList(self.keys())
+
+    def values(self):
+        return ArrayList(dict.values(self))
+
+    def size(self):
+        return len(self)
+
+
+def Long(value):
+    return int(value)
+
+
+class ByteArray(bytes):
+    "a Java byte[] the way pyjnius returns it"
+
+    def tostring(self):
+        return bytes(self)
+
+
+class ByteString(JavaObject):
+    def __init__(self, data=b""):
+        self.data = bytes(data)
+
+    @staticmethod
+    def copyFrom(data):
+        return ByteString(data.encode() if isinstance(data, str) else data)
+
+    @staticmethod
+    def copyFromUtf8(text):
+        return ByteString(text.encode())
+
+    def toByteArray(self):
+        return ByteArray(self.data)
+
+    def toStringUtf8(self):
+        return self.data.decode("utf-8", "replace")
+
+    def size(self):
+        return len(self.data)
+
+    def isEmpty(self):
+        return not self.data
+
+    def __str__(self):
+        return "<ByteString size={}>".format(len(self.data))
+
+
+class Instant(JavaObject):
+    __slots__ = ("seconds", "nanos")
+
+    def __init__(self, seconds, nanos=0):
+        self.seconds = int(seconds) + int(nanos) // 1_000_000_000
+        self.nanos = int(nanos) % 1_000_000_000
+
+    @staticmethod
+    def ofEpochSecond(seconds, nanos=0):
+        return Instant(seconds, nanos)
+
+    @staticmethod
+    def now():
+        return Instant.of_nanos(time.time_ns())
+
+    @staticmethod
+    def of_nanos(ns):
+        return Instant(ns // 1_000_000_000, ns % 1_000_000_000)
+
+    def getEpochSecond(self):
+        return self.seconds
+
+    def getNano(self):
+        return self.nanos
+
+    def plusSeconds(self, n):
+        return Instant(self.seconds + n, self.nanos)
+
+    def total_nanos(self):
+        return self.seconds * 1_000_000_000 + self.nanos
+
+    def __str__(self):
+        return timestamp_string("{}.{:09d}".format(self.seconds, self.nanos))
+
+
+class Duration(JavaObject):
+    def __init__(self, seconds):
+        self.seconds = int(seconds)
+
+    @staticmethod
+    def ofSeconds(seconds):
+        return Duration(seconds)
+
+    @staticmethod
+    def ofDays(days):
+        return Duration(days * 86400)
+
+    def getSeconds(self):
+        return self.seconds
+
+    def toDays(self):
+        return self.seconds // 86400
+
+    def __str__(self):
+        return "PT{}S".format(self.seconds)
+
+
+class _Enum(JavaObject):
+    _values = None
+
+    def __init__(self, name):
+        self.name = name
+
+    @classmethod
+    def valueOf(cls, name):
+        return cls._values[name]
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return self.name
+
+
+class TokenType(_Enum):
+    _values = {}
+
+
+TokenType.FUNGIBLE_COMMON = TokenType._values["FUNGIBLE_COMMON"] = TokenType("FUNGIBLE_COMMON")
+TokenType.NON_FUNGIBLE_UNIQUE = TokenType._values["NON_FUNGIBLE_UNIQUE"] = TokenType("NON_FUNGIBLE_UNIQUE")
+
+
+class Status(_Enum):
+    _values = {}
+
+    @classmethod
+    def of(cls, name):
+        if name not in cls._values:
+            cls._values[name] = cls(name)
+        return cls._values[name]
+
+
+SUCCESS = Status.SUCCESS = Status.of("SUCCESS")
+
+
+# -- ids, keys, hbars ----------------------------------------------------------------
+
+class _EntityId(JavaObject):
+    __slots__ = ("shard", "realm", "num")
+
+    def __init__(self, shard, realm=None, num=None):
+        if realm is None:
+            shard, realm, num = 0, 0, shard
+        self.shard = int(shard)
+        self.realm = int(realm)
+        self.num = int(num)
+
+    @classmethod
+    def fromString(cls, text):
+        try:
+            return cls(*parse(text).key())
+        except ValueError:
+            raise _illegal_argument('Invalid ID "{}"'.format(text))
+
+    def __str__(self):
+        return "{}.{}.{}".format(self.shard, self.realm, self.num)
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, self)
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.num == self.num and other.realm == self.realm \
+            and other.shard == self.shard
+
+    def __hash__(self):
+        return hash((type(self).__name__, self.shard, self.realm, self.num))
+
+
+class AccountId(_EntityId):
+    pass
+
+
+class TokenId(_EntityId):
+    pass
+
+
+class TopicId(_EntityId):
+    pass
+
+
+class FileId(_EntityId):
+    pass
+
+
+class ContractId(_EntityId):
+    pass
+
+
+class NftId(JavaObject):
+    def __init__(self, tokenId, serial):
+        self.tokenId = tokenId
+        self.serial = int(serial)
+
+    @staticmethod
+    def fromString(text):
+        token, sep, serial = text.replace("/", "@").partition("@")
+        if not sep or not serial.isdigit():
+            raise _illegal_argument('Invalid NFT ID "{}"'.format(text))
+        return NftId(TokenId.fromString(token), serial)
+
+    def __str__(self):
+        return "{}/{}".format(self.tokenId, self.serial)
+
+
+class PublicKey(JavaObject):
+    def __init__(self, kind, raw):
+        self.kind = kind
+        self.raw = bytes(raw)
+        self.java_name = "PublicKeyED25519" if kind == ED25519 else "PublicKeyECDSA"
+
+    @staticmethod
+    def fromString(text):
+        try:
+            der = bytes.fromhex(text)
+        except ValueError:
+            raise _illegal_argument("invalid public key")
+        for kind, prefix in PUBLIC_PREFIX.items():
+            if der.startswith(prefix) and len(der) == len(prefix) + PUBLIC_SIZE[kind]:
+                return PublicKey(kind, der[len(prefix):])
+        if len(der) == 32:
+            return PublicKey(ED25519, der)
+        raise _illegal_argument("invalid public key")
+
+    def __str__(self):
+        return (PUBLIC_PREFIX[self.kind] + self.raw).hex()
+
+    def __eq__(self, other):
+        return isinstance(other, PublicKey) and other.raw == self.raw
+
+    def __hash__(self):
+        return hash(self.raw)
+
+
+class PrivateKey(JavaObject):
+    def __init__(self, kind, raw):
+        self.kind = kind
+        self.raw = bytes(raw)
+        self.java_name = "PrivateKeyED25519" if kind == ED25519 else "PrivateKeyECDSA"
+
+    @staticmethod
+    def generate():
+        return PrivateKey(ED25519, os.urandom(32))
+
+    @staticmethod
+    def generateED25519():
+        return PrivateKey(ED25519, os.urandom(32))
+
+    @staticmethod
+    def generateECDSA():
+        return PrivateKey(ECDSA, os.urandom(32))
+
+    @staticmethod
+    def fromString(text):
+        try:
+            der = bytes.fromhex(text)
+        except ValueError:
+            raise _illegal_argument("invalid private key")
+        for kind, prefix in PRIVATE_PREFIX.items():
+            if der.startswith(prefix) and len(der) == len(prefix) + 32:
+                return PrivateKey(kind, der[len(prefix):])
+        if len(der) in (32, 64):
+            return PrivateKey(ED25519, der[:32])
+        raise _illegal_argument("invalid private key")
+
+    def getPublicKey(self):
+        # not real curve math, a stable stand-in of the right size
+        if self.kind == ED25519:
+            return PublicKey(ED25519, hashlib.sha512(b"ed25519" + self.raw).digest()[:32])
+        return PublicKey(ECDSA, b"\x02" + hashlib.sha256(b"secp256k1" + self.raw).digest())
+
+    def __str__(self):
+        return (PRIVATE_PREFIX[self.kind] + self.raw).hex()
+
+
+def _public(key):
+    "Key fields take public or private keys, private ones mean their public key"
+    return key.getPublicKey() if isinstance(key, PrivateKey) else key
+
+
+class Hbar(JavaObject):
+    def __init__(self, hbars=0):
+        self.tinybars = int(round(hbars * 100_000_000))
+
+    @staticmethod
+    def fromTinybars(tinybars):
+        h = Hbar()
+        h.tinybars = int(tinybars)
+        return h
+
+    def toTinybars(self):
+        return self.tinybars
+
+    def negated(self):
+        return Hbar.fromTinybars(-self.tinybars)
+
+    def __str__(self):
+        return hbar_string(self.tinybars)
+
+
+Hbar.ZERO = Hbar(0)
+
+
+class TransactionId(JavaObject):
+    _last = 0
+    _lock = threading.Lock()
+
+    def __init__(self, accountId, validStart):
+        self.accountId = accountId
+        self.validStart = validStart
+
+    @staticmethod
+    def generate(accountId):
+        # distinct valid starts, like the SDK's
+        with TransactionId._lock:
+            ns = max(time.time_ns(), TransactionId._last + 1)
+            TransactionId._last = ns
+        return TransactionId(accountId, Instant.of_nanos(ns))
+
+    @staticmethod
+    def withValidStart(accountId, validStart):
+        return TransactionId(accountId, validStart)
+
+    @staticmethod
+    def fromString(text):
+        account, _, start = text.partition("@")
+        seconds, _, nanos = start.partition(".")
+        return TransactionId(AccountId.fromString(account), Instant(int(seconds), int(nanos or 0)))
+
+    def __str__(self):
+        return "{}@{}.{:09d}".format(self.accountId, self.validStart.seconds, self.validStart.nanos)
+
+    def __eq__(self, other):
+        return isinstance(other, TransactionId) and str(other) == str(self)
+
+    def __hash__(self):
+        return hash(str(self))
+
+
+class ContractFunctionParameters(JavaObject):
+    "accepted and ignored, contract code isn't executed"
+
+    def __init__(self):
+        self.values = []
+
+    def _add(self, value):
+        self.values.append(value)
+        return self
+
+    addString = addBool = addAddress = addBytes = addBytes32 = _add
+    addInt256 = addUint256 = addInt64 = addUint64 = addInt32 = addUint32 = addUint8 = _add
+
+
+# -- value encoding for Transaction.toBytes() ----------------------------------------
+
+_ID_TYPES = {c.__name__: c for c in (AccountId, TokenId, TopicId, FileId, ContractId)}
+
+
+def _encode(v):
+    if isinstance(v, _EntityId):
+        return {"$": type(v).__name__, "v": str(v)}
+    if isinstance(v, (PublicKey, PrivateKey)):
+        return {"$": "PublicKey", "v": str(_public(v))}
+    if isinstance(v, Hbar):
+        return {"$": "Hbar", "v": v.tinybars}
+    if isinstance(v, NftId):
+        return {"$": "NftId", "v": [str(v.tokenId), v.serial]}
+    if isinstance(v, TokenType):
+        return {"$": "TokenType", "v": v.name}
+    if isinstance(v, Instant):
+        return {"$": "Instant", "v": [v.seconds, v.nanos]}
+    if isinstance(v, ByteString):
+        v = v.data
+    if isinstance(v, (bytes, bytearray)):
+        return {"$": "bytes", "v": base64.b64encode(bytes(v)).decode()}
+    if isinstance(v, (list, tuple)):
+        return [_encode(x) for x in v]
+    return v
+
+
+def _decode(v):
+    if isinstance(v, list):
+        return [_decode(x) for x in v]
+    if not isinstance(v, dict):
+        return v
+    kind, value = v["$"], v["v"]
+    if kind in _ID_TYPES:
+        return _ID_TYPES[kind].fromString(value)
+    if kind == "PublicKey":
+        return PublicKey.fromString(value)
+    if kind == "Hbar":
+        return Hbar.fromTinybars(value)
+    if kind == "NftId":
+        return NftId(TokenId.fromString(value[0]), value[1])
+    if kind == "TokenType":
+        return TokenType.valueOf(value)
+    if kind == "Instant":
+        return Instant(*value)
+    return base64.b64decode(value)
+
+
+def _to_bytes(data):
+    if isinstance(data, str):
+        return data.encode()
+    if isinstance(data, ByteString):
+        return data.data
+    return bytes(data)
+
+
+# -- client ---------------------------------------------------------------------------
+
+class _Node:
+    def __init__(self, accountId):
+        self.accountId = accountId
+
+
+class _Network:
+    def __init__(self):
+        self.nodes = ArrayList(_Node(AccountId.fromString(n)) for n in NODES)
+
+
+class Client(JavaObject):
+    def __init__(self):
+        self.ledger = ledger()
+        self.network = _Network()
+        self.operatorAccountId = None
+        self.operatorKey = None
+
+    @staticmethod
+    def forTestnet():
+        return Client()
+
+    @staticmethod
+    def forMainnet():
+        return Client()
+
+    @staticmethod
+    def forPreviewnet():
+        return Client()
+
+    def setOperator(self, accountId, privateKey):
+        self.operatorAccountId = accountId
+        self.operatorKey = privateKey
+        self.ledger.ensure_operator(accountId, privateKey.getPublicKey())
+        return self
+
+    def getOperatorAccountId(self):
+        return self.operatorAccountId
+
+    def getOperatorPublicKey(self):
+        return self.operatorKey and self.operatorKey.getPublicKey()
+
+    def getNetwork(self):
+        return HashMap(("127.0.0.1:5021{}".format(i), n.accountId) for i, n in enumerate(self.network.nodes))
+
+    def close(self):
+        pass
+
+
+# -- transactions ---------------------------------------------------------------------
+
+def _setter(field, convert=None):
+    def setter(self, value):
+        self._mutable()
+        self.fields[field] = convert(value) if convert else value
+        return self
+    return setter
+
+
+def _adder(field, convert=None):
+    def adder(self, *value):
+        self._mutable()
+        item = convert(*value) if convert else value[0]
+        self.fields.setdefault(field, []).append(item)
+        return self
+    return adder
+
+
+class Transaction(JavaObject):
+    def __init__(self):
+        self.fields = {}
+        self.transactionId = None
+        self.nodeAccountIds = None
+        self.maxTransactionFee = None
+        self.validDuration = VALID_DURATION
+        self.signers = []
+        self.frozen = False
+
+    def _mutable(self):
+        if self.frozen:
+            raise _illegal_state("transaction is immutable; it has at least one signature or has been "
+                                 "explicitly frozen")
+
+    def setTransactionId(self, transactionId):
+        self._mutable()
+        self.transactionId = transactionId
+        return self
+
+    def setNodeAccountIds(self, nodeAccountIds):
+        self._mutable()
+        self.nodeAccountIds = list(nodeAccountIds)
+        return self
+
+    def setMaxTransactionFee(self, fee):
+        self._mutable()
+        self.maxTransactionFee = fee
+        return self
+
+    def setTransactionValidDuration(self, duration):
+        self._mutable()
+        self.validDuration = duration.getSeconds()
+        return self
+
+    setTransactionMemo = _setter("memo")
+
+    def getTransactionId(self):
+        return self.transactionId
+
+    def isFrozen(self):
+        return self.frozen
+
+    def freeze(self):
+        if self.transactionId is None:
+            raise _illegal_state("transaction ID must be set before freezing")
+        if not self.nodeAccountIds:
+            raise _illegal_state("node account IDs must be set before freezing")
+        self.frozen = True
+        return self
+
+    def freezeWith(self, client):
+        if self.transactionId is None:
+            if client is None or client.operatorAccountId is None:
+                raise _illegal_state("`client` must have an `operator` or `transactionId` must be set")
+            self.transactionId = TransactionId.generate(client.operatorAccountId)
+        if not self.nodeAccountIds:
+            self.nodeAccountIds = [n.accountId for n in client.network.nodes]
+        self.frozen = True
+        return self
+
+    def sign(self, privateKey):
+        if not self.frozen:
+            raise _illegal_state("Signing requires transaction to be frozen")
+        pub = str(privateKey.getPublicKey())
+        if pub not in self.signers:
+            self.signers.append(pub)
+        return self
+
+    def signWithOperator(self, client):
+        if client.operatorKey is None:
+            raise _illegal_state("`client` must have an `operator` to sign with the operator")
+        if not self.frozen:
+            self.freezeWith(client)
+        return self.sign(client.operatorKey)
+
+    def execute(self, client):
+        if not self.frozen:
+            self.freezeWith(client)
+        # like the SDK, the operator signs only the transactions it pays for
+        if client.operatorKey is not None and self.transactionId.accountId == client.operatorAccountId:
+            self.sign(client.operatorKey)
+        return client.ledger.submit(self)
+
+    def toBytes(self):
+        data = {"type": type(self).__name__,
+                "transactionId": str(self.transactionId) if self.transactionId else None,
+                "nodes": [str(n) for n in self.nodeAccountIds or []],
+                "maxFee": self.maxTransactionFee.tinybars if self.maxTransactionFee else None,
+                "validDuration": self.validDuration,
+                "signers": self.signers,
+                "fields": {k: _encode(v) for k, v in self.fields.items()}}
+        return ByteArray(json.dumps(data).encode())
+
+    @staticmethod
+    def fromBytes(data):
+        try:
+            d = json.loads(bytes(data))
+            txn = TRANSACTIONS[d["type"]]()
+        except (ValueError, KeyError):
+            raise _illegal_argument("not a transaction")
+        if d["transactionId"]:
+            txn.transactionId = TransactionId.fromString(d["transactionId"])
+        txn.nodeAccountIds = [AccountId.fromString(n) for n in d["nodes"]] or None
+        if d["maxFee"] is not None:
+            txn.maxTransactionFee = Hbar.fromTinybars(d["maxFee"])
+        txn.validDuration = d["validDuration"]
+        txn.signers = d["signers"]
+        txn.fields = {k: _decode(v) for k, v in d["fields"].items()}
+        txn.frozen = bool(txn.transactionId and txn.nodeAccountIds)
+        return txn
+
+
+class AccountCreateTransaction(Transaction):
+    setKey = _setter("key", _public)
+    setInitialBalance = _setter("initialBalance")
+    setReceiverSignatureRequired = _setter("receiverSigRequired")
+    setAccountMemo = _setter("memo")
+    setMaxAutomaticTokenAssociations = _setter("maxAutoAssociations")
+
+
+class AccountDeleteTransaction(Transaction):
+    setAccountId = _setter("accountId")
+    setTransferAccountId = _setter("transferAccountId")
+
+
+class TransferTransaction(Transaction):
+    addHbarTransfer = _adder("hbars", lambda account, amount: [account, amount])
+    addTokenTransfer = _adder("tokens", lambda token, account, amount: [token, account, int(amount)])
+    addNftTransfer = _adder("nfts", lambda nft, sender, receiver: [nft, sender, receiver])
+
+
+class TopicCreateTransaction(Transaction):
+    setTopicMemo = _setter("memo")
+    setAdminKey = _setter("adminKey", _public)
+    setSubmitKey = _setter("submitKey", _public)
+    setAutoRenewAccountId = _setter("autoRenewAccountId")
+
+
+class TopicMessageSubmitTransaction(Transaction):
+    setTopicId = _setter("topicId")
+    setMessage = _setter("message", _to_bytes)
+    setMaxChunks = _setter("maxChunks")
+
+
+class TokenCreateTransaction(Transaction):
+    setTokenName = _setter("name")
+    setTokenSymbol = _setter("symbol")
+    setDecimals = _setter("decimals")
+    setInitialSupply = _setter("initialSupply")
+    setMaxSupply = _setter("maxSupply")
+    setTreasuryAccountId = _setter("treasury")
+    setAdminKey = _setter("adminKey", _public)
+    setKycKey = _setter("kycKey", _public)
+    setFreezeKey = _setter("freezeKey", _public)
+    setWipeKey = _setter("wipeKey", _public)
+    setSupplyKey = _setter("supplyKey", _public)
+    setFeeScheduleKey = _setter("feeScheduleKey", _public)
+    setFreezeDefault = _setter("freezeDefault")
+    setTokenType = _setter("tokenType")
+    setTokenMemo = _setter("memo")
+    setAutoRenewAccountId = _setter("autoRenewAccountId")
+
+
+class TokenMintTransaction(Transaction):
+    setTokenId = _setter("tokenId")
+    setAmount = _setter("amount")
+    addMetadata = _adder("metadata", _to_bytes)
+    setMetadata = _setter("metadata", lambda items: [_to_bytes(m) for m in items])
+
+
+class TokenBurnTransaction(Transaction):
+    setTokenId = _setter("tokenId")
+    setAmount = _setter("amount")
+    setSerials = _setter("serials", lambda items: [int(s) for s in items])
+    addSerial = _adder("serials", int)
+
+
+class TokenWipeTransaction(Transaction):
+    setTokenId = _setter("tokenId")
+    setAccountId = _setter("accountId")
+    setAmount = _setter("amount")
+    setSerials = _setter("serials", lambda items: [int(s) for s in items])
+    addSerial = _adder("serials", int)
+
+
+class TokenAssociateTransaction(Transaction):
+    setAccountId = _setter("accountId")
+    setTokenIds = _setter("tokenIds", list)
+
+
+class TokenGrantKycTransaction(Transaction):
+    setAccountId = _setter("accountId")
+    setTokenId = _setter("tokenId")
+
+
+class FileCreateTransaction(Transaction):
+    setFileMemo = _setter("memo")
+    setContents = _setter("contents", _to_bytes)
+
+    def setKeys(self, *keys):
+        self._mutable()
+        self.fields["keys"] = [_public(k) for k in keys]
+        return self
+
+
+class FileAppendTransaction(Transaction):
+    setFileId = _setter("fileId")
+    setContents = _setter("contents", _to_bytes)
+    setMaxChunks = _setter("maxChunks")
+
+
+class FileDeleteTransaction(Transaction):
+    setFileId = _setter("fileId")
+
+
+class ContractCreateTransaction(Transaction):
+    setGas = _setter("gas")
+    setBytecodeFileId = _setter("bytecodeFileId")
+    setAdminKey = _setter("adminKey", _public)
+    setInitialBalance = _setter("initialBalance")
+    setContractMemo = _setter("memo")
+
+    def setConstructorParameters(self, params):
+        self._mutable()
+        self.fields["constructorParameters"] = params if isinstance(params, ContractFunctionParameters) \
+            else _to_bytes(params)
+        return self
+
+
+TRANSACTIONS = {c.__name__: c for c in (
+    AccountCreateTransaction, AccountDeleteTransaction, TransferTransaction,
+    TopicCreateTransaction, TopicMessageSubmitTransaction,
+    TokenCreateTransaction, TokenMintTransaction, TokenBurnTransaction, TokenWipeTransaction,
+    TokenAssociateTransaction, TokenGrantKycTransaction,
+    FileCreateTransaction, FileAppendTransaction, FileDeleteTransaction,
+    ContractCreateTransaction)}
+
+
+class TransactionReceipt(JavaObject):
+    def __init__(self, status, **kwargs):
+        self.status = status
+        self.accountId = self.tokenId = self.topicId = self.fileId = self.contractId = None
+        self.topicSequenceNumber = 0
+        self.topicRunningHash = None
+        self.totalSupply = 0
+        self.serials = ArrayList()
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+
+class TransactionRecord(JavaObject):
+    def __init__(self, receipt, transactionId, consensusTimestamp, transactionFee):
+        self.receipt = receipt
+        self.transactionId = transactionId
+        self.consensusTimestamp = consensusTimestamp
+        self.transactionFee = transactionFee
+
+
+class TransactionResponse(JavaObject):
+    def __init__(self, ledger, transactionId, nodeId):
+        self.ledger = ledger
+        self.transactionId = transactionId
+        self.nodeId = nodeId
+
+    def getReceipt(self, client):
+        receipt = self.ledger.receipt(self.transactionId)
+        if receipt.status is not SUCCESS:
+            raise _receipt_error(self.transactionId, receipt.status)
+        return receipt
+
+    def getRecord(self, client):
+        receipt = self.getReceipt(client)
+        record = self.ledger.record(self.transactionId)
+        seconds, _, nanos = record["consensus_timestamp"].partition(".")
+        return TransactionRecord(receipt, self.transactionId, Instant(int(seconds), int(nanos)),
+                                 Hbar.fromTinybars(record["charged_tx_fee"]))
+
+
+# -- queries --------------------------------------------------------------------------
+
+class Query(JavaObject):
+    paid = True
+
+    def __init__(self):
+        self.fields = {}
+
+    def setNodeAccountIds(self, nodeAccountIds):
+        return self
+
+    def setQueryPayment(self, amount):
+        return self
+
+    def setMaxQueryPayment(self, amount):
+        return self
+
+    def execute(self, client):
+        return client.ledger.query(self, client)
+
+
+class AccountBalanceQuery(Query):
+    paid = False
+    setAccountId = _setter("accountId")
+    setContractId = _setter("accountId")
+    _mutable = lambda self: None
+
+
+class AccountInfoQuery(Query):
+    setAccountId = _setter("accountId")
+    _mutable = lambda self: None
+
+
+class TopicInfoQuery(Query):
+    setTopicId = _setter("topicId")
+    _mutable = lambda self: None
+
+
+class TokenInfoQuery(Query):
+    setTokenId = _setter("tokenId")
+    _mutable = lambda self: None
+
+
+class TokenNftInfoQuery(Query):
+    byNftId = _setter("nftId")
+    byTokenId = _setter("tokenId")
+    byAccountId = _setter("accountId")
+    setNftId = _setter("nftId")
+    setStart = _setter("start")
+    setEnd = _setter("end")
+    _mutable = lambda self: None
+
+
+class FileInfoQuery(Query):
+    setFileId = _setter("fileId")
+    _mutable = lambda self: None
+
+
+class FileContentsQuery(Query):
+    setFileId = _setter("fileId")
+    _mutable = lambda self: None
+
+
+class ContractInfoQuery(Query):
+    setContractId = _setter("contractId")
+    _mutable = lambda self: None
+
+
+class ContractCallQuery(Query):
+    setGas = _setter("gas")
+    setContractId = _setter("contractId")
+    setFunctionParameters = _setter("parameters")
+    _mutable = lambda self: None
+
+    def setFunction(self, name, params=None):
+        self.fields["function"] = name
+        return self
+
+
+class TransactionReceiptQuery(Query):
+    paid = False
+    setTransactionId = _setter("transactionId")
+    _mutable = lambda self: None
+
+    def execute(self, client):
+        # unlike TransactionResponse.getReceipt, a failed status is returned, not raised
+        return client.ledger.receipt(self.fields["transactionId"])
+
+
+class Info(JavaObject):
+    "query results, fields as attributes"
+
+    def __init__(self, java_name, **fields):
+        self.java_name = java_name
+        self.__dict__.update(fields)
+
+
+class ContractFunctionResult(JavaObject):
+    def __init__(self, data=b"", errorMessage=None):
+        self.data = data
+        self.errorMessage = errorMessage
+
+    def asBytes(self):
+        return ByteString(self.data)
+
+    def getString(self, index):
+        return ""
+
+
+# -- the ledger -----------------------------------------------------------------------
+
+class Failed(Exception):
+    "a transaction failed at consensus with this status"
+
+
+def _load_config(config=None):
+    conf = dict(DEFAULTS)
+    source = config or os.environ.get("HEDERA_SIM_CONFIG")
+    if source:
+        if os.path.isfile(source):
+            with open(source) as fh:
+                conf.update(json.load(fh))
+        else:
+            conf.update(json.loads(source))
+    return conf
+
+
+class _Throttle:
+    "non blocking token bucket, the network answers BUSY instead of waiting"
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.tokens = max(self.rate, 1.0)
+        self.last = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class Ledger:
+    """The simulated network state.  Submissions are prechecked right away and applied
+    when their consensus time comes, lazily in consensus order whenever anything reads
+    the state.
+    """
+
+    def __init__(self, config=None):
+        self.config = _load_config(config)
+        self.lock = threading.RLock()
+        self.next_num = 1001
+        self.accounts = {}
+        self.tokens = {}
+        self.topics = {}
+        self.files = {}
+        self.contracts = {}
+        self.records = []
+        self.by_txid = {}
+        self.receipts = {}
+        self.inflight = {}
+        self.pending = []
+        self.order = 0
+        self.last_ts = 0
+        self.counters = defaultdict(int)
+        self.throttles = {}
+        table = throttles()
+        table.update(self.config["throttles"])
+        self.throttle_table = table
+        self.fee_table = dict(FEES)
+        self.fee_table.update(self.config["fees"])
+        self.genesis_key = self._seeded_key("genesis")
+        for num in (TREASURY, 3, 4, 5, FEE_COLLECTOR):
+            self._new_account(num, self.genesis_key.getPublicKey(), 0)
+        self.accounts[TREASURY]["balance"] = 50_000_000_000 * 100_000_000
+
+    # helpers
+
+    def _seeded_key(self, label):
+        seed = hashlib.sha256("{}:{}".format(self.config["seed"], label).encode()).digest()
+        return PrivateKey(ED25519, seed)
+
+    def _rng(self, kind, index):
+        h = hashlib.sha256("{}:{}:{}".format(self.config["seed"], kind, index).encode()).digest()
+        return random.Random(int.from_bytes(h[:8], "big"))
+
+    def _option(self, kind, name):
+        return self.config["types"].get(kind, {}).get(name, self.config[name])
+
+    def _latency(self, rng, kind, name):
+        ms = self._option(kind, name)
+        if not ms:
+            return 0.0
+        return ms / 1000 * rng.lognormvariate(0, self.config["jitter"])
+
+    def _allocate(self):
+        num = self.next_num
+        self.next_num += 1
+        return num
+
+    def _new_account(self, num, key, balance):
+        self.accounts[num] = {"num": num, "key": key, "balance": balance, "deleted": False,
+                              "receiver_sig_required": False, "memo": "", "created": self.last_ts,
+                              "tokens": {}}
+        return self.accounts[num]
+
+    def ensure_operator(self, accountId, publicKey):
+        "the operator account exists with the operator's key, funded the first time"
+        with self.lock:
+            account = self.accounts.get(accountId.num)
+            if account is None:
+                account = self._new_account(accountId.num, publicKey, self.config["operator_hbars"] * 100_000_000)
+                self.next_num = max(self.next_num, accountId.num + 1)
+            account["key"] = publicKey
+
+    def account(self, entity, status="INVALID_ACCOUNT_ID"):
+        account = self.accounts.get(entity.num)
+        if account is None:
+            raise Failed(status)
+        if account["deleted"]:
+            raise Failed("ACCOUNT_DELETED")
+        return account
+
+    def token(self, entity):
+        token = self.tokens.get(entity.num) if entity is not None else None
+        if token is None:
+            raise Failed("INVALID_TOKEN_ID")
+        if token["deleted"]:
+            raise Failed("TOKEN_WAS_DELETED")
+        return token
+
+    def relation(self, account, token):
+        rel = account["tokens"].get(token["num"])
+        if rel is None:
+            raise Failed("TOKEN_NOT_ASSOCIATED_TO_ACCOUNT")
+        return rel
+
+    @staticmethod
+    def signed(txn, key):
+        return key is None or str(key) in txn.signers
+
+    def fee(self, kind, txn):
+        fee = self.fee_table.get(kind, DEFAULT_FEE)
+        if kind == "TokenMintTransaction" and txn.fields.get("metadata"):
+            fee = self.fee_table["TokenMintTransaction.nft"] * len(txn.fields["metadata"])
+        elif kind == "TopicMessageSubmitTransaction":
+            fee *= max(1, math.ceil(len(txn.fields.get("message", b"")) / MESSAGE_CHUNK))
+        elif kind == "FileAppendTransaction":
+            fee *= max(1, math.ceil(len(txn.fields.get("contents", b"")) / FILE_CHUNK))
+        return fee
+
+    def unit_fee(self, kind, txn):
+        "what one transaction costs, appends and long messages are several transactions"
+        if kind in ("TopicMessageSubmitTransaction", "FileAppendTransaction"):
+            return self.fee_table.get(kind, DEFAULT_FEE)
+        return self.fee(kind, txn)
+
+    # submission
+
+    def submit(self, txn):
+        kind = type(txn).__name__
+        txid = txn.transactionId
+        with self.lock:
+            index = self.counters[kind]
+            self.counters[kind] += 1
+        rng = self._rng(kind, index)
+        time.sleep(self._latency(rng, kind, "latency_ms"))
+        busy = rng.random() < self._option(kind, "busy_rate")
+        consensus = self._latency(rng, kind, "consensus_ms")
+        fail = rng.random() < self._option(kind, "fail_rate")
+        with self.lock:
+            self.advance()
+            status = self.precheck(txn, kind, busy)
+            if status is None:
+                ready = time.time() + consensus
+                self.inflight[str(txid)] = ready
+                heapq.heappush(self.pending, (ready, self.order, txn, fail))
+                self.order += 1
+        metrics.incr("sim.submitted." + kind)
+        if status is not None:
+            metrics.incr("sim.precheck." + status)
+            raise _precheck_error(txid, status)
+        return TransactionResponse(self, txid, txn.nodeAccountIds[0])
+
+    def precheck(self, txn, kind, busy):
+        txid = txn.transactionId
+        key = str(txid)
+        if key in self.inflight or key in self.receipts:
+            return "DUPLICATE_TRANSACTION"
+        if not all(str(n) in NODES for n in txn.nodeAccountIds):
+            return "INVALID_NODE_ACCOUNT"
+        now = time.time_ns()
+        start = txid.validStart.total_nanos()
+        if txn.validDuration > MAX_VALID_DURATION:
+            return "INVALID_TRANSACTION_DURATION"
+        if start > now + 10_000_000_000:
+            return "INVALID_TRANSACTION_START"
+        if start + txn.validDuration * 1_000_000_000 < now:
+            return "TRANSACTION_EXPIRED"
+        payer = self.accounts.get(txid.accountId.num)
+        if payer is None or payer["deleted"]:
+            return "PAYER_ACCOUNT_NOT_FOUND"
+        if not self.signed(txn, payer["key"]):
+            return "INVALID_SIGNATURE"
+        max_fee = txn.maxTransactionFee.tinybars if txn.maxTransactionFee else MAX_FEES.get(kind, DEFAULT_MAX_FEE)
+        if max_fee < self.unit_fee(kind, txn):
+            return "INSUFFICIENT_TX_FEE"
+        if payer["balance"] < self.fee(kind, txn):
+            return "INSUFFICIENT_PAYER_BALANCE"
+        if kind not in self.throttles:
+            self.throttles[kind] = _Throttle(self.throttle_table.get(kind, 100))
+        if busy or not self.throttles[kind].take():
+            return "BUSY"
+        return None
+
+    def advance(self):
+        "apply every transaction whose consensus time has come"
+        with self.lock:
+            now = time.time()
+            while self.pending and self.pending[0][0] <= now:
+                ready, _, txn, fail = heapq.heappop(self.pending)
+                self.apply(txn, ready, fail)
+
+    def apply(self, txn, ready, fail):
+        kind = type(txn).__name__
+        txid = txn.transactionId
+        ts = max(self.last_ts + 1, int(ready * 1_000_000_000))
+        self.last_ts = ts
+        payer = self.accounts[txid.accountId.num]
+        fee = min(self.fee(kind, txn), payer["balance"])
+        payer["balance"] -= fee
+        self.accounts[FEE_COLLECTOR]["balance"] += fee
+        metrics.incr("sim.fees_tinybars." + kind, fee)
+        record = {"transfers": [], "token_transfers": [], "nft_transfers": [], "entity_id": None}
+        try:
+            if fail:
+                raise Failed(self._option(kind, "fail_status"))
+            receipt = getattr(self, "_" + kind)(txn, ts, record)
+        except Failed as e:
+            receipt = TransactionReceipt(Status.of(e.args[0]))
+            record.update(transfers=[], token_transfers=[], nft_transfers=[], entity_id=None)
+        metrics.incr("sim.consensus.{}".format(receipt.status))
+        seconds, nanos = divmod(ts, 1_000_000_000)
+        record["transfers"] = [{"account": str(txid.accountId), "amount": -fee, "is_approval": False},
+                               {"account": "0.0.{}".format(FEE_COLLECTOR), "amount": fee,
+                                "is_approval": False}] + record["transfers"]
+        record.update({"transaction_id": mirror_txid(str(txid)),
+                       "consensus_timestamp": "{}.{:09d}".format(seconds, nanos),
+                       "valid_start_timestamp": "{}.{:09d}".format(txid.validStart.seconds, txid.validStart.nanos),
+                       "name": RECORD_NAMES.get(kind, kind.upper()),
+                       "result": str(receipt.status),
+                       "charged_tx_fee": fee,
+                       "max_fee": str(txn.maxTransactionFee.tinybars if txn.maxTransactionFee
+                                      else MAX_FEES.get(kind, DEFAULT_MAX_FEE)),
+                       "node": str(txn.nodeAccountIds[0]),
+                       "memo_base64": base64.b64encode(str(txn.fields.get("memo", "")).encode()).decode(),
+                       "nonce": 0,
+                       "scheduled": False,
+                       "valid_duration_seconds": str(txn.validDuration),
+                       "transaction_hash": base64.b64encode(hashlib.sha384(txn.toBytes()).digest()).decode()})
+        self.records.append(record)
+        self.by_txid[record["transaction_id"]] = record
+        self.receipts[str(txid)] = receipt
+        self.inflight.pop(str(txid), None)
+
+    def receipt(self, transactionId):
+        "wait for consensus, then the receipt"
+        key = str(transactionId)
+        while True:
+            with self.lock:
+                self.advance()
+                if key in self.receipts:
+                    return self.receipts[key]
+                ready = self.inflight.get(key)
+            if ready is None:
+                raise _precheck_error(transactionId, "RECEIPT_NOT_FOUND")
+            time.sleep(max(0.0, ready - time.time()) + 0.0005)
+
+    def record(self, transactionId):
+        with self.lock:
+            return self.by_txid[mirror_txid(str(transactionId))]
+
+    # transaction types, each checks everything before changing anything
+
+    def _AccountCreateTransaction(self, txn, ts, record):
+        f = txn.fields
+        if f.get("key") is None:
+            raise Failed("KEY_REQUIRED")
+        amount = f["initialBalance"].tinybars if f.get("initialBalance") else 0
+        payer = self.accounts[txn.transactionId.accountId.num]
+        if payer["balance"] < amount:
+            raise Failed("INSUFFICIENT_PAYER_BALANCE")
+        num = self._allocate()
+        account = self._new_account(num, f["key"], amount)
+        account["created"] = ts
+        account["receiver_sig_required"] = bool(f.get("receiverSigRequired"))
+        account["memo"] = f.get("memo", "")
+        payer["balance"] -= amount
+        record["entity_id"] = "0.0.{}".format(num)
+        record["transfers"] += [{"account": str(txn.transactionId.accountId), "amount": -amount, "is_approval": False},
+                                {"account": record["entity_id"], "amount": amount, "is_approval": False}]
+        return TransactionReceipt(SUCCESS, accountId=AccountId(num))
+
+    def _AccountDeleteTransaction(self, txn, ts, record):
+        account = self.account(txn.fields.get("accountId") or txn.transactionId.accountId)
+        target = self.account(txn.fields["transferAccountId"], "INVALID_TRANSFER_ACCOUNT_ID")
+        if target is account:
+            raise Failed("TRANSFER_ACCOUNT_SAME_AS_DELETE_ACCOUNT")
+        if not self.signed(txn, account["key"]):
+            raise Failed("INVALID_SIGNATURE")
+        if any(rel["balance"] for rel in account["tokens"].values()):
+            raise Failed("TRANSACTION_REQUIRES_ZERO_TOKEN_BALANCES")
+        amount = account["balance"]
+        target["balance"] += amount
+        account["balance"] = 0
+        account["deleted"] = True
+        record["entity_id"] = "0.0.{}".format(account["num"])
+        record["transfers"] += [{"account": record["entity_id"], "amount": -amount, "is_approval": False},
+                                {"account": "0.0.{}".format(target["num"]), "amount": amount, "is_approval": False}]
+        return TransactionReceipt(SUCCESS)
+
+    def _TransferTransaction(self, txn, ts, record):
+        f = txn.fields
+        hbars = defaultdict(int)
+        for accountId, amount in f.get("hbars", []):
+            hbars[accountId.num] += amount.tinybars
+        if sum(hbars.values()) != 0:
+            raise Failed("INVALID_ACCOUNT_AMOUNTS")
+        for num, amount in hbars.items():
+            account = self.account(AccountId(num))
+            if amount < 0 and not self.signed(txn, account["key"]):
+                raise Failed("INVALID_SIGNATURE")
+            if account["balance"] + amount < 0:
+                raise Failed("INSUFFICIENT_ACCOUNT_BALANCE")
+        moves = defaultdict(int)
+        for tokenId, accountId, amount in f.get("tokens", []):
+            moves[(tokenId.num, accountId.num)] += amount
+        sums = defaultdict(int)
+        for (token_num, num), amount in moves.items():
+            sums[token_num] += amount
+            token = self.token(TokenId(token_num))
+            account = self.account(AccountId(num))
+            rel = self.relation(account, token)
+            if rel["kyc"] == "REVOKED":
+                raise Failed("ACCOUNT_KYC_NOT_GRANTED_FOR_TOKEN")
+            if rel["freeze"] == "FROZEN":
+                raise Failed("ACCOUNT_FROZEN_FOR_TOKEN")
+            if amount < 0 and not self.signed(txn, account["key"]):
+                raise Failed("INVALID_SIGNATURE")
+            if rel["balance"] + amount < 0:
+                raise Failed("INSUFFICIENT_TOKEN_BALANCE")
+        if any(sums.values()):
+            raise Failed("TRANSFERS_NOT_ZERO_SUM_FOR_TOKEN")
+        nfts = []
+        for nftId, sender, receiver in f.get("nfts", []):
+            token = self.token(nftId.tokenId)
+            nft = token["nfts"].get(nftId.serial)
+            if nft is None or nft["deleted"]:
+                raise Failed("INVALID_NFT_ID")
+            src, dst = self.account(sender), self.account(receiver)
+            if nft["owner"] != src["num"]:
+                raise Failed("SENDER_DOES_NOT_OWN_NFT_SERIAL_NO")
+            if not self.signed(txn, src["key"]):
+                raise Failed("INVALID_SIGNATURE")
+            self.relation(dst, token)
+            nfts.append((token, nft, src, dst))
+        for num, amount in hbars.items():
+            self.accounts[num]["balance"] += amount
+            record["transfers"].append({"account": "0.0.{}".format(num), "amount": amount, "is_approval": False})
+        for (token_num, num), amount in moves.items():
+            self.accounts[num]["tokens"][token_num]["balance"] += amount
+            record["token_transfers"].append({"token_id": "0.0.{}".format(token_num), "account": "0.0.{}".format(num),
+                                              "amount": amount, "is_approval": False})
+        for token, nft, src, dst in nfts:
+            nft["owner"] = dst["num"]
+            src["tokens"][token["num"]]["balance"] -= 1
+            dst["tokens"][token["num"]]["balance"] += 1
+            record["nft_transfers"].append({"token_id": "0.0.{}".format(token["num"]), "serial_number": nft["serial"],
+                                            "sender_account_id": "0.0.{}".format(src["num"]),
+                                            "receiver_account_id": "0.0.{}".format(dst["num"]),
+                                            "is_approval": False})
+        return TransactionReceipt(SUCCESS)
+
+    def _TopicCreateTransaction(self, txn, ts, record):
+        f = txn.fields
+        if not self.signed(txn, f.get("adminKey")):
+            raise Failed("INVALID_SIGNATURE")
+        num = self._allocate()
+        self.topics[num] = {"num": num, "memo": f.get("memo", ""), "admin_key": f.get("adminKey"),
+                            "submit_key": f.get("submitKey"), "seq": 0, "running_hash": bytes(48),
+                            "messages": [], "created": ts, "expiry": ts // 1_000_000_000 + AUTO_RENEW,
+                            "auto_renew_account": f.get("autoRenewAccountId"), "deleted": False}
+        record["entity_id"] = "0.0.{}".format(num)
+        return TransactionReceipt(SUCCESS, topicId=TopicId(num))
+
+    def _TopicMessageSubmitTransaction(self, txn, ts, record):
+        f = txn.fields
+        topic = self.topics.get(f["topicId"].num) if f.get("topicId") else None
+        if topic is None or topic["deleted"]:
+            raise Failed("INVALID_TOPIC_ID")
+        message = f.get("message", b"")
+        if not message:
+            raise Failed("INVALID_TOPIC_MESSAGE")
+        if not self.signed(txn, topic["submit_key"]):
+            raise Failed("INVALID_SIGNATURE")
+        chunks = [message[i:i + MESSAGE_CHUNK] for i in range(0, len(message), MESSAGE_CHUNK)]
+        if len(chunks) > f.get("maxChunks", DEFAULT_MAX_CHUNKS):
+            raise Failed("MESSAGE_SIZE_TOO_LARGE")
+        payer = txn.transactionId.accountId
+        first = None
+        for i, chunk in enumerate(chunks):
+            topic["seq"] += 1
+            seconds, nanos = divmod(ts + i, 1_000_000_000)
+            topic["running_hash"] = runninghash.link_hash(
+                topic["running_hash"], (0, 0, topic["num"]), (payer.shard, payer.realm, payer.num),
+                seconds, nanos, topic["seq"], chunk)
+            msg = {"consensus_timestamp": "{}.{:09d}".format(seconds, nanos),
+                   "message": base64.b64encode(chunk).decode(),
+                   "payer_account_id": str(payer),
+                   "running_hash": base64.b64encode(topic["running_hash"]).decode(),
+                   "running_hash_version": runninghash.HASH_VERSION,
+                   "sequence_number": topic["seq"],
+                   "topic_id": "0.0.{}".format(topic["num"])}
+            if len(chunks) > 1:
+                msg["chunk_info"] = {"initial_transaction_id": mirror_txid(str(txn.transactionId)),
+                                     "number": i + 1, "total": len(chunks)}
+            topic["messages"].append(msg)
+            first = first or (topic["seq"], topic["running_hash"])
+        # later chunks take the following nanoseconds
+        self.last_ts = ts + len(chunks) - 1
+        record["entity_id"] = "0.0.{}".format(topic["num"])
+        return TransactionReceipt(SUCCESS, topicSequenceNumber=first[0], topicRunningHash=ByteString(first[1]))
+
+    def _TokenCreateTransaction(self, txn, ts, record):
+        f = txn.fields
+        if not f.get("name"):
+            raise Failed("MISSING_TOKEN_NAME")
+        if not f.get("symbol"):
+            raise Failed("MISSING_TOKEN_SYMBOL")
+        treasury = self.account(f.get("treasury") or AccountId(0), "INVALID_TREASURY_ACCOUNT_FOR_TOKEN")
+        if not self.signed(txn, treasury["key"]) or not self.signed(txn, f.get("adminKey")):
+            raise Failed("INVALID_SIGNATURE")
+        kind = f.get("tokenType", TokenType.FUNGIBLE_COMMON)
+        supply = int(f.get("initialSupply", 0))
+        if kind is TokenType.NON_FUNGIBLE_UNIQUE and (supply or f.get("decimals")):
+            raise Failed("INVALID_TOKEN_INITIAL_SUPPLY" if supply else "INVALID_TOKEN_DECIMALS")
+        if kind is TokenType.NON_FUNGIBLE_UNIQUE and f.get("supplyKey") is None:
+            raise Failed("TOKEN_HAS_NO_SUPPLY_KEY")
+        num = self._allocate()
+        token = {"num": num, "type": kind, "name": f["name"], "symbol": f["symbol"],
+                 "decimals": int(f.get("decimals", 0)), "total_supply": supply,
+                 "max_supply": int(f.get("maxSupply", 0)), "treasury": treasury["num"],
+                 "admin_key": f.get("adminKey"), "kyc_key": f.get("kycKey"), "freeze_key": f.get("freezeKey"),
+                 "wipe_key": f.get("wipeKey"), "supply_key": f.get("supplyKey"),
+                 "fee_schedule_key": f.get("feeScheduleKey"), "freeze_default": bool(f.get("freezeDefault")),
+                 "memo": f.get("memo", ""), "created": ts, "expiry": ts // 1_000_000_000 + AUTO_RENEW,
+                 "auto_renew_account": f.get("autoRenewAccountId") or AccountId(treasury["num"]),
+                 "deleted": False, "nfts": {}, "next_serial": 1}
+        self.tokens[num] = token
+        treasury["tokens"][num] = {"balance": supply, "created": ts,
+                                   "kyc": "GRANTED" if token["kyc_key"] else "NOT_APPLICABLE",
+                                   "freeze": "UNFROZEN" if token["freeze_key"] else "NOT_APPLICABLE"}
+        record["entity_id"] = "0.0.{}".format(num)
+        if supply:
+            record["token_transfers"].append({"token_id": record["entity_id"], "amount": supply,
+                                              "account": "0.0.{}".format(treasury["num"]), "is_approval": False})
+        return TransactionReceipt(SUCCESS, tokenId=TokenId(num))
+
+    def _TokenMintTransaction(self, txn, ts, record):
+        f = txn.fields
+        token = self.token(f.get("tokenId"))
+        if token["supply_key"] is None:
+            raise Failed("TOKEN_HAS_NO_SUPPLY_KEY")
+        if not self.signed(txn, token["supply_key"]):
+            raise Failed("INVALID_SIGNATURE")
+        treasury = self.accounts[token["treasury"]]
+        rel = treasury["tokens"][token["num"]]
+        metadata = f.get("metadata", [])
+        token_id = "0.0.{}".format(token["num"])
+        if token["type"] is TokenType.NON_FUNGIBLE_UNIQUE:
+            if f.get("amount"):
+                raise Failed("INVALID_TOKEN_MINT_AMOUNT")
+            if not metadata:
+                raise Failed("INVALID_TOKEN_MINT_METADATA")
+            if len(metadata) > MAX_BATCH:
+                raise Failed("BATCH_SIZE_LIMIT_EXCEEDED")
+            if token["max_supply"] and token["total_supply"] + len(metadata) > token["max_supply"]:
+                raise Failed("TOKEN_MAX_SUPPLY_REACHED")
+            serials = ArrayList()
+            for meta in metadata:
+                serial = token["next_serial"]
+                token["next_serial"] += 1
+                token["nfts"][serial] = {"serial": serial, "owner": treasury["num"], "metadata": meta,
+                                         "created": ts, "deleted": False}
+                serials.add(serial)
+                record["nft_transfers"].append({"token_id": token_id, "serial_number": serial,
+                                                "sender_account_id": None,
+                                                "receiver_account_id": "0.0.{}".format(treasury["num"]),
+                                                "is_approval": False})
+            token["total_supply"] += len(metadata)
+            rel["balance"] += len(metadata)
+        else:
+            amount = int(f.get("amount", 0))
+            if metadata or amount <= 0:
+                raise Failed("INVALID_TOKEN_MINT_AMOUNT")
+            if token["max_supply"] and token["total_supply"] + amount > token["max_supply"]:
+                raise Failed("TOKEN_MAX_SUPPLY_REACHED")
+            serials = ArrayList()
+            token["total_supply"] += amount
+            rel["balance"] += amount
+            record["token_transfers"].append({"token_id": token_id, "account": "0.0.{}".format(treasury["num"]),
+                                              "amount": amount, "is_approval": False})
+        record["entity_id"] = token_id
+        return TransactionReceipt(SUCCESS, totalSupply=token["total_supply"], serials=serials)
+
+    def _remove_units(self, txn, record, key_name, account, status_not_owned):
+        "shared by burn (from the treasury) and wipe (from an account)"
+        f = txn.fields
+        token = self.token(f.get("tokenId"))
+        if token[key_name] is None:
+            raise Failed("TOKEN_HAS_NO_SUPPLY_KEY" if key_name == "supply_key" else "TOKEN_HAS_NO_WIPE_KEY")
+        if not self.signed(txn, token[key_name]):
+            raise Failed("INVALID_SIGNATURE")
+        if account is None:
+            account = self.accounts[token["treasury"]]
+        elif account["num"] == token["treasury"]:
+            raise Failed("CANNOT_WIPE_TOKEN_TREASURY_ACCOUNT")
+        rel = self.relation(account, token)
+        serials = f.get("serials", [])
+        token_id = "0.0.{}".format(token["num"])
+        if token["type"] is TokenType.NON_FUNGIBLE_UNIQUE:
+            if not serials:
+                raise Failed("INVALID_NFT_ID")
+            if len(serials) > MAX_BATCH:
+                raise Failed("BATCH_SIZE_LIMIT_EXCEEDED")
+            if len(set(serials)) != len(serials):
+                raise Failed("INVALID_NFT_ID")
+            for serial in serials:
+                nft = token["nfts"].get(serial)
+                if nft is None or nft["deleted"]:
+                    raise Failed("INVALID_NFT_ID")
+                if nft["owner"] != account["num"]:
+                    raise Failed(status_not_owned)
+            for serial in serials:
+                token["nfts"][serial]["deleted"] = True
+                record["nft_transfers"].append({"token_id": token_id, "serial_number": serial,
+                                                "sender_account_id": "0.0.{}".format(account["num"]),
+                                                "receiver_account_id": None, "is_approval": False})
+            amount = len(serials)
+        else:
+            amount = int(f.get("amount", 0))
+            if serials or amount <= 0:
+                raise Failed("INVALID_TOKEN_BURN_AMOUNT" if key_name == "supply_key" else "INVALID_WIPING_AMOUNT")
+            if rel["balance"] < amount:
+                raise Failed("INSUFFICIENT_TOKEN_BALANCE")
+            record["token_transfers"].append({"token_id": token_id, "account": "0.0.{}".format(account["num"]),
+                                              "amount": -amount, "is_approval": False})
+        rel["balance"] -= amount
+        token["total_supply"] -= amount
+        record["entity_id"] = token_id
+        return TransactionReceipt(SUCCESS, totalSupply=token["total_supply"])
+
+    def _TokenBurnTransaction(self, txn, ts, record):
+        return self._remove_units(txn, record, "supply_key", None, "TREASURY_MUST_OWN_BURNED_NFT")
+
+    def _TokenWipeTransaction(self, txn, ts, record):
+        account = self.account(txn.fields.get("accountId") or AccountId(0))
+        return self._remove_units(txn, record, "wipe_key", account, "ACCOUNT_DOES_NOT_OWN_WIPED_NFT")
+
+    def _TokenAssociateTransaction(self, txn, ts, record):
+        f = txn.fields
+        account = self.account(f.get("accountId") or AccountId(0))
+        if not self.signed(txn, account["key"]):
+            raise Failed("INVALID_SIGNATURE")
+        tokens = [self.token(t) for t in f.get("tokenIds", [])]
+        for token in tokens:
+            if token["num"] in account["tokens"]:
+                raise Failed("TOKEN_ALREADY_ASSOCIATED_TO_ACCOUNT")
+        for token in tokens:
+            freeze = "NOT_APPLICABLE"
+            if token["freeze_key"]:
+                freeze = "FROZEN" if token["freeze_default"] else "UNFROZEN"
+            account["tokens"][token["num"]] = {"balance": 0, "created": ts, "freeze": freeze,
+                                               "kyc": "REVOKED" if token["kyc_key"] else "NOT_APPLICABLE"}
+        return TransactionReceipt(SUCCESS)
+
+    def _TokenGrantKycTransaction(self, txn, ts, record):
+        f = txn.fields
+        token = self.token(f.get("tokenId"))
+        account = self.account(f.get("accountId") or AccountId(0))
+        if token["kyc_key"] is None:
+            raise Failed("TOKEN_HAS_NO_KYC_KEY")
+        if not self.signed(txn, token["kyc_key"]):
+            raise Failed("INVALID_SIGNATURE")
+        self.relation(account, token)["kyc"] = "GRANTED"
+        return TransactionReceipt(SUCCESS)
+
+    def _file(self, fileId):
+        file = self.files.get(fileId.num) if fileId else None
+        if file is None:
+            raise Failed("INVALID_FILE_ID")
+        if file["deleted"]:
+            raise Failed("FILE_DELETED")
+        return file
+
+    def _FileCreateTransaction(self, txn, ts, record):
+        f = txn.fields
+        contents = f.get("contents", b"")
+        if len(contents) > MAX_FILE_SIZE:
+            raise Failed("MAX_FILE_SIZE_EXCEEDED")
+        keys = f.get("keys", [])
+        if not all(self.signed(txn, k) for k in keys):
+            raise Failed("INVALID_SIGNATURE")
+        num = self._allocate()
+        self.files[num] = {"num": num, "memo": f.get("memo", ""), "keys": keys, "contents": bytearray(contents),
+                           "deleted": False, "expiry": ts // 1_000_000_000 + AUTO_RENEW}
+        record["entity_id"] = "0.0.{}".format(num)
+        return TransactionReceipt(SUCCESS, fileId=FileId(num))
+
+    def _FileAppendTransaction(self, txn, ts, record):
+        f = txn.fields
+        file = self._file(f.get("fileId"))
+        contents = f.get("contents", b"")
+        if math.ceil(len(contents) / FILE_CHUNK) > f.get("maxChunks", DEFAULT_MAX_CHUNKS):
+            raise Failed("MAX_CHUNKS_EXCEEDED")
+        if not all(self.signed(txn, k) for k in file["keys"]):
+            raise Failed("INVALID_SIGNATURE")
+        if len(file["contents"]) + len(contents) > MAX_FILE_SIZE:
+            raise Failed("MAX_FILE_SIZE_EXCEEDED")
+        file["contents"] += contents
+        record["entity_id"] = "0.0.{}".format(file["num"])
+        return TransactionReceipt(SUCCESS)
+
+    def _FileDeleteTransaction(self, txn, ts, record):
+        file = self._file(txn.fields.get("fileId"))
+        if not file["keys"]:
+            raise Failed("UNAUTHORIZED")
+        if not all(self.signed(txn, k) for k in file["keys"]):
+            raise Failed("INVALID_SIGNATURE")
+        file["deleted"] = True
+        file["contents"] = bytearray()
+        record["entity_id"] = "0.0.{}".format(file["num"])
+        return TransactionReceipt(SUCCESS)
+
+    def _ContractCreateTransaction(self, txn, ts, record):
+        f = txn.fields
+        file = self._file(f.get("bytecodeFileId"))
+        if not file["contents"]:
+            raise Failed("CONTRACT_FILE_EMPTY")
+        if not f.get("gas"):
+            raise Failed("INSUFFICIENT_GAS")
+        if not self.signed(txn, f.get("adminKey")):
+            raise Failed("INVALID_SIGNATURE")
+        num = self._allocate()
+        self._new_account(num, f.get("adminKey"), 0)["created"] = ts
+        self.contracts[num] = {"num": num, "admin_key": f.get("adminKey"), "file": file["num"],
+                               "memo": f.get("memo", ""), "created": ts, "deleted": False,
+                               "expiry": ts // 1_000_000_000 + AUTO_RENEW, "gas": f["gas"],
+                               "bytecode": bytes(file["contents"])}
+        record["entity_id"] = "0.0.{}".format(num)
+        return TransactionReceipt(SUCCESS, contractId=ContractId(num))
+
+    # queries
+
+    def query(self, q, client):
+        kind = type(q).__name__
+        with self.lock:
+            index = self.counters[kind]
+            self.counters[kind] += 1
+        time.sleep(self._latency(self._rng(kind, index), kind, "query_ms"))
+        metrics.incr("sim.query." + kind)
+        with self.lock:
+            self.advance()
+            if q.paid and client.operatorAccountId is not None:
+                payer = self.accounts.get(client.operatorAccountId.num)
+                if payer is None or payer["balance"] < QUERY_FEE:
+                    raise _precheck_error(None, "INSUFFICIENT_PAYER_BALANCE")
+                payer["balance"] -= QUERY_FEE
+                self.accounts[FEE_COLLECTOR]["balance"] += QUERY_FEE
+                metrics.incr("sim.fees_tinybars." + kind, QUERY_FEE)
+            try:
+                return getattr(self, "_" + kind)(q.fields)
+            except Failed as e:
+                raise _precheck_error(None, e.args[0])
+
+    def _token_map(self, account):
+        return HashMap((TokenId(num), rel["balance"]) for num, rel in account["tokens"].items())
+
+    def _AccountBalanceQuery(self, f):
+        account = self.account(f.get("accountId") or AccountId(0))
+        decimals = HashMap((TokenId(num), self.tokens[num]["decimals"]) for num in account["tokens"])
+        return Info("AccountBalance", hbars=Hbar.fromTinybars(account["balance"]),
+                    tokens=self._token_map(account), tokenDecimals=decimals)
+
+    def _AccountInfoQuery(self, f):
+        account = self.account(f.get("accountId") or AccountId(0))
+        rels = HashMap()
+        for num, rel in account["tokens"].items():
+            token = self.tokens[num]
+            rels[TokenId(num)] = Info("TokenRelationship", tokenId=TokenId(num), symbol=token["symbol"],
+                                      balance=rel["balance"], decimals=token["decimals"],
+                                      kycStatus={"GRANTED": True, "REVOKED": False}.get(rel["kyc"]),
+                                      freezeStatus={"FROZEN": True, "UNFROZEN": False}.get(rel["freeze"]))
+        return Info("AccountInfo", accountId=AccountId(account["num"]), key=account["key"],
+                    balance=Hbar.fromTinybars(account["balance"]), isDeleted=account["deleted"],
+                    isReceiverSignatureRequired=account["receiver_sig_required"], accountMemo=account["memo"],
+                    tokenRelationships=rels, ownedNfts=sum(
+                        1 for num in account["tokens"] for nft in self.tokens[num]["nfts"].values()
+                        if nft["owner"] == account["num"] and not nft["deleted"]))
+
+    def _TopicInfoQuery(self, f):
+        topic = self.topics.get(f["topicId"].num) if f.get("topicId") else None
+        if topic is None or topic["deleted"]:
+            raise Failed("INVALID_TOPIC_ID")
+        return Info("TopicInfo", topicId=TopicId(topic["num"]), topicMemo=topic["memo"],
+                    adminKey=topic["admin_key"], submitKey=topic["submit_key"], sequenceNumber=topic["seq"],
+                    runningHash=ByteString(topic["running_hash"]), expirationTime=Instant(topic["expiry"]),
+                    autoRenewAccountId=topic["auto_renew_account"], autoRenewPeriod=Duration(AUTO_RENEW))
+
+    def _TokenInfoQuery(self, f):
+        token = self.token(f.get("tokenId"))
+        return Info("TokenInfo", tokenId=TokenId(token["num"]), tokenType=token["type"], name=token["name"],
+                    symbol=token["symbol"], decimals=token["decimals"], totalSupply=token["total_supply"],
+                    maxSupply=token["max_supply"], treasuryAccountId=AccountId(token["treasury"]),
+                    adminKey=token["admin_key"], kycKey=token["kyc_key"], freezeKey=token["freeze_key"],
+                    wipeKey=token["wipe_key"], supplyKey=token["supply_key"],
+                    feeScheduleKey=token["fee_schedule_key"],
+                    defaultFreezeStatus=token["freeze_default"] if token["freeze_key"] else None,
+                    defaultKycStatus=False if token["kyc_key"] else None,
+                    expirationTime=Instant(token["expiry"]), autoRenewAccount=token["auto_renew_account"],
+                    autoRenewPeriod=Duration(AUTO_RENEW), tokenMemo=token["memo"], customFees=ArrayList(),
+                    isDeleted=token["deleted"])
+
+    def _nft_info(self, token, nft):
+        return Info("TokenNftInfo", nftId=NftId(TokenId(token["num"]), nft["serial"]),
+                    accountId=AccountId(nft["owner"]), metadata=ByteArray(nft["metadata"]),
+                    creationTime=Instant.of_nanos(nft["created"]))
+
+    def _TokenNftInfoQuery(self, f):
+        if f.get("nftId"):
+            token = self.token(f["nftId"].tokenId)
+            nft = token["nfts"].get(f["nftId"].serial)
+            if nft is None or nft["deleted"]:
+                raise Failed("INVALID_NFT_ID")
+            return ArrayList([self._nft_info(token, nft)])
+        token = self.token(f.get("tokenId"))
+        live = [n for n in token["nfts"].values() if not n["deleted"]]
+        start, end = int(f.get("start", 0)), int(f.get("end", len(live)))
+        return ArrayList(self._nft_info(token, n) for n in live[start:end])
+
+    def _FileInfoQuery(self, f):
+        file = self.files.get(f["fileId"].num) if f.get("fileId") else None
+        if file is None:
+            raise Failed("INVALID_FILE_ID")
+        return Info("FileInfo", fileId=FileId(file["num"]), size=len(file["contents"]), fileMemo=file["memo"],
+                    isDeleted=file["deleted"], expirationTime=Instant(file["expiry"]),
+                    keys=ArrayList(file["keys"]))
+
+    def _FileContentsQuery(self, f):
+        return ByteString(bytes(self._file(f.get("fileId"))["contents"]))
+
+    def _ContractInfoQuery(self, f):
+        contract = self.contracts.get(f["contractId"].num) if f.get("contractId") else None
+        if contract is None:
+            raise Failed("INVALID_CONTRACT_ID")
+        account = self.accounts[contract["num"]]
+        return Info("ContractInfo", contractId=ContractId(contract["num"]), accountId=AccountId(contract["num"]),
+                    adminKey=contract["admin_key"], expirationTime=Instant(contract["expiry"]),
+                    autoRenewPeriod=Duration(AUTO_RENEW), storage=len(contract["bytecode"]),
+                    contractMemo=contract["memo"], balance=Hbar.fromTinybars(account["balance"]),
+                    isDeleted=contract["deleted"])
+
+    def _ContractCallQuery(self, f):
+        contract = self.contracts.get(f["contractId"].num) if f.get("contractId") else None
+        if contract is None:
+            raise Failed("INVALID_CONTRACT_ID")
+        return ContractFunctionResult(errorMessage="the simulator doesn't execute contract code")
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def ledger(config=None):
+    "the process wide simulated network"
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = Ledger(config)
+        return _ledger
+
+
+_JAVA_CLASSES = {
+    "java.util.ArrayList": ArrayList,
+    "java.util.HashMap": HashMap,
+    "java.lang.Long": Long,
+    "java.time.Instant": Instant,
+    "java.time.Duration": Duration,
+    "com.google.protobuf.ByteString": ByteString,
+    }
+
+
+def _autoclass(name):
+    if name in _JAVA_CLASSES:
+        return _JAVA_CLASSES[name]
+    short = name.rsplit(".", 1)[-1]
+    if name.startswith("com.hedera.hashgraph.sdk.") and short in globals():
+        return globals()[short]
+    raise JavaException("java.lang.ClassNotFoundException", name)
+
+
+def install(config=None):
+    """make `import hedera` and `import jnius` load the simulator, in this process and
+    (through HEDERA_CLI_SIMULATE) in spawned workers.  Must run before hedera_cli.hedera_cli
+    is imported.
+    """
+    os.environ["HEDERA_CLI_SIMULATE"] = "1"
+    if config:
+        os.environ["HEDERA_SIM_CONFIG"] = config
+    jnius = types.ModuleType("jnius")
+    jnius.autoclass = _autoclass
+    jnius.cast = lambda name, obj: obj
+    jnius.JavaException = JavaException
+    sys.modules["jnius"] = jnius
+    sys.modules["hedera"] = sys.modules[__name__]
+
+
+def install_in_worker():
+    "called by pool workers before importing hedera"
+    if os.environ.get("HEDERA_CLI_SIMULATE"):
+        install()
+
+
+def genesis_operator():
+    "(account id, private key) of a funded operator, for when none is configured"
+    led = ledger()
+    key = led._seeded_key("operator")
+    led.ensure_operator(AccountId(TREASURY), key.getPublicKey())
+    return "0.0.{}".format(TREASURY), str(key)
+
+
+def start(config=None):
+    """set up `hedera-cli --simulate`: install the SDK stand-in, keep the CLI's files in
+    a scratch directory, fund an operator if none is configured and serve the mirror
+    node stub.  returns the stub's URL
+    """
+    install(config)
+    from hedera_cli import mirrorstub
+    os.environ["HEDERA_NETWORK"] = NETWORK
+    os.environ.setdefault("HEDERA_CLI_HOME", tempfile.mkdtemp(prefix="hedera-cli-sim-"))
+    os.environ.setdefault("HEDERA_HBAR_PRICE", "0.05")
+    if not (os.environ.get("HEDERA_OPERATOR_ID") and os.environ.get("HEDERA_OPERATOR_KEY")):
+        os.environ["HEDERA_OPERATOR_ID"], os.environ["HEDERA_OPERATOR_KEY"] = genesis_operator()
+    return mirrorstub.start(ledger())
@@ -0,0 +1,30 @@
+import os
+import json
+
+
+def data_dir():
+    "where hedera-cli keeps its local state, ~/.hedera-cli unless HEDERA_CLI_HOME is set"
+    path = os.environ.get("HEDERA_CLI_HOME") or os.path.join(os.path.expanduser("~"), ".hedera-cli")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def data_path(*parts):
+    path = os.path.join(data_dir(), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def load_json(path, default=None):
+    if not os.path.isfile(path):
+        return default
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def save_json(path, data):
+    "write to a temp file first so a crash never leaves a half written file"
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
@@ -0,0 +1,88 @@
+import time
+import hashlib
+import threading
+
+from hedera_cli.store import data_path, load_json, save_json
+
+# files are created with the network's default 90 days expiry
+DEFAULT_EXPIRY = 90 * 24 * 3600
+
+
+def to_bytes(contents):
+    return contents.encode() if isinstance(contents, str) else bytes(contents)
+
+
+def digest(contents):
+    return hashlib.sha256(to_bytes(contents)).hexdigest()
+
+
+class UploadIndex:
+    """Content addressed index of the files we uploaded, per network:
+    sha256 of the contents -> file id, and file id -> hash, size, expiry and the
+    public key that controls it.  Entries are hints, callers verify them with
+    FileInfoQuery before reusing a file.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or data_path("uploads.json")
+        self.data = load_json(self.path, {})
+        self.lock = threading.Lock()
+
+    def _net(self, network):
+        return self.data.setdefault(network, {"by_hash": {}, "files": {}})
+
+    def lookup(self, network, contents, key, memo=None):
+        """file id of a live upload of the same contents controlled by `key`, and with
+        `memo` unless it's None, if any
+        """
+        net = self._net(network)
+        file_id = net["by_hash"].get(digest(contents))
+        entry = net["files"].get(file_id)
+        if entry is None or entry["key"] != key or entry["expiry"] < time.time():
+            return None
+        if memo is not None and entry.get("memo", "") != memo:
+            return None
+        return file_id
+
+    def file(self, network, file_id):
+        return self._net(network)["files"].get(file_id)
+
+    def record(self, network, file_id, contents, key, expiry=None, memo=None):
+        "memo None keeps the memo already recorded for file_id"
+        data = to_bytes(contents)
+        h = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            if memo is None:
+                memo = (self.file(network, file_id) or {}).get("memo", "")
+            self._forget(network, file_id)
+            net = self._net(network)
+            net["by_hash"][h] = file_id
+            net["files"][file_id] = {"hash": h,
+                                     "size": len(data),
+                                     "expiry": expiry or time.time() + DEFAULT_EXPIRY,
+                                     "key": key,
+                                     "memo": memo}
+            save_json(self.path, self.data)
+
+    def forget(self, network, file_id):
+        with self.lock:
+            self._forget(network, file_id)
+            save_json(self.path, self.data)
+
+    def _forget(self, network, file_id):
+        net = self._net(network)
+        entry = net["files"].pop(file_id, None)
+        if entry and net["by_hash"].get(entry["hash"]) == file_id:
+            del net["by_hash"][entry["hash"]]
+
+    def delta(self, network, file_id, contents, size):
+        """if `contents` starts with what we know file_id holds (and the file still has
+        `size` bytes), return only the new bytes, empty if there are none, otherwise None
+        """
+        entry = self.file(network, file_id)
+        data = to_bytes(contents)
+        if entry is None or entry["size"] != size or len(data) < size:
+            return None
+        if hashlib.sha256(data[:size]).hexdigest() != entry["hash"]:
+            return None
+        return data[size:]
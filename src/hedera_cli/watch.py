@@ -0,0 +1,156 @@
+"""`watch`: poll info and balance commands, printing only what changed.
+
+Each watched command is an item fed by a source, the request behind it.  Items
+making the same request share a source, so it's made once per poll however many
+items need it.  An item gives a snapshot, a flat dict of the fields it shows;
+the first one is printed whole and after that only the fields that changed.
+A source that found nothing new is polled half as often the next time, up to
+`max_interval`, and back at `interval` as soon as something changes.
+
+Mirror node sources keep a cursor instead (the last consensus timestamp or
+sequence number seen) and ask only for the rows after it, see `Cursor`.
+"""
+import time
+import heapq
+
+from colorama import Fore, Style
+
+DEFAULT_INTERVAL = 5.0
+BACKOFF = 2.0
+MAX_BACKOFF = 12  # max_interval defaults to interval * MAX_BACKOFF
+
+
+def diff(old, new):
+    "lines describing how snapshot `new` differs from `old`"
+    lines = []
+    for field, value in new.items():
+        if field not in old:
+            lines.append("+ {}: {}".format(field, value))
+        elif old[field] != value:
+            lines.append("{}: {} -> {}".format(field, old[field], value))
+    for field, value in old.items():
+        if field not in new:
+            lines.append("- {}: {}".format(field, value))
+    return lines
+
+
+class Cursor:
+    """the rows of a mirror node list past the last one seen, following links.next.
+    `pages(params)` yields pages, `rows(page)` gives a page's rows and `position(row)`
+    the value of `param` to continue after, e.g. a consensus timestamp.
+    The first poll only finds where the list ends
+    """
+
+    def __init__(self, pages, rows, param, position, start=None):
+        self.pages = pages
+        self.rows = rows
+        self.param = param
+        self.position = position
+        self.last = start
+
+    def poll(self):
+        if self.last is None:
+            for page in self.pages({"order": "desc", "limit": 1}):
+                found = self.rows(page)
+                self.last = self.position(found[0]) if found else 0
+                break
+            return []
+        new = []
+        for page in self.pages({"order": "asc", self.param: "gt:{}".format(self.last)}):
+            new.extend(self.rows(page))
+        if new:
+            self.last = self.position(new[-1])
+        return new
+
+
+class Source:
+    __slots__ = ("key", "poll", "items", "interval")
+
+    def __init__(self, key, poll):
+        self.key = key
+        # returns (data for the items, lines to print once)
+        self.poll = poll
+        self.items = []
+        self.interval = None
+
+
+class Item:
+    __slots__ = ("label", "render", "snapshot")
+
+    def __init__(self, label, render):
+        self.label = label
+        # render(data, first) gives the item's snapshot, None if it didn't change
+        self.render = render
+        self.snapshot = None
+
+
+class Watcher:
+    def __init__(self, interval=DEFAULT_INTERVAL, max_interval=None):
+        self.interval = interval
+        self.max_interval = max(max_interval or interval * MAX_BACKOFF, interval)
+        self.sources = {}
+        self.polls = 0
+
+    def source(self, key, poll):
+        "the source making request `key`, `poll` makes it if it's a new one"
+        if key not in self.sources:
+            self.sources[key] = Source(key, poll)
+        return self.sources[key]
+
+    def add(self, label, source, render=None):
+        if any(item.label == label for item in source.items):
+            return
+        source.items.append(Item(label, render or (lambda data, first: data)))
+
+    def tick(self, source):
+        "poll one source, print what changed, returns whether anything did"
+        stamp = time.strftime("%H:%M:%S")
+        data, events = source.poll()
+        self.polls += 1
+        changed = bool(events)
+        for line in events:
+            print("{} {}".format(stamp, line))
+        for item in source.items:
+            first = item.snapshot is None
+            snapshot = item.render(data, first)
+            if snapshot is None:
+                continue
+            if first:
+                print(Fore.YELLOW + "{} {}".format(stamp, item.label) + Style.RESET_ALL)
+                for field, value in snapshot.items():
+                    print("    {}: {}".format(field, value))
+            else:
+                lines = diff(item.snapshot, snapshot)
+                if lines:
+                    changed = True
+                    print(Fore.YELLOW + "{} {}".format(stamp, item.label) + Style.RESET_ALL)
+                    for line in lines:
+                        print("    " + line)
+            item.snapshot = snapshot
+        return changed
+
+    def run(self, duration=None):
+        "poll until interrupted, or for `duration` seconds"
+        start = time.monotonic()
+        queue = []
+        for n, source in enumerate(self.sources.values()):
+            source.interval = self.interval
+            heapq.heappush(queue, (start, n, source))
+        while queue:
+            due, n, source = heapq.heappop(queue)
+            now = time.monotonic()
+            if duration is not None and due - start > duration:
+                break
+            if due > now:
+                time.sleep(due - now)
+            try:
+                changed = self.tick(source)
+            except Exception as e:
+                print(Fore.RED + "{} {}: {}".format(time.strftime("%H:%M:%S"), " ".join(source.key), e)
+                      + Style.RESET_ALL)
+                changed = False
+            if changed:
+                source.interval = self.interval
+            else:
+                source.interval = min(source.interval * BACKOFF, self.max_interval)
+            heapq.heappush(queue, (time.monotonic() + source.interval, n, source))
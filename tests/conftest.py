@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.fixture(scope="session")
+def cli():
+    "a HederaCli on the simulated network, shared by the tests that need one"
+    from hedera_cli import simulator
+    url = simulator.start('{"mirror_lag_ms": 0}')
+    from hedera_cli import hedera_cli
+    hedera_cli.mirror_address["simulator"] = url
+    return hedera_cli.HederaCli()
+
+
+@pytest.fixture
+def new_account(cli):
+    "creates an account with its own key, returns (account id, private key)"
+    def create(hbars=100):
+        from hedera import AccountCreateTransaction, Hbar, PrivateKey
+        key = PrivateKey.generateED25519()
+        receipt = (AccountCreateTransaction()
+                   .setKey(key.getPublicKey())
+                   .setInitialBalance(Hbar(hbars))
+                   .execute(cli.client)
+                   .getReceipt(cli.client))
+        return receipt.accountId.toString(), str(key)
+    return create
@@ -0,0 +1,70 @@
+import pytest
+
+from hedera_cli import abi
+
+
+def test_keccak256():
+    assert abi.keccak256(b"").hex() == "c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"
+    # longer than one 136 byte block
+    assert abi.keccak256(b"a" * 200) != abi.keccak256(b"a" * 199)
+
+
+def test_selector():
+    entry = {"name": "transfer", "type": "function",
+             "inputs": [{"name": "to", "type": "address"}, {"name": "value", "type": "uint"}],
+             "outputs": [{"type": "bool"}], "stateMutability": "nonpayable"}
+    f = abi.Function(entry)
+    assert f.signature == "transfer(address,uint256)"
+    assert f.selector.hex() == "a9059cbb"
+    assert not f.read_only
+    data = f.encode_input(["0.0.1234", 5])
+    assert len(data) == 4 + 64
+    assert data[4 + 12:4 + 32] == abi.entity_to_address("0.0.1234")
+    assert f.decode_output(abi.encode(["bool"], [True])) == [True]
+
+
+def test_entity_to_address():
+    assert abi.entity_to_address("0.0.1234") == bytes(18) + (1234).to_bytes(2, "big")
+
+
+def test_round_trip():
+    types = ["uint256", "int8", "string", "bytes", "uint256[]", "bool[2]", "bytes4", "address"]
+    values = [2 ** 255, -5, "hello", "0x0102", [1, 2, 3], [True, False], "0xdeadbeef",
+              "0x" + "11" * 20]
+    data = abi.encode(types, values)
+    assert len(data) % 32 == 0
+    assert abi.decode(types, data) == [2 ** 255, -5, "hello", "0x0102", [1, 2, 3], [True, False],
+                                       "0xdeadbeef", "0x" + "11" * 20]
+
+
+def test_static_array_head():
+    assert not abi.is_dynamic("uint256[3]")
+    assert abi.is_dynamic("string[2]")
+    assert abi.head_size("uint256[3]") == 96
+    data = abi.encode(["uint256[3]", "string"], [[1, 2, 3], "x"])
+    # the string's offset points past the 3 inline words and its own head
+    assert int.from_bytes(data[96:128], "big") == 128
+    assert abi.decode(["uint256[3]", "string"], data) == [[1, 2, 3], "x"]
+
+
+def test_range_checks():
+    for t, v in (("uint8", 256), ("uint8", -1), ("int8", 128), ("bytes2", "0x010203")):
+        try:
+            abi.encode_single(t, v)
+        except ValueError:
+            continue
+        raise AssertionError("{} accepted {}".format(t, v))
+
+
+def test_parse_args():
+    assert abi.parse_args(["uint256", "bool"], "5, true") == ["5", "true"]
+    assert abi.parse_args(["uint256", "uint256[]"], "[5, [1, 2]]") == [5, [1, 2]]
+    assert abi.parse_args(["uint256[]", "string"], '"[1, 2]", "a, b"') == [[1, 2], "a, b"]
+    assert abi.parse_args(["uint256"], '["0x10"]') == ["0x10"]
+    assert abi.parse_args([], "") == []
+
+
+@pytest.mark.parametrize("line", ["1, 2, 3", "1", "", "[1]"])
+def test_parse_args_count(line):
+    with pytest.raises(ValueError, match="expected 2 arguments"):
+        abi.parse_args(["uint256", "string"], line)
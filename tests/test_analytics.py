@@ -0,0 +1,91 @@
+import pytest
+
+from hedera_cli.analytics import DAY, HBAR, ns, rows, split, split_range, timestamp
+
+
+def test_ns_timestamp():
+    assert ns("1700000000.5") == 1_700_000_000_500_000_000
+    assert timestamp(ns("1700000000.000000042")) == "1700000000.000000042"
+
+
+def test_split():
+    assert split(10, [1, 1, 1]) == [4, 3, 3]
+    assert split(-10, [1, 3]) == [-3, -7]
+    assert sum(split(1_000_003, [7, 11, 13])) == 1_000_003
+
+
+def covered(since, until):
+    buckets, raw = split_range(since, until)
+    parts = [(first * span * DAY, (last + 1) * span * DAY - 1) for span, first, last in buckets] + raw
+    return buckets, raw, sorted(parts)
+
+
+@pytest.mark.parametrize("since,until", [
+    (0, 64 * DAY - 1),
+    (DAY + 5, 33 * DAY),
+    (5, 40 * DAY + 17),
+    (3 * DAY, 3 * DAY + 10),
+    (100 * DAY - 1, 100 * DAY),
+    ])
+def test_split_range_covers_exactly(since, until):
+    _, _, parts = covered(since, until)
+    assert parts[0][0] == since and parts[-1][1] == until
+    for (_, hi), (lo, _) in zip(parts, parts[1:]):
+        assert lo == hi + 1
+
+
+def test_split_range_buckets():
+    assert split_range(0, 64 * DAY - 1) == ([(32, 0, 1)], [])
+    buckets, raw, _ = covered(DAY + 5, 33 * DAY)
+    assert buckets == [(1, 2, 32)]
+    assert raw == [(DAY + 5, 2 * DAY - 1), (33 * DAY, 33 * DAY)]
+    assert split_range(5, 70 * DAY) == ([(32, 1, 1), (1, 1, 31), (1, 64, 69)],
+                                        [(5, DAY - 1), (70 * DAY, 70 * DAY)])
+    assert split_range(10, 5) == ([], [])
+
+
+def transfer(payer, transfers, token_transfers=(), nft_transfers=()):
+    return {"consensus_timestamp": "1700000000.000000001",
+            "transaction_id": "{}-1700000000-000000000".format(payer),
+            "name": "CRYPTOTRANSFER", "result": "SUCCESS", "node": "0.0.3", "charged_tx_fee": 100,
+            "transfers": [{"account": a, "amount": n} for a, n in transfers],
+            "token_transfers": [{"token_id": t, "account": a, "amount": n} for t, a, n in token_transfers],
+            "nft_transfers": [{"token_id": t, "sender_account_id": s, "receiver_account_id": r,
+                               "serial_number": n} for t, s, r, n in nft_transfers]}
+
+
+HBAR_SEND = [("0.0.2", -1_100_000_100), ("0.0.1001", 1_100_000_000), ("0.0.3", 40), ("0.0.98", 60)]
+
+
+def parties(legs):
+    return {(party, token, amount) for _, _, party, token, amount, _ in legs}
+
+
+def test_rows_receiver_ignores_fees_it_didnt_pay():
+    txs_row, legs = rows("0.0.1001", transfer("0.0.2", HBAR_SEND))
+    assert txs_row[3:] == ("CRYPTOTRANSFER", "SUCCESS", "0.0.2", 100)
+    assert parties(legs) == {("0.0.1001", HBAR, 1_100_000_000), ("0.0.2", HBAR, 1_100_000_000)}
+
+
+def test_rows_payer_splits_over_recipients():
+    _, legs = rows("0.0.2", transfer("0.0.2", HBAR_SEND))
+    assert parties(legs) == {("0.0.2", HBAR, -1_100_000_100), ("0.0.1001", HBAR, -1_100_000_000),
+                             ("0.0.3", HBAR, -40), ("0.0.98", HBAR, -60)}
+
+
+def test_rows_uninvolved_account():
+    _, legs = rows("0.0.5000", transfer("0.0.2", HBAR_SEND))
+    assert legs == []
+
+
+def test_rows_tokens():
+    tx = transfer("0.0.2", HBAR_SEND[:1] + [("0.0.3", 40), ("0.0.98", 1_100_000_060)],
+                  token_transfers=[("0.0.77", "0.0.2", -30), ("0.0.77", "0.0.1001", 10),
+                                   ("0.0.77", "0.0.1002", 20)],
+                  nft_transfers=[("0.0.88", "0.0.1002", "0.0.1001", 7),
+                                 ("0.0.88", "0.0.1002", "0.0.1003", 8)])
+    _, legs = rows("0.0.1001", tx)
+    # the token the sender spread over two receivers counts only once, the NFT it didn't receive not at all
+    assert parties(legs) == {("0.0.1001", "0.0.77", 10), ("0.0.2", "0.0.77", 10),
+                             ("0.0.1001", "0.0.88", 1), ("0.0.1002", "0.0.88", 1)}
+    assert {leg[5] for leg in legs if leg[3] == "0.0.88"} == {7}
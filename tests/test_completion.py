@@ -0,0 +1,89 @@
+from hedera_cli.completion import CommandSpec, IdIndex, PrefixTree, complete_nodes
+
+
+def test_prefix_tree():
+    tree = PrefixTree()
+    assert tree.add("0.0.12") and tree.add("0.0.13") and tree.add("0.0.2")
+    assert not tree.add("0.0.12")
+    assert tree.find("0.0.1").count == 2
+    assert tree.remove("0.0.12") and not tree.remove("0.0.12")
+    assert tree.find("0.0.12") is None
+    assert complete_nodes([tree.find("0.0.")], "0.0.") == ["0.0.13", "0.0.2"]
+
+
+def test_many_matches_stop_where_they_branch():
+    tree = PrefixTree()
+    for n in range(1000, 1100):
+        tree.add("0.0.{}".format(n))
+    tree.add("0.0.7")
+    assert complete_nodes([tree.find("0.0.")], "0.0.", limit=50) == ["0.0.1", "0.0.7"]
+    # one branch: extended to where 0.0.1000 .. 0.0.1099 differ
+    assert complete_nodes([tree.find("0.0.1")], "0.0.1", limit=50) == ["0.0.100", "0.0.101", "0.0.102", "0.0.103",
+                                                                     "0.0.104", "0.0.105", "0.0.106", "0.0.107",
+                                                                     "0.0.108", "0.0.109"]
+    assert len(complete_nodes([tree.find("0.0.10")], "0.0.10", limit=100)) == 100
+
+
+def test_id_index_persists_and_keeps_the_most_recent(tmp_path):
+    path = str(tmp_path / "ids.log")
+    index = IdIndex("testnet", path, max_ids=3)
+    index.ready.wait()
+    for n in (1, 2, 3):
+        index.add("account", "0.0.{}".format(n))
+    index.add("account", "0.0.1")
+    index.add("token", "0.0.4-abcde")
+    index.add("account", "0.0.1")
+    index.add("account", "0.0.3")
+    # already the most recent, not logged again
+    index.add("account", "0.0.3")
+    index.close()
+    assert index.complete("0.0.", ("account",)) == ["0.0.1", "0.0.3"]
+    assert index.complete("0.0.", ("token",)) == ["0.0.4"]
+
+    with open(path, "a") as fh:
+        fh.write("accou")
+    index = IdIndex("testnet", path, max_ids=3)
+    index.ready.wait()
+    assert index.complete("0.0.") == ["0.0.1", "0.0.3", "0.0.4"]
+    assert list(index.recent) == [("token", "0.0.4"), ("account", "0.0.1"), ("account", "0.0.3")]
+    # the log had twice as many lines as ids, it was rewritten on load
+    with open(path) as fh:
+        assert len(fh.readlines()) == 3
+    index.close()
+
+
+DOC = """Tokens:
+    token create [--name text] [--symbol text]
+    token kyc token_id account_id  (grant kyc)
+    token info token_id
+    --yes answers the prompts
+    """
+
+
+def test_command_spec(tmp_path):
+    spec = CommandSpec("token", DOC)
+    assert spec.verbs == ["create", "kyc", "info"]
+    assert spec.positions["kyc"] == ["token", "account"]
+    assert spec.complete([], "k", None) == ["kyc"]
+    assert spec.complete(["create"], "--", None) == ["--name", "--symbol", "--yes"]
+
+    index = IdIndex("testnet", str(tmp_path / "ids.log"))
+    index.ready.wait()
+    index.add("token", "0.0.50")
+    index.add("account", "0.0.51")
+    assert spec.complete(["kyc"], "0.0.5", index) == ["0.0.50"]
+    assert spec.complete(["kyc", "0.0.50"], "0.0.5", index) == ["0.0.51"]
+    # an option's value is not completed, and doesn't count as a position
+    assert spec.complete(["kyc", "--yes"], "0.0.5", index) == []
+    assert spec.complete(["kyc", "--memo", "x"], "0.0.5", index) == ["0.0.50"]
+    index.close()
+
+
+def test_cli_completes_created_ids(cli):
+    cli.ids.ready.wait()
+    ok, topic, error = cli.run_scripted("topic create completion")
+    assert ok, error
+    line = "topic info " + topic[:-1]
+    assert topic in cli.completedefault(topic[:-1], line, len("topic info "), len(line))
+    assert cli.completedefault("", "topic ", 6, 6)[:2] == ["create", "info"]
+    assert "--consistency" in cli.completedefault("--c", "topic info --c", 11, 14)
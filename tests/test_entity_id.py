@@ -0,0 +1,39 @@
+import pytest
+
+from hedera_cli import entity_id
+from hedera_cli.entity_id import EntityId, checksum, parse, parse_many
+
+
+def test_checksum_hip15_examples():
+    assert checksum("mainnet", "0.0.123") == "vfmkw"
+    assert checksum("testnet", "0.0.123") == "esxsf"
+    assert checksum("previewnet", "0.0.123") == "ogizo"
+    assert checksum("mainnet", "0.0.1") == "dfkxr"
+
+
+def test_checksum_unknown_network():
+    with pytest.raises(ValueError):
+        checksum("simulator", "0.0.123")
+
+
+def test_parse():
+    eid = parse(" 0.0.123-vfmkw ", "mainnet")
+    assert eid == EntityId(0, 0, 123)
+    assert eid.key() == (0, 0, 123)
+    assert eid.to_string(with_checksum=True, network="testnet") == "0.0.123-esxsf"
+    with pytest.raises(ValueError):
+        parse("0.0.123-vfmkw", "testnet")
+    with pytest.raises(ValueError):
+        parse("0.0.x")
+    # no ledger id, nothing to check against
+    assert parse("0.0.123-abcde", "simulator") == EntityId(0, 0, 123)
+
+
+def test_parse_many():
+    ids, errors = parse_many(["0.0.5", "1.2.3-vfmkw", "bad", "0.0.123-vfmkw"], "mainnet")
+    assert ids == [EntityId(0, 0, 5), None, None, EntityId(0, 0, 123)]
+    assert [i for i, _ in errors] == [1, 2]
+
+
+def test_bare():
+    assert entity_id.bare("0.0.123-vfmkw", "mainnet") == "0.0.123"
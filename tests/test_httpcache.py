@@ -0,0 +1,74 @@
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from hedera_cli.httpcache import CachedSession
+from hedera_cli.metrics import metrics
+
+
+class Handler(BaseHTTPRequestHandler):
+    "every path answers 2000 bytes of JSON, requests are counted per path"
+    hits = {}
+
+    def do_GET(self):
+        Handler.hits[self.path] = Handler.hits.get(self.path, 0) + 1
+        body = json.dumps({"path": self.path, "pad": "é" * 1000}, ensure_ascii=False).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield "http://127.0.0.1:{}".format(httpd.server_address[1])
+    httpd.shutdown()
+
+
+def on_disk(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def test_fresh_responses_are_served_from_disk(server, tmp_path):
+    cache = CachedSession(str(tmp_path))
+    first = cache.get(server + "/fresh", ttl=60)
+    hits = metrics.counters.get("http_cache.hit", 0)
+    again = cache.get(server + "/fresh", ttl=60)
+    assert again.json() == first.json()
+    assert Handler.hits["/fresh"] == 1
+    assert metrics.counters["http_cache.hit"] == hits + 1
+    # a new session reads what the first one stored
+    assert CachedSession(str(tmp_path)).get(server + "/fresh", ttl=60).json() == first.json()
+    assert Handler.hits["/fresh"] == 1
+
+
+def test_lru_size_cap(server, tmp_path):
+    cap = 20_000
+    cache = CachedSession(str(tmp_path), cap_mb=cap / 1024 / 1024)
+    for n in range(30):
+        cache.get(server + "/lru/{}".format(n), immutable=True)
+        assert cache.size <= cap
+        assert cache.size == on_disk(str(tmp_path))
+        # mtime, the LRU clock, has a coarse resolution on some filesystems
+        time.sleep(0.01)
+        # the first one stays recently used
+        cache.get(server + "/lru/0", immutable=True)
+        time.sleep(0.01)
+    assert not [name for name in os.listdir(str(tmp_path)) if not name.endswith(".json")]
+
+    assert Handler.hits["/lru/0"] == 1
+    cache.get(server + "/lru/29", immutable=True)
+    assert Handler.hits["/lru/29"] == 1
+    cache.get(server + "/lru/1", immutable=True)
+    assert Handler.hits["/lru/1"] == 2
+    assert CachedSession(str(tmp_path), cap_mb=cap / 1024 / 1024).size == cache.size
@@ -0,0 +1,73 @@
+import json
+import time
+
+from hedera_cli.journal import EXPIRED, PENDING, Journal
+
+
+def test_compaction_keeps_pending_and_recent_keyed(tmp_path):
+    path = str(tmp_path / "journal.log")
+    old = time.time() - 30 * 86400
+    with open(path, "w") as fh:
+        # an entry with a key past KEEP_KEYED_DAYS, written as an old log would have it
+        fh.write(json.dumps({"op": "submit", "id": "0.0.2@1.0", "type": "AccountCreateTransaction",
+                             "params": None, "key": "old", "ts": old}) + "\n")
+        fh.write(json.dumps({"op": "outcome", "id": "0.0.2@1.0", "status": "SUCCESS"}) + "\n")
+    journal = Journal("testnet", "http://localhost:1", path)
+    journal.submitted("0.0.2@2.0", "TransferTransaction", {"to": "0.0.3"})
+    journal.submitted("0.0.2@3.0", "TransferTransaction")
+    journal.outcome("0.0.2@3.0", "SUCCESS")
+    journal.submitted("0.0.2@4.0", "AccountCreateTransaction", key="new")
+    journal.outcome("0.0.2@4.0", "SUCCESS", "0.0.1001")
+    journal.close()
+
+    journal = Journal("testnet", "http://localhost:1", path)
+    try:
+        assert set(journal.entries) == {"0.0.2@2.0", "0.0.2@4.0"}
+        assert journal.entries["0.0.2@2.0"]["status"] == PENDING
+        assert journal.entries["0.0.2@2.0"]["params"] == {"to": "0.0.3"}
+        assert journal.get_by_key("new")["entity_id"] == "0.0.1001"
+        assert journal.get_by_key("old") is None
+    finally:
+        journal.close()
+    with open(path) as fh:
+        assert len(fh.readlines()) == 3
+
+
+def test_reconcile_against_the_mirror(cli, tmp_path):
+    from hedera import Hbar, TransferTransaction
+    from hedera_cli.hedera_cli import mirror_address
+    journal = Journal("simulator", mirror_address["simulator"], str(tmp_path / "journal.log"))
+    session_journal, cli.journal = cli.journal, journal
+    try:
+        amount = Hbar.fromTinybars(10)
+        txn = cli.execute(lambda: (TransferTransaction()
+                                   .addHbarTransfer(cli.operator_id, amount.negated())
+                                   .addHbarTransfer(cli.operator_id, amount)),
+                          params={"tinybars": 10})
+        txn.getReceipt(cli.client)
+        txid = txn.transactionId.toString()
+        # never sent, and its valid window closed long ago
+        journal.submitted("0.0.2@1000000000.000000000", "TransferTransaction")
+        assert journal.entries[txid]["params"] == {"tinybars": 10}
+
+        assert journal.reconcile() == 2
+        assert journal.entries[txid]["status"] == "SUCCESS"
+        assert journal.entries["0.0.2@1000000000.000000000"]["status"] == EXPIRED
+        assert journal.pending() == []
+    finally:
+        cli.journal = session_journal
+        journal.close()
+
+
+def test_handlers_journal_their_params(cli, new_account):
+    receiver, _ = new_account(1)
+    ok, txid, error = cli.run_scripted("send --to {} --amount 2".format(receiver))
+    assert ok, error
+    assert cli.journal.entries[txid]["params"] == {"from": cli.operator_id.toString(), "to": receiver,
+                                                   "tinybars": 200_000_000}
+
+    ok, _, error = cli.run_scripted("topic create journal test")
+    assert ok, error
+    memos = [e["params"]["memo"] for e in cli.journal.entries.values()
+             if e["type"] == "TopicCreateTransaction"]
+    assert "journal test" in memos
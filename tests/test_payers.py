@@ -0,0 +1,72 @@
+import pytest
+
+
+@pytest.fixture
+def keys(cli):
+    "three payer rows (account id, key), payers.py needs the simulated SDK"
+    from hedera import PrivateKey
+    return [("0.0.{}".format(n), str(PrivateKey.generateED25519())) for n in (5001, 5002, 5003)]
+
+
+def test_round_robin(keys):
+    from hedera_cli.payers import PayerPool
+    pool = PayerPool(keys, strategy="round-robin")
+    names = [pool.acquire().name for _ in range(5)]
+    assert names == ["0.0.5001", "0.0.5002", "0.0.5003", "0.0.5001", "0.0.5002"]
+
+
+def test_least_loaded(keys):
+    from hedera_cli.payers import PayerPool
+    pool = PayerPool(keys, strategy="least-loaded")
+    first, second, third = pool.acquire(), pool.acquire(), pool.acquire()
+    assert {first.name, second.name, third.name} == {"0.0.5001", "0.0.5002", "0.0.5003"}
+    pool.release(second)
+    assert pool.acquire() is second
+    assert [p.inflight for p in pool.payers] == [1, 1, 1]
+    assert second.submitted == 2
+
+
+def test_invalid_strategy_falls_back(keys, capsys):
+    from hedera_cli.payers import PayerPool
+    pool = PayerPool(keys, strategy="random")
+    assert pool.strategy == "least-loaded"
+    assert "invalid payer strategy random" in capsys.readouterr().out
+
+
+def test_low_payers_are_skipped(cli, new_account):
+    from hedera_cli.payers import PayerPool
+    rich, rich_key = new_account(50)
+    poor, poor_key = new_account(1)
+    pool = PayerPool([(poor, poor_key), (rich, rich_key)], strategy="round-robin", min_hbars=10)
+    low = pool.check_balances(cli.client)
+    assert [p.name for p in low] == [poor]
+    assert {pool.acquire().name for _ in range(4)} == {rich}
+
+
+def test_prepare_pays_from_the_pool(cli, new_account):
+    from hedera import AccountId, Hbar, TransferTransaction
+    from hedera_cli.payers import PayerPool
+    payer_id, payer_key = new_account(20)
+    pool = PayerPool([(payer_id, payer_key)])
+    amount = Hbar.fromTinybars(1)
+    txn = (TransferTransaction()
+           .addHbarTransfer(cli.operator_id, amount.negated())
+           .addHbarTransfer(AccountId.fromString(payer_id), amount))
+    payer = pool.prepare(txn, cli.client)
+    assert payer.inflight == 1
+    assert txn.getTransactionId().accountId.toString() == payer_id
+    assert txn.execute(cli.client).getReceipt(cli.client).status.toString() == "SUCCESS"
+    pool.release(payer)
+    assert payer.inflight == 0
+
+
+def test_read_payers_reports_bad_lines(cli, tmp_path, keys):
+    from hedera_cli.payers import read_payers
+    path = tmp_path / "payers.secret"
+    path.write_text("# payers\n{},{}\nnot-an-id,{}\n0.0.7\n".format(keys[0][0], keys[0][1], keys[1][1]))
+    with pytest.raises(ValueError) as e:
+        read_payers(str(path))
+    assert "line 3" in str(e.value) and "line 4: no private key" in str(e.value)
+    path.write_text("{},{}\n".format(*keys[0]))
+    [(eid, key)] = read_payers(str(path))
+    assert str(eid) == keys[0][0] and key == keys[0][1]
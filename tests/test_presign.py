@@ -0,0 +1,50 @@
+import json
+
+from hedera_cli import scheduler
+from hedera_cli.metrics import metrics
+
+
+def results(path):
+    with open(path + ".results") as fh:
+        return sorted((json.loads(line) for line in fh), key=lambda r: r["index"])
+
+
+def test_throttled_presigned_submit(cli, tmp_path, monkeypatch):
+    from hedera import TopicCreateTransaction
+    from hedera_cli import simulator
+    topic = cli.execute(lambda: TopicCreateTransaction()).getReceipt(cli.client).topicId.toString()
+    batch = tmp_path / "batch.ndjson"
+    batch.write_text("".join(json.dumps({"type": "message", "topic": topic, "message": str(i)}) + "\n"
+                             for i in range(20)))
+    prepared = str(tmp_path / "prepared.jsonl")
+    ok, _, error = cli.run_scripted("txn prepare {} {} --workers 1".format(batch, prepared))
+    assert ok, error
+
+    # BUSY over 5 messages a second: the same bytes are sent again until they get through
+    monkeypatch.setattr(scheduler, "BACKOFF_BASE", 0.05)
+    monkeypatch.setitem(simulator.ledger().throttles, "TopicMessageSubmitTransaction", simulator._Throttle(5))
+    busy = metrics.counters["busy.TopicMessageSubmitTransaction"]
+    ok, _, error = cli.run_scripted("txn submit {} --concurrency 8 --receipts".format(prepared))
+    assert ok, error
+    assert metrics.counters["busy.TopicMessageSubmitTransaction"] > busy
+    first = results(prepared)
+    assert [r.get("status") for r in first] == ["SUCCESS"] * 20
+
+    # sent again, every transaction is a duplicate of one that already went through
+    monkeypatch.setitem(simulator.ledger().throttles, "TopicMessageSubmitTransaction", simulator._Throttle(10000))
+    ok, _, error = cli.run_scripted("txn submit {} --receipts".format(prepared))
+    assert ok, error
+    again = results(prepared)
+    assert [r.get("status") for r in again] == ["SUCCESS"] * 20
+    assert [r["transaction_id"] for r in again] == [r["transaction_id"] for r in first]
+
+
+def test_node_ids_once_each(cli, monkeypatch):
+    from hedera import AccountId
+    from hedera_cli.simulator import HashMap
+    network = HashMap([("10.0.0.1:50211", AccountId.fromString("0.0.4")),
+                       ("10.0.0.2:50211", AccountId.fromString("0.0.3")),
+                       ("10.0.0.1:50212", AccountId.fromString("0.0.4")),
+                       ("10.0.0.3:50211", AccountId.fromString("0.0.10"))])
+    monkeypatch.setattr(cli.client, "getNetwork", lambda: network)
+    assert cli.node_ids() == ["0.0.3", "0.0.4", "0.0.10"]
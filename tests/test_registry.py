@@ -0,0 +1,39 @@
+from hedera_cli import abi
+from hedera_cli.registry import ContractRegistry
+
+ABI = [
+    {"type": "constructor", "inputs": [{"name": "supply", "type": "uint256"}]},
+    {"type": "function", "name": "transfer", "stateMutability": "nonpayable",
+     "inputs": [{"name": "to", "type": "address"}, {"name": "value", "type": "uint256"}],
+     "outputs": [{"type": "bool"}]},
+    {"type": "function", "name": "setName", "stateMutability": "nonpayable",
+     "inputs": [{"name": "name", "type": "string"}], "outputs": []},
+    {"type": "event", "name": "Transfer", "inputs": []},
+    ]
+
+
+def test_register_and_reload(tmp_path):
+    path = str(tmp_path / "contracts.json")
+    registry = ContractRegistry(path)
+    compiled = registry.register("testnet", "0.0.5005-abcde", "Token", ABI)
+    assert sorted(compiled.by_signature) == ["setName(string)", "transfer(address,uint256)"]
+    assert compiled.function("transfer") is compiled.function("transfer(address,uint256)")
+    reloaded = ContractRegistry(path)
+    assert reloaded.contract_ids("testnet") == ["0.0.5005"]
+    assert reloaded.get("mainnet", "0.0.5005") is None
+    assert reloaded.get("testnet", "0.0.5005").selectors() == compiled.selectors()
+    assert sorted(reloaded.function_names("testnet", "0.0.5005")) == ["setName", "transfer"]
+
+
+def test_decode_call(tmp_path):
+    registry = ContractRegistry(str(tmp_path / "contracts.json"))
+    compiled = registry.register("testnet", "0.0.5005", "Token", ABI)
+    data = compiled.function("setName").encode_input(["a, b"])
+    func, values = registry.decode_call("testnet", "0.0.5005", data)
+    assert func.signature == "setName(string)"
+    assert values == ["a, b"]
+    data = compiled.function("transfer").encode_input(["0.0.1234", 7])
+    func, values = registry.decode_call("testnet", "0.0.5005", data)
+    assert values == ["0x" + abi.entity_to_address("0.0.1234").hex(), 7]
+    assert registry.decode_call("testnet", "0.0.5005", b"\0\0\0\0") == (None, None)
+    assert registry.decode_call("testnet", "0.0.9", data) == (None, None)
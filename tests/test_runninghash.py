@@ -0,0 +1,71 @@
+import base64
+import json
+
+from hedera_cli import runninghash
+from hedera_cli.runninghash import HASH_SIZE, link_hash, read_export, verify
+
+TOPIC = "0.0.1500"
+PAYER = "0.0.2"
+
+
+def chain(count, first=1):
+    "mirror node message objects with valid running hashes"
+    messages = []
+    prev = bytes(HASH_SIZE)
+    for seq in range(1, first + count):
+        message = "message {}".format(seq).encode()
+        seconds, nanos = 1_700_000_000 + seq, seq * 7
+        prev = link_hash(prev, (0, 0, 1500), (0, 0, 2), seconds, nanos, seq, message)
+        if seq >= first:
+            messages.append({"sequence_number": seq, "payer_account_id": PAYER,
+                             "consensus_timestamp": "{}.{:09d}".format(seconds, nanos),
+                             "message": base64.b64encode(message).decode(),
+                             "running_hash": base64.b64encode(prev).decode(),
+                             "running_hash_version": 3})
+    return messages
+
+
+def test_valid_chain():
+    result = verify(chain(10), TOPIC, workers=1, chunk_size=3)
+    assert result["break"] is None
+    assert (result["checked"], result["first"], result["last"]) == (10, 1, 10)
+    assert not result["anchored"]
+
+
+def test_anchored_chain():
+    result = verify(chain(5, first=4), TOPIC, workers=1)
+    assert result["break"] is None
+    assert result["anchored"]
+    assert (result["first"], result["last"], result["checked"]) == (4, 8, 4)
+
+
+def test_tampered_message():
+    messages = chain(10)
+    messages[6]["message"] = base64.b64encode(b"changed").decode()
+    assert verify(messages, TOPIC, workers=1, chunk_size=4)["break"] == (7, "running hash mismatch")
+
+
+def test_gap_and_version():
+    messages = chain(6)
+    del messages[3]
+    assert verify(messages, TOPIC, workers=1)["break"] == (4, "missing messages 4..4")
+    messages = chain(3)
+    messages[2]["running_hash_version"] = 2
+    assert verify(messages, TOPIC, workers=1)["break"] == (3, "unsupported running hash version 2")
+
+
+def test_worker_pool():
+    messages = chain(50)
+    messages[41]["payer_account_id"] = "0.0.3"
+    assert verify(messages, TOPIC, workers=2, chunk_size=8)["break"] == (42, "running hash mismatch")
+
+
+def test_read_export(tmp_path):
+    messages = chain(3)
+    lines = tmp_path / "messages.jsonl"
+    lines.write_text("".join(json.dumps(m) + "\n" for m in messages))
+    page = tmp_path / "page.json"
+    page.write_text(json.dumps({"messages": messages, "links": {"next": None}}, indent=2))
+    assert list(read_export(str(lines))) == messages
+    assert list(read_export(str(page))) == messages
+    assert runninghash.verify(read_export(str(page)), TOPIC, workers=1)["break"] is None
@@ -0,0 +1,134 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from hedera_cli import scheduler
+from hedera_cli.metrics import metrics
+from hedera_cli.scheduler import Scheduler, TokenBucket, status_name
+
+
+class FakeTxn:
+    "execute() raises `outcome` if it is an exception, or returns it"
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+
+    def getClass(self):
+        return self
+
+    def getSimpleName(self):
+        return "FakeTransaction"
+
+    def isFrozen(self):
+        return False
+
+    def execute(self, client):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+def busy():
+    return Exception("com.hedera.hashgraph.sdk.PrecheckStatusException: Hedera transaction "
+                     "`0.0.2@1.2` failed pre-check with the status `BUSY`")
+
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(scheduler, "BACKOFF_BASE", 0.001)
+
+
+def builder(*outcomes):
+    "a build function for Scheduler.submit, counting the transactions it built"
+    built = []
+
+    def build():
+        built.append(FakeTxn(outcomes[min(len(built), len(outcomes) - 1)]))
+        return built[-1]
+    return build, built
+
+
+def test_bucket_paces_to_rate():
+    bucket = TokenBucket(20)
+    start = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    # one token at the start, then one every 1/20 s
+    assert time.monotonic() - start >= 0.45
+
+
+def test_bucket_aimd():
+    bucket = TokenBucket(100, floor=10)
+    bucket.on_busy()
+    bucket.on_busy()
+    # a burst of BUSY counts once
+    assert bucket.rate == 50
+    bucket.last_decrease -= 1
+    bucket.on_busy()
+    assert bucket.rate == 25
+    for _ in range(3):
+        bucket.last_decrease -= 1
+        bucket.on_busy()
+    assert bucket.rate == 10
+    before = bucket.rate
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(before + 100 * 0.02 / before)
+    for _ in range(10_000):
+        bucket.on_success()
+    assert bucket.rate == 100
+
+
+def test_busy_is_retried_with_a_new_transaction(fast_backoff):
+    build, built = builder(busy(), busy(), "response")
+    assert Scheduler(lambda: None).submit(build) == "response"
+    assert len(built) == 3
+    assert len({id(t) for t in built}) == 3
+
+
+def test_retries_run_out(fast_backoff):
+    build, built = builder(busy())
+    with pytest.raises(Exception, match="BUSY"):
+        Scheduler(lambda: None, max_retries=3).submit(build)
+    assert len(built) == 4
+
+
+def test_other_errors_are_not_retried(fast_backoff):
+    build, built = builder(Exception("failed pre-check with the status `INVALID_SIGNATURE`"))
+    with pytest.raises(Exception, match="INVALID_SIGNATURE"):
+        Scheduler(lambda: None).submit(build)
+    assert len(built) == 1
+
+
+def test_busy_halves_the_rate(fast_backoff):
+    s = Scheduler(lambda: None)
+    build, _ = builder(busy(), "response")
+    s.submit(build)
+    half = scheduler.DEFAULT_THROTTLE / 2
+    # halved by the BUSY, then the success adds a little
+    assert s.bucket("FakeTransaction").rate == pytest.approx(half + scheduler.DEFAULT_THROTTLE * 0.02 / half)
+
+
+def test_status_name():
+    assert status_name(busy()) == "BUSY"
+    assert status_name(Exception("timeout")) == "PRECHECK_FAILED"
+
+
+def test_throttled_network(cli, monkeypatch):
+    "the simulated network answers BUSY over 5 messages a second, every send still lands"
+    from hedera import TopicCreateTransaction, TopicMessageSubmitTransaction
+    from hedera_cli import simulator
+    monkeypatch.setattr(scheduler, "BACKOFF_BASE", 0.05)
+    monkeypatch.setitem(simulator.ledger().throttles, "TopicMessageSubmitTransaction", simulator._Throttle(5))
+    topic = cli.execute(lambda: TopicCreateTransaction()).getReceipt(cli.client).topicId
+    busy_before = metrics.counters["busy.TopicMessageSubmitTransaction"]
+
+    def send(i):
+        txn = cli.execute(lambda: TopicMessageSubmitTransaction().setTopicId(topic).setMessage(str(i)))
+        return txn.getReceipt(cli.client).topicSequenceNumber
+
+    with ThreadPoolExecutor(8) as pool:
+        sequence_numbers = list(pool.map(send, range(16)))
+    assert sorted(sequence_numbers) == list(range(1, 17))
+    assert metrics.counters["busy.TopicMessageSubmitTransaction"] > busy_before
+    assert cli.scheduler.bucket("TopicMessageSubmitTransaction").rate < scheduler.THROTTLES["TopicMessageSubmitTransaction"]
@@ -0,0 +1,66 @@
+import pytest
+
+from hedera_cli import script
+
+
+def planned(text):
+    return script.plan(script.parse(text))
+
+
+def test_parse_skips_comments_and_stops_at_exit():
+    lines = script.parse("# setup\n\naccount balance\n  $t = topic create  \nexit\naccount info\n")
+    assert [(l.number, l.var, l.command) for l in lines] == [
+        (3, None, "account balance"), (4, "t", "topic create")]
+
+
+def test_plan():
+    lines = planned("$a = account create\n"
+                    "$b = account create\n"
+                    "send --to $a --amount 1\n"
+                    "account info 0.0.1234\n"
+                    "account balance 0.0.1234\n"
+                    "wait\n"
+                    "account info $b\n")
+    assert [(sorted(l.deps), sorted(l.after)) for l in lines] == [
+        ([], []),
+        ([], []),
+        ([0], [0]),
+        ([], []),
+        ([], [3]),
+        ([], [0, 1, 2, 3, 4]),
+        ([1, 5], [1]),
+        ]
+    assert [l.barrier for l in lines] == [False] * 5 + [True, False]
+
+
+def test_barriers_chain():
+    lines = planned("network testnet\naccount balance\nnetwork mainnet\naccount balance\n")
+    assert [sorted(l.deps) for l in lines] == [[], [0], [], [2]]
+    assert sorted(lines[2].after) == [0, 1]
+
+
+def test_variable_used_before_set():
+    with pytest.raises(ValueError, match=r"line 1: \$x"):
+        planned("send --to $x --amount 1\n$x = account create\n")
+
+
+def test_parse_answers():
+    assert script.parse_answers('token create --name "Gold Coin" --yes --decimals 2 --force') == {
+        "name": "Gold Coin", "yes": True, "decimals": "2", "force": True}
+    assert script.parse_answers("topic send --message") == {"message": True}
+
+
+def test_positional_args():
+    assert script.positional_args('topic send 0.0.5 "hi there" --yes --memo m 0.0.6') == [
+        "topic", "send", "0.0.5", '"hi there"', "0.0.6"]
+
+
+def test_masked():
+    assert script.masked("payers add 0.0.5 --private-key 302e0201 --amount 1") == \
+        "payers add 0.0.5 --private-key *** --amount 1"
+    assert script.masked("keygen --encrypt --passphrase 'two words'") == \
+        "keygen --encrypt --passphrase ***"
+
+
+def test_last_line():
+    assert script.last_line("\x1b[32mfirst\nNew AccountId: 0.0.7\x1b[0m\n\n") == "New AccountId: 0.0.7"
@@ -0,0 +1,48 @@
+import pytest
+
+from hedera_cli.serials import SerialSet, describe
+
+
+def test_parse_merges_ranges():
+    s = SerialSet.parse("7000-7100, 1-5000\n5001 9000")
+    assert str(s) == "1-5001,7000-7100,9000"
+    assert len(s) == 5001 + 101 + 1
+    assert (s.first(), s.last()) == (1, 9000)
+
+
+@pytest.mark.parametrize("text", ["0", "5-3", "x", "1-y"])
+def test_parse_invalid(text):
+    with pytest.raises(ValueError):
+        SerialSet.parse(text)
+
+
+def test_read_skips_comments(tmp_path):
+    path = tmp_path / "serials.txt"
+    path.write_text("1-3 # first\n# all comment\n10\n")
+    assert str(SerialSet.read(str(path))) == "1-3,10"
+
+
+def test_from_sorted():
+    assert str(SerialSet.from_sorted([1, 2, 3, 3, 5, 7, 8])) == "1-3,5,7-8"
+    assert not SerialSet.from_sorted([])
+
+
+def test_and_sub_match_python_sets():
+    a = SerialSet.parse("1-20,30-40,50,60-70")
+    b = SerialSet.parse("5-10,15-35,50-65,100")
+    assert set(a & b) == set(a) & set(b)
+    assert set(a - b) == set(a) - set(b)
+    assert set(b - a) == set(b) - set(a)
+    assert list(a - b) == sorted(set(a) - set(b))
+
+
+def test_batches():
+    s = SerialSet.parse("1-12,20-27")
+    batches = list(s.batches())
+    assert [len(b) for b in batches] == [10, 10]
+    assert batches[1] == [11, 12, 20, 21, 22, 23, 24, 25, 26, 27]
+    assert list(SerialSet.parse("1-3").batches(2)) == [[1, 2], [3]]
+
+
+def test_describe():
+    assert describe([5, 3, 4, 9]) == "3-5,9"
@@ -0,0 +1,103 @@
+import re
+import time
+
+
+def tinybars(cli, account_id):
+    from hedera import AccountBalanceQuery, AccountId
+    query = AccountBalanceQuery().setAccountId(AccountId.fromString(account_id))
+    return query.execute(cli.client).hbars.toTinybars()
+
+
+def settled(cli, account_id, old, timeout=5):
+    "the account's balance once it's no longer `old`, send doesn't wait for consensus"
+    deadline = time.time() + timeout
+    while tinybars(cli, account_id) == old and time.time() < deadline:
+        time.sleep(0.05)
+    return tinybars(cli, account_id)
+
+
+def test_pool_paid_send(cli, new_account):
+    from hedera_cli.payers import PayerPool
+    payer, key = new_account()
+    receiver, _ = new_account(1)
+    operator = cli.operator_id.toString()
+    before = {a: tinybars(cli, a) for a in (payer, receiver, operator)}
+    cli.payers.add(payer, key)
+    try:
+        ok, txid, error = cli.run_scripted("send --to {} --amount 2".format(receiver))
+    finally:
+        cli.payers = PayerPool()
+    assert ok, error
+    assert txid.startswith(payer + "@")
+    assert settled(cli, receiver, before[receiver]) == before[receiver] + 200_000_000
+    # the operator sends the hbars, the pool account pays the fee
+    assert tinybars(cli, operator) == before[operator] - 200_000_000
+    assert tinybars(cli, payer) < before[payer]
+
+
+def test_script_run(cli, capsys):
+    from hedera_cli import script
+    text = """
+$alice = account create --initial-hbars 5
+$topic = topic create
+topic send $topic --message "hello $alice"
+topic send $topic --message two
+$gold = token create --name Gold --symbol GLD --decimals 2 --initial-supply 1000 --yes
+send --to $alice --amount 1
+"""
+    assert script.run(cli, text, jobs=4) == 0
+    out = re.sub(r"\x1b\[[0-9;]*m", "", capsys.readouterr().out)
+    alice = re.search(r"New AccountId: (\S+)", out).group(1)
+    topic = re.search(r"New topic created:\s+(\S+)", out).group(1)
+    assert "6 lines: 6 ok, 0 failed, 0 skipped" in out
+    assert settled(cli, alice, 500_000_000) == 600_000_000
+    ok, _, error = cli.run_scripted("topic verify {} --workers 1".format(topic))
+    assert ok, error
+    assert "running hash chain verified" in capsys.readouterr().out
+
+
+def test_bulk_create_from_encrypted_keystore(cli, tmp_path):
+    from hedera_cli import keystore
+    keys = str(tmp_path / "accounts.keys")
+    keystore.generate_keystore(keys, 3, workers=1, passphrase="pw")
+    out = str(tmp_path / "accounts.csv")
+    line = "account create --count 3 --initial-hbars 1 --out {} --keystore {}".format(out, keys)
+    ok, _, error = cli.run_scripted(line)
+    assert not ok and error == "missing --passphrase"
+    ok, _, error = cli.run_scripted(line + " --passphrase wrong")
+    assert not ok and "wrong passphrase" in error
+    ok, _, error = cli.run_scripted(line + " --passphrase pw")
+    assert ok, error
+    with open(out) as fh:
+        rows = [row.strip().split(",") for row in fh]
+    # rows are written as receipts arrive
+    assert {pub for _, pub in rows} == {pub for _, pub in keystore.read_keystore(keys, "pw")}
+
+
+def info_output(cli, capsys, line):
+    ok, _, error = cli.run_scripted(line)
+    assert ok, error
+    return re.sub(r"\x1b\[[0-9;]*m", "", capsys.readouterr().out)
+
+
+def test_eventual_info_matches_strong(cli, capsys):
+    from hedera import ContractCreateTransaction, FileCreateTransaction, Hbar
+    ok, topic, error = cli.run_scripted("topic create info test")
+    assert ok, error
+    ok, _, error = cli.run_scripted("topic send {} --message one".format(topic))
+    assert ok, error
+    capsys.readouterr()
+    strong = info_output(cli, capsys, "topic info {} --consistency strong".format(topic))
+    assert "expires : 20" in strong
+    assert info_output(cli, capsys, "topic info {} --consistency eventual".format(topic)) == strong
+
+    key = cli.operator_key
+    bytecode = b"6080604052"
+    file_id = (FileCreateTransaction().setKeys(key.getPublicKey()).setContents(bytecode)
+               .execute(cli.client).getReceipt(cli.client).fileId)
+    contract = (ContractCreateTransaction().setGas(100_000).setBytecodeFileId(file_id).setAdminKey(key)
+                .setMaxTransactionFee(Hbar(20)).execute(cli.client).getReceipt(cli.client).contractId)
+    capsys.readouterr()
+    strong = info_output(cli, capsys, "contract info {} --consistency strong".format(contract.toString()))
+    assert "storage: {}".format(len(bytecode)) in strong
+    assert info_output(cli, capsys, "contract info {} --consistency eventual".format(contract.toString())) == strong
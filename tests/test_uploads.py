@@ -0,0 +1,82 @@
+import time
+
+from hedera_cli.uploads import UploadIndex, digest
+
+
+def test_lookup_and_record(tmp_path):
+    path = str(tmp_path / "uploads.json")
+    index = UploadIndex(path)
+    index.record("testnet", "0.0.10", "hello", "key1", memo="greeting")
+    assert index.lookup("testnet", b"hello", "key1") == "0.0.10"
+    assert index.lookup("testnet", "hello", "key1", memo="greeting") == "0.0.10"
+    assert index.lookup("testnet", "hello", "key1", memo="other") is None
+    assert index.lookup("testnet", "hello", "key2") is None
+    assert index.lookup("mainnet", "hello", "key1") is None
+
+    # saved, and a record without memo keeps the one already there
+    index = UploadIndex(path)
+    index.record("testnet", "0.0.10", "hello world", "key1")
+    assert index.file("testnet", "0.0.10") == {"hash": digest("hello world"), "size": 11,
+                                                "expiry": index.file("testnet", "0.0.10")["expiry"],
+                                                "key": "key1", "memo": "greeting"}
+    assert index.lookup("testnet", "hello", "key1") is None
+    assert index.lookup("testnet", "hello world", "key1") == "0.0.10"
+
+
+def test_expired_and_forgotten(tmp_path):
+    index = UploadIndex(str(tmp_path / "uploads.json"))
+    index.record("testnet", "0.0.10", "old", "key1", expiry=time.time() - 1)
+    assert index.lookup("testnet", "old", "key1") is None
+    index.record("testnet", "0.0.11", "new", "key1")
+    index.forget("testnet", "0.0.11")
+    assert index.lookup("testnet", "new", "key1") is None
+    assert index.file("testnet", "0.0.11") is None
+
+
+def test_delta(tmp_path):
+    index = UploadIndex(str(tmp_path / "uploads.json"))
+    index.record("testnet", "0.0.10", b"abc", "key1")
+    assert index.delta("testnet", "0.0.10", b"abcdef", 3) == b"def"
+    assert index.delta("testnet", "0.0.10", "abc", 3) == b""
+    # not an extension of what the file holds
+    assert index.delta("testnet", "0.0.10", b"xbcdef", 3) is None
+    # the file changed size since we recorded it
+    assert index.delta("testnet", "0.0.10", b"abcdef", 4) is None
+    assert index.delta("testnet", "0.0.10", b"ab", 3) is None
+    assert index.delta("testnet", "0.0.99", b"abcdef", 3) is None
+
+
+def test_file_create_reuses_an_upload(cli):
+    contents = "uploads test {}".format(time.time())
+    ok, first, error = cli.run_scripted("file create --memo m --contents '{}' --yes".format(contents))
+    assert ok, error
+    ok, again, error = cli.run_scripted("file create --memo m --contents '{}' --yes".format(contents))
+    assert ok, error
+    assert again == first
+    # another memo or --force makes a new file
+    ok, other, error = cli.run_scripted("file create --memo n --contents '{}' --yes".format(contents))
+    assert ok, error
+    assert other != first
+    ok, forced, error = cli.run_scripted("file create --memo m --contents '{}' --yes --force".format(contents))
+    assert ok, error
+    assert forced not in (first, other)
+
+
+def test_file_append_sends_only_the_delta(cli, tmp_path, capsys):
+    from hedera import FileContentsQuery, FileId
+    local = tmp_path / "data.txt"
+    local.write_text("first part\n")
+    ok, file_id, error = cli.run_scripted("file create {} --yes".format(local))
+    assert ok, error
+
+    local.write_text("first part\nsecond part\n")
+    capsys.readouterr()
+    ok, _, error = cli.run_scripted("file append {} {} --yes".format(file_id, local))
+    assert ok, error
+    assert "appending the last 12 bytes" in capsys.readouterr().out
+    contents = FileContentsQuery().setFileId(FileId.fromString(file_id)).execute(cli.client)
+    assert contents.toStringUtf8() == "first part\nsecond part\n"
+
+    ok, _, error = cli.run_scripted("file append {} {} --yes".format(file_id, local))
+    assert ok, error
+    assert "nothing to append" in capsys.readouterr().out
@@ -0,0 +1,106 @@
+import re
+import threading
+
+from hedera_cli.watch import Cursor, Watcher, diff
+
+
+def plain(text):
+    return re.sub(r"\x1b\[[0-9;]*m", "", text)
+
+
+def test_diff():
+    assert diff({"a": 1, "b": 2}, {"a": 1, "b": 3, "c": 4}) == ["b: 2 -> 3", "+ c: 4"]
+    assert diff({"a": 1, "b": 2}, {"a": 1}) == ["- b: 2"]
+    assert diff({"a": 1}, {"a": 1}) == []
+
+
+def test_cursor_asks_for_rows_after_the_last_seen():
+    rows = [{"ts": 1}, {"ts": 2}]
+    asked = []
+
+    def pages(params):
+        asked.append(params)
+        if params["order"] == "desc":
+            yield {"rows": rows[-1:]}
+        else:
+            after = int(params["ts"].split(":")[1])
+            yield {"rows": [r for r in rows if r["ts"] > after]}
+
+    cursor = Cursor(pages, lambda page: page["rows"], "ts", lambda row: row["ts"])
+    # the first poll only finds where the list ends
+    assert cursor.poll() == []
+    assert cursor.poll() == []
+    rows.extend([{"ts": 3}, {"ts": 4}])
+    assert cursor.poll() == [{"ts": 3}, {"ts": 4}]
+    assert cursor.poll() == []
+    assert asked[1:] == [{"order": "asc", "ts": "gt:2"}, {"order": "asc", "ts": "gt:2"},
+                         {"order": "asc", "ts": "gt:4"}]
+
+
+def test_tick_prints_only_changes(capsys):
+    state = {"balance": 5, "memo": "m"}
+    calls = []
+
+    def poll():
+        calls.append(1)
+        return dict(state), []
+
+    watcher = Watcher(interval=0.01)
+    source = watcher.source(("account", "0.0.5"), poll)
+    assert watcher.source(("account", "0.0.5"), None) is source
+    watcher.add("account balance 0.0.5", source, lambda data, first: {"balance": data["balance"]})
+    watcher.add("account info 0.0.5", source)
+    watcher.add("account info 0.0.5", source)
+    assert len(source.items) == 2
+
+    watcher.tick(source)
+    out = plain(capsys.readouterr().out)
+    assert "account balance 0.0.5" in out and "    memo: m" in out
+    assert not watcher.tick(source)
+    assert capsys.readouterr().out == ""
+    state["balance"] = 7
+    assert watcher.tick(source)
+    out = plain(capsys.readouterr().out)
+    assert out.count("balance: 5 -> 7") == 2 and "memo" not in out
+    # one request per poll for both items
+    assert len(calls) == 3
+
+
+def test_quiet_sources_back_off(capsys):
+    watcher = Watcher(interval=0.01, max_interval=0.04)
+    source = watcher.source(("quiet",), lambda: ({"n": 1}, []))
+    watcher.add("quiet", source)
+    watcher.run(duration=0.3)
+    assert source.interval == 0.04
+    # 0.01, 0.02, 0.04 and then every 0.04s, where 0.01 throughout would poll 30 times
+    assert watcher.polls < 15
+
+
+def test_watch_on_the_simulator(cli, new_account, capsys):
+    from hedera import AccountId, Hbar, TopicMessageSubmitTransaction, TopicId, TransferTransaction
+    account, _ = new_account(1)
+    ok, topic, error = cli.run_scripted("topic create watched")
+    assert ok, error
+
+    def change():
+        amount = Hbar.fromTinybars(5)
+        (TransferTransaction()
+         .addHbarTransfer(cli.operator_id, amount.negated())
+         .addHbarTransfer(AccountId.fromString(account), amount)
+         .execute(cli.client).getReceipt(cli.client))
+        (TopicMessageSubmitTransaction().setTopicId(TopicId.fromString(topic)).setMessage("ping")
+         .execute(cli.client).getReceipt(cli.client))
+
+    # the simulator takes a moment to reach consensus on each transaction
+    timer = threading.Timer(0.2, change)
+    timer.start()
+    capsys.readouterr()
+    line = "watch account balance {} ; topic get {} --interval 0.1 --max-interval 0.2 --duration 3"
+    ok, _, error = cli.run_scripted(line.format(account, topic))
+    timer.join()
+    assert ok, error
+    out = plain(capsys.readouterr().out)
+    assert "watching 2 requests" in out
+    assert out.count("    hbars: 1 ℏ\n") == 1
+    assert "    hbars: 1 ℏ -> 1.00000005 ℏ" in out
+    assert "{} #1: ping".format(topic) in out